@@ -0,0 +1,104 @@
+"""
+Rolling traffic analytics for the QuickFix chatbot
+Message counts per intent and per service over sliding windows, kept in
+fixed-size ring buffers so reading them costs the same at any traffic level
+"""
+
+import threading
+import time
+from collections import Counter
+
+# Window name -> length in seconds
+DEFAULT_WINDOWS = {'1m': 60, '5m': 300, '1h': 3600}
+
+
+class RollingCounter:
+    """Counts per key over the last ``window`` seconds.
+
+    The window is a ring of ``buckets`` slots of ``window / buckets`` seconds
+    each. Running totals are kept alongside, so a slot that falls out of the
+    window is subtracted once instead of re-summing the ring on every read.
+    Counts are exact to one slot of resolution.
+    """
+
+    def __init__(self, window, buckets=60, clock=time.monotonic):
+        self.window = window
+        self.slot_seconds = window / buckets
+        self._clock = clock
+        self._buckets = [Counter() for _ in range(buckets)]
+        self._totals = Counter()
+        self._slot = None  # Absolute number of the newest slot
+
+    def _advance(self, now):
+        """Retire every slot that has left the window since the last call"""
+        slot = int(now // self.slot_seconds)
+        if self._slot is None:
+            self._slot = slot
+            return
+        size = len(self._buckets)
+        if slot - self._slot >= size:
+            for bucket in self._buckets:
+                bucket.clear()
+            self._totals.clear()
+        else:
+            for stale in range(self._slot + 1, slot + 1):
+                bucket = self._buckets[stale % size]
+                if bucket:
+                    self._totals.subtract(bucket)
+                    bucket.clear()
+        self._slot = max(slot, self._slot)
+
+    def add(self, keys, now=None):
+        """Count one occurrence of each of ``keys``"""
+        now = self._clock() if now is None else now
+        self._advance(now)
+        bucket = self._buckets[self._slot % len(self._buckets)]
+        for key in keys:
+            bucket[key] += 1
+            self._totals[key] += 1
+
+    def totals(self, now=None):
+        """Counts per key over the window (keys with no traffic left out)"""
+        self._advance(self._clock() if now is None else now)
+        return {key: count for key, count in self._totals.items() if count > 0}
+
+
+class TrafficStats:
+    """Message, intent and service rates over several rolling windows"""
+
+    def __init__(self, windows=None, buckets=60, clock=time.monotonic):
+        self._clock = clock
+        self._windows = {name: RollingCounter(seconds, buckets, clock)
+                         for name, seconds in (windows or DEFAULT_WINDOWS).items()}
+        self._lock = threading.Lock()
+
+    def record(self, intent, service_type=None):
+        """Count one message with its intent and (optional) service"""
+        keys = [('messages', None), ('intent', intent or 'unknown')]
+        if service_type:
+            keys.append(('service', service_type))
+        with self._lock:
+            now = self._clock()
+            for counter in self._windows.values():
+                counter.add(keys, now)
+
+    def snapshot(self):
+        """Counts and per-minute rates for every window"""
+        snapshot = {}
+        with self._lock:
+            now = self._clock()
+            for name, counter in self._windows.items():
+                totals = counter.totals(now)
+                per_minute = 60.0 / counter.window
+                intents = {key: count for (kind, key), count in totals.items() if kind == 'intent'}
+                services = {key: count for (kind, key), count in totals.items() if kind == 'service'}
+                messages = totals.get(('messages', None), 0)
+                snapshot[name] = {
+                    'messages': messages,
+                    'messagesPerMinute': round(messages * per_minute, 3),
+                    'intents': intents,
+                    'services': services,
+                    'intentsPerMinute': {key: round(count * per_minute, 3) for key, count in intents.items()},
+                    'servicesPerMinute': {key: round(count * per_minute, 3) for key, count in services.items()}
+                }
+        return snapshot
@@ -3,33 +3,70 @@ QuickFix AI Chatbot Service
 Python-based chatbot with NLP capabilities for customer support
 """
 
-from flask import Flask, request, jsonify
+from startup import StartupTimer
+STARTUP = StartupTimer()  # Before the other imports, so they are timed too
+
+from flask import Flask, Response, request, jsonify, g, stream_with_context
 from flask_cors import CORS
 import os
 from datetime import datetime
-import json
 import re
-import requests
-try:
-    import nltk
-    from nltk.tokenize import word_tokenize
-    from nltk.corpus import stopwords
-    from nltk.stem import WordNetLemmatizer
-    NLTK_AVAILABLE = True
-    # Download required NLTK data (only first time)
-    try:
-        nltk.data.find('tokenizers/punkt')
-    except LookupError:
-        nltk.download('punkt', quiet=True)
-        nltk.download('stopwords', quiet=True)
-        nltk.download('wordnet', quiet=True)
-except ImportError:
-    NLTK_AVAILABLE = False
-    print("NLTK not available, using basic NLP")
+import logging
+import contextvars
+from importlib.util import find_spec
+from concurrent.futures import ThreadPoolExecutor, wait
+from intent_matcher import IntentMatcher
+from keyword_automaton import ServiceMatcher, first_matches
+from rendering import ServiceInfoRenderer
+from language_detector import LanguageDetector
+from technician_ranking import TechnicianRanker, parse_coordinates
+from preprocessing import TextPreprocessor
+from retrieval import RetrievalIndex
+from context_store import create_context_store
+from analytics import TrafficStats
+from backend_client import (BackendClient, AsyncBackendClient, HTTPX_AVAILABLE,
+                            start_deadline, end_deadline, deadline_scope, remaining_budget)
+from caching import SingleFlightCache, LRUCache
+import structured_logging
+from structured_logging import configure_logging, parse_rates, bind_route, unbind_route
+from metrics import REGISTRY, Counter, Gauge, Histogram, timed
+from profiling import RequestProfiler
+from static_responses import StaticJSONResponse
+from json_provider import CompactJSONProvider
+from compression import ResponseCompressor
+from time import perf_counter
+
+# NLTK is imported by the preprocessor when it is first needed; its corpora come
+# from NLTK_DATA_DIR (filled at build time by download_nltk_data.py), never the network
+NLTK_AVAILABLE = find_spec('nltk') is not None
+NLTK_DATA_DIR = os.environ.get('NLTK_DATA_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'nltk_data'))
+STARTUP.mark('imports')
 
 app = Flask(__name__)
+# JSON is sent as raw UTF-8 (JSON_ENSURE_ASCII=true restores the \uXXXX escapes),
+# encoded by orjson when it is installed
+app.json = CompactJSONProvider(app)
+app.json.ensure_ascii = os.environ.get('JSON_ENSURE_ASCII', 'false').lower() == 'true'
 CORS(app)
 
+# Structured JSON logs: request threads only enqueue records, a background thread
+# writes them. Sampling specs look like "DEBUG=0.1" and "/health=0,/chat=0.5"
+configure_logging(
+    level=os.environ.get('LOG_LEVEL', 'INFO'),
+    queue_size=int(os.environ.get('LOG_QUEUE_SIZE', 10000)),
+    level_rates=parse_rates(os.environ.get('LOG_SAMPLE_RATES')),
+    route_rates=parse_rates(os.environ.get('LOG_ROUTE_SAMPLE_RATES')),
+    redact=os.environ.get('LOG_REDACT_MESSAGES', 'false').lower() == 'true'
+)
+logger = logging.getLogger('quickfix.chatbot')
+
+# Pipeline metrics, exposed at /metrics (per worker)
+STAGE_SECONDS = Histogram('quickfix_chat_stage_seconds', 'Time spent in each chat pipeline stage', ['stage'])
+CHAT_MESSAGES = Counter('quickfix_chat_messages_total', 'Chat messages answered, by intent', ['intent'])
+HTTP_SECONDS = Histogram('quickfix_http_request_seconds', 'HTTP request latency by route', ['route'])
+HTTP_REQUESTS = Counter('quickfix_http_requests_total', 'HTTP requests by route and status', ['route', 'status'])
+STARTUP.mark('logging')
+
 # Chatbot Configuration
 CHATBOT_CONFIG = {
     'name': 'QuickFix Assistant',
@@ -38,18 +75,172 @@ CHATBOT_CONFIG = {
     'features': ['NLP', 'Multi-language', 'Context-aware', 'Booking Integration']
 }
 
-# Conversation Context Storage (in-memory, use Redis/DB in production)
-conversation_contexts = {}
+# Conversation Context Storage, bounded by size and idle time
+# CONTEXT_BACKEND=memory keeps contexts per worker; CONTEXT_BACKEND=sqlite shares
+# them between all gunicorn workers on the host through CONTEXT_DB_PATH (the
+# default with more than one worker, see gunicorn.conf.py). By default sqlite
+# writes through and reads the database every time; a CONTEXT_FLUSH_INTERVAL and
+# CONTEXT_CACHE_TTL above 0 batch writes and cache reads per worker, at the cost
+# of a message served by another worker within that window seeing an older context.
+# Idle contexts are deleted from the database every CONTEXT_EXPIRE_INTERVAL seconds
+CONTEXT_BACKEND = os.environ.get('CONTEXT_BACKEND', 'memory')
+_context_options = {
+    'max_entries': int(os.environ.get('CONTEXT_MAX_ENTRIES', 10000)),
+    'idle_ttl': float(os.environ.get('CONTEXT_IDLE_TTL', 3600))
+}
+if CONTEXT_BACKEND == 'sqlite':
+    _context_options.update(
+        path=os.environ.get('CONTEXT_DB_PATH', '/tmp/quickfix_contexts.db'),
+        cache_ttl=float(os.environ.get('CONTEXT_CACHE_TTL', 0)),
+        flush_interval=float(os.environ.get('CONTEXT_FLUSH_INTERVAL', 0)),
+        expire_interval=float(os.environ.get('CONTEXT_EXPIRE_INTERVAL', 60))
+    )
+conversation_contexts = create_context_store(CONTEXT_BACKEND, **_context_options)
+
+# Message rates per intent and service over the last 1m/5m/1h (per worker)
+TRAFFIC = TrafficStats()
 
 # Backend API Configuration
 BACKEND_URL = os.environ.get('BACKEND_URL', 'https://quickfix-backend-6ztz.onrender.com')
 
+# Pooled keep-alive client shared by every backend call in this worker
+BACKEND = BackendClient(
+    BACKEND_URL,
+    pool_size=int(os.environ.get('BACKEND_POOL_SIZE', 10)),
+    connect_timeout=float(os.environ.get('BACKEND_CONNECT_TIMEOUT', 3.05)),
+    read_timeout=float(os.environ.get('BACKEND_READ_TIMEOUT', 5)),
+    retries=int(os.environ.get('BACKEND_RETRIES', 2)),
+    backoff_factor=float(os.environ.get('BACKEND_BACKOFF', 0.2)),
+    breaker_options={
+        'failure_rate': float(os.environ.get('BREAKER_FAILURE_RATE', 0.5)),
+        'min_calls': int(os.environ.get('BREAKER_MIN_CALLS', 5)),
+        'window': int(os.environ.get('BREAKER_WINDOW', 20)),
+        'open_seconds': float(os.environ.get('BREAKER_OPEN_SECONDS', 30))
+    }
+)
+
+# Non-blocking client for the async chat path (asgi.py), sharing breakers and stats
+ASYNC_BACKEND = AsyncBackendClient(
+    BACKEND,
+    max_connections=int(os.environ.get('BACKEND_ASYNC_MAX_CONNECTIONS', 100))
+) if HTTPX_AVAILABLE else None
+
+# Marker for "not fetched yet - fetch it here" in pipeline helpers
+FETCH = object()
+
+# /chat/batch limits: messages per request, and distinct backend calls made at once
+CHAT_BATCH_MAX_SIZE = int(os.environ.get('CHAT_BATCH_MAX_SIZE', 100))
+CHAT_BATCH_BACKEND_CONCURRENCY = int(os.environ.get('CHAT_BATCH_BACKEND_CONCURRENCY', 8))
+
+# /chat/stream sends a holding message when a backend call takes longer than this
+CHAT_STREAM_HOLD_AFTER = float(os.environ.get('CHAT_STREAM_HOLD_AFTER', 0.05))
+# Threads for /chat/stream backend calls (started on first use, so after any fork)
+STREAM_BACKEND_EXECUTOR = ThreadPoolExecutor(
+    max_workers=int(os.environ.get('CHAT_STREAM_BACKEND_THREADS', 16)),
+    thread_name_prefix='chat-stream'
+)
+
+# Latency budget for one /chat request; backend calls only get the time left of it
+CHAT_LATENCY_BUDGET = float(os.environ.get('CHAT_LATENCY_BUDGET', 4.0))
+
+# Technician availability by (service_type, location): fresh for TECH_CACHE_TTL seconds,
+# then served stale for up to TECH_CACHE_STALE_TTL more while one refresh runs
+TECHNICIAN_CACHE = SingleFlightCache(
+    ttl=float(os.environ.get('TECH_CACHE_TTL', 30)),
+    stale_ttl=float(os.environ.get('TECH_CACHE_STALE_TTL', 300)),
+    max_entries=int(os.environ.get('TECH_CACHE_MAX_ENTRIES', 256))
+)
+
+# Nearest-first technician lists when the chat request carries the user's coordinates:
+# score = distance * (5 / rating) ** TECH_RANKING_RATING_WEIGHT (0 ranks by distance only)
+TECHNICIAN_RANKER = TechnicianRanker(
+    rating_weight=float(os.environ.get('TECH_RANKING_RATING_WEIGHT', 1.0)),
+    cell_degrees=float(os.environ.get('TECH_RANKING_CELL_DEGREES', 0.05))
+)
+
+# Memoized replies for repeated messages, keyed by reply_cache_key(); replies built
+# from live technician data only live REPLY_CACHE_LIVE_TTL seconds
+REPLY_CACHE = LRUCache(
+    max_entries=int(os.environ.get('REPLY_CACHE_MAX_ENTRIES', 2048)),
+    ttl=float(os.environ.get('REPLY_CACHE_TTL', 3600))
+)
+REPLY_CACHE_LIVE_TTL = float(os.environ.get('REPLY_CACHE_LIVE_TTL', 5))
+
+# gzip/brotli for bodies of at least COMPRESS_MIN_BYTES, when the client accepts them
+# (COMPRESS_RESPONSES=false leaves compression to a proxy in front of the app)
+COMPRESSOR = ResponseCompressor(
+    min_bytes=int(os.environ.get('COMPRESS_MIN_BYTES', 512)),
+    gzip_level=int(os.environ.get('COMPRESS_GZIP_LEVEL', 6)),
+    brotli_quality=int(os.environ.get('COMPRESS_BROTLI_QUALITY', 4))
+) if os.environ.get('COMPRESS_RESPONSES', 'true').lower() == 'true' else None
+
+# Shared secret for /admin endpoints (sent as X-Admin-Token); they stay closed while it is unset
+ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN')
+
+# Opt-in /chat profiling: a PROFILE_SAMPLE_RATE share of requests, plus any request
+# sent with "X-Profile: 1" and the admin token (only when ADMIN_TOKEN is set)
+PROFILER = RequestProfiler(
+    directory=os.environ.get('PROFILE_DIR', '/tmp/quickfix_profiles'),
+    sample_rate=float(os.environ.get('PROFILE_SAMPLE_RATE', 0)),
+    max_files=int(os.environ.get('PROFILE_MAX_FILES', 500))
+)
+
+# NLP preprocessing (NLTK resources load on first use, once per worker)
+PREPROCESSOR = TextPreprocessor(
+    enabled=NLTK_AVAILABLE,
+    lemma_cache_size=int(os.environ.get('LEMMA_CACHE_SIZE', 4096)),
+    data_dir=NLTK_DATA_DIR
+)
+STARTUP.mark('clients')
+
 # Service Types
 SERVICE_TYPES = [
     'plumbing', 'electrical', 'carpentry', 'painting', 
     'cleaning', 'appliance_repair', 'hvac', 'locksmith'
 ]
 
+# Service keywords and synonyms, each with the inflected forms that count as it
+# (the service name itself is always a keyword). Forms are listed rather than
+# derived from suffixes, so 'tap' does not match "tapes" or 'lock' "lockers"
+SERVICE_KEYWORDS = {
+    'plumbing': {
+        'plumber': ['plumbers'], 'pipe': ['pipes', 'piping'], 'water': [],
+        'leak': ['leaks', 'leaked', 'leaking', 'leaky', 'leakage'], 'tap': ['taps', 'tapping'],
+        'sink': ['sinks'], 'toilet': ['toilets'], 'drain': ['drains', 'drained', 'draining', 'drainage']
+    },
+    'electrical': {
+        'electrician': ['electricians'], 'electric': [], 'power': [], 'electricity': [], 'wiring': [],
+        'socket': ['sockets'], 'light': ['lights', 'lighting'], 'switch': ['switches']
+    },
+    'carpentry': {
+        'carpenter': ['carpenters'], 'wood': ['wooden'], 'furniture': [], 'door': ['doors'],
+        'window': ['windows'], 'cabinet': ['cabinets']
+    },
+    'painting': {
+        'painter': ['painters'], 'paint': ['paints', 'painted'], 'wall': ['walls'],
+        'color': ['colors'], 'colour': ['colours'], 'ceiling': ['ceilings']
+    },
+    'cleaning': {
+        'clean': ['cleaned', 'cleaner', 'cleaners'], 'maid': ['maids'], 'housekeeping': [],
+        'sanitize': ['sanitized', 'sanitizing']
+    },
+    'appliance_repair': {
+        'appliance': ['appliances'], 'fridge': ['fridges'], 'refrigerator': ['refrigerators'],
+        'washing machine': ['washing machines'], 'washing': [], 'microwave': ['microwaves'],
+        'ac unit': ['ac units']
+    },
+    'hvac': {
+        'ac': [], 'air conditioning': [], 'air conditioner': ['air conditioners'], 'heating': [], 'cooling': []
+    },
+    'locksmith': {
+        'locksmith': ['locksmiths'], 'lock': ['locks', 'locked', 'locking'], 'key': ['keys'],
+        'locked out': [], 'door lock': ['door locks'], 'security': []
+    }
+}
+
+# One automaton over every service keyword form, shared by entity extraction and batches
+SERVICE_MATCHER = ServiceMatcher(SERVICE_KEYWORDS)
+
 # Intent Patterns
 INTENT_PATTERNS = {
     'greeting': [
@@ -107,6 +298,10 @@ INTENT_PATTERNS = {
     ]
 }
 
+# All intent patterns merged into one matcher, compiled once at import
+INTENT_MATCHER = IntentMatcher(INTENT_PATTERNS)
+STARTUP.mark('matchers')
+
 # Response Templates
 RESPONSES = {
     'greeting': {
@@ -579,6 +774,9 @@ SERVICE_KNOWLEDGE = {
     }
 }
 
+# Every service/section reply from SERVICE_KNOWLEDGE, rendered once
+SERVICE_INFO = ServiceInfoRenderer(SERVICE_KNOWLEDGE)
+
 # FAQ Database
 FAQ_DATABASE = {
     'how to book': {
@@ -603,81 +801,87 @@ FAQ_DATABASE = {
     }
 }
 
+def build_knowledge_documents():
+    """Flatten FAQ_DATABASE and SERVICE_KNOWLEDGE into retrieval documents"""
+    documents = []
+    
+    for question, answers in FAQ_DATABASE.items():
+        documents.append({
+            'id': f'faq:{question}',
+            'type': 'faq',
+            'key': question,
+            'text': ' '.join([question] + list(answers.values()))
+        })
+    
+    for service_type, info in SERVICE_KNOWLEDGE.items():
+        service_name = service_type.replace('_', ' ')
+        tech_info = info.get('technician_info', {})
+        sections = {
+            'description': [info['description']],
+            'common_issues': info['common_issues'],
+            'tips': info['tips'],
+            'emergency_signs': info['emergency_signs'],
+            'technician_info': (tech_info.get('qualifications', []) + tech_info.get('skills', []) +
+                                tech_info.get('tools', []) + [tech_info.get('verification', '')]),
+            'pricing': [f"cost price {info['avg_cost']}", f"duration time {info['avg_time']}"]
+        }
+        for section, lines in sections.items():
+            documents.append({
+                'id': f'service:{service_type}:{section}',
+                'type': 'service',
+                'key': service_type,
+                'section': section,
+                'text': ' '.join([service_name, section.replace('_', ' ')] + lines)
+            })
+    
+    return documents
+
+# Knowledge retrieval index, vectorized once per process by warm_up() or the first search
+KNOWLEDGE_INDEX = RetrievalIndex(
+    build_knowledge_documents(),
+    min_score=float(os.environ.get('RETRIEVAL_MIN_SCORE', 0.12)),
+    lazy=True
+)
+# An FAQ only answers when it beats the best service knowledge section by this
+# much, so a complaint that shares words with an FAQ ("bad service" and
+# 'working hours') falls through to its intent
+FAQ_MIN_MARGIN = float(os.environ.get('RETRIEVAL_FAQ_MARGIN', 0.02))
+STARTUP.mark('knowledge')
+
+@timed(STAGE_SECONDS.labels('preprocess'))
 def preprocess_text(text):
     """Preprocess text using NLP techniques"""
-    if not NLTK_AVAILABLE:
-        return text.lower()
-    
-    try:
-        # Tokenize
-        tokens = word_tokenize(text.lower())
-        
-        # Remove stopwords
-        stop_words = set(stopwords.words('english'))
-        tokens = [word for word in tokens if word.isalnum() and word not in stop_words]
-        
-        # Lemmatize
-        lemmatizer = WordNetLemmatizer()
-        tokens = [lemmatizer.lemmatize(word) for word in tokens]
-        
-        return ' '.join(tokens)
-    except:
-        return text.lower()
+    return PREPROCESSOR.process(text)
 
+@timed(STAGE_SECONDS.labels('intent'))
 def detect_intent(message):
     """Detect user intent from message with improved accuracy"""
-    message_lower = message.lower()
-    
-    # Score each intent
-    intent_scores = {}
-    for intent, patterns in INTENT_PATTERNS.items():
-        score = 0
-        for pattern in patterns:
-            if re.search(pattern, message_lower, re.IGNORECASE):
-                score += 1
-        intent_scores[intent] = score
-    
-    # Get intent with highest score
-    if max(intent_scores.values()) > 0:
-        return max(intent_scores, key=intent_scores.get)
-    
-    return 'default'
+    return INTENT_MATCHER.detect(message)
+
+def score_intents(message):
+    """Get the score of every intent (including runner-ups) for a message"""
+    return INTENT_MATCHER.scores(message)
 
+# Script ratios plus a romanized Singlish/Tanglish lexicon, in one regex pass per message
+LANGUAGE_DETECTOR = LanguageDetector()
+
+@timed(STAGE_SECONDS.labels('language'))
 def detect_language(message):
-    """Detect message language (simple heuristic)"""
-    # Check for Sinhala Unicode range
-    if any('\u0D80' <= char <= '\u0DFF' for char in message):
-        return 'si'
-    # Check for Tamil Unicode range
-    if any('\u0B80' <= char <= '\u0BFF' for char in message):
-        return 'ta'
-    return 'en'
+    """Detect message language: ('en' | 'si' | 'ta', confidence)"""
+    return LANGUAGE_DETECTOR.detect(message)
+
+def detect_language_batch(messages):
+    """detect_language for many messages in one scan over the batch"""
+    return LANGUAGE_DETECTOR.detect_batch(messages)
 
+@timed(STAGE_SECONDS.labels('service'))
 def extract_service_type(message):
     """Extract service type from message"""
-    message_lower = message.lower()
-    
-    for service in SERVICE_TYPES:
-        if service in message_lower or service.replace('_', ' ') in message_lower:
-            return service
-    
-    # Check for common variations
-    service_keywords = {
-        'plumbing': ['plumber', 'pipe', 'water', 'leak', 'tap', 'sink', 'toilet'],
-        'electrical': ['electrician', 'power', 'electricity', 'wiring', 'socket', 'light'],
-        'carpentry': ['carpenter', 'wood', 'furniture', 'door', 'window'],
-        'painting': ['painter', 'paint', 'wall', 'color'],
-        'cleaning': ['clean', 'maid', 'housekeeping'],
-        'appliance_repair': ['appliance', 'fridge', 'washing machine', 'ac', 'microwave'],
-        'hvac': ['ac', 'air conditioning', 'heating', 'cooling'],
-        'locksmith': ['lock', 'key', 'locked out', 'door lock']
-    }
-    
-    for service, keywords in service_keywords.items():
-        if any(keyword in message_lower for keyword in keywords):
-            return service
-    
-    return None
+    return SERVICE_MATCHER.best(message)
+
+def extract_service_candidates(message):
+    """Get every service mentioned in a message as ranked (service, score) pairs"""
+    return SERVICE_MATCHER.candidates(message)
 
 def get_response(intent, language='en', context=None):
     """Get appropriate response based on intent and language"""
@@ -687,165 +891,160 @@ def get_response(intent, language='en', context=None):
 
 def get_service_info(service_type, query_lower):
     """Get detailed information about a specific service"""
-    if service_type not in SERVICE_KNOWLEDGE:
+    return SERVICE_INFO.render(service_type, query_lower)
+
+def _is_faq(document):
+    return document['type'] == 'faq'
+
+def _faq_answer(results, language):
+    """Answer text for the best FAQ result in the requested language"""
+    if not results:
         return None
-    
-    service_info = SERVICE_KNOWLEDGE[service_type]
-    response = f"**{service_type.replace('_', ' ').title()} Service**\n\n"
-    response += f"{service_info['description']}\n\n"
-    
-    # Check what user is asking about (but NOT if asking for names/list)
-    if any(word in query_lower for word in ['qualification', 'certified', 'licensed', 'experienced', 'training']) and not any(word in query_lower for word in ['name', 'names', 'list', 'available', 'show me', 'who are']):
-        # Technician information
-        tech_info = service_info.get('technician_info', {})
-        response += " **Our Technicians:**\n\n"
-        
-        response += "**Qualifications:**\n"
-        for qual in tech_info.get('qualifications', []):
-            response += f"✓ {qual}\n"
-        
-        response += "\n**Skills & Expertise:**\n"
-        for skill in tech_info.get('skills', []):
-            response += f"• {skill}\n"
-        
-        response += "\n**Professional Tools:**\n"
-        for tool in tech_info.get('tools', []):
-            response += f"• {tool}\n"
-        
-        response += f"\n **{tech_info.get('verification', 'All technicians are verified and insured')}**"
-    
-    elif any(word in query_lower for word in ['cost', 'price', 'charge', 'fee', 'how much']):
-        response += f" **Average Cost:** {service_info['avg_cost']}\n"
-        response += f" **Typical Duration:** {service_info['avg_time']}\n\n"
-        response += "Note: Final cost depends on the specific issue and materials needed."
-    
-    elif any(word in query_lower for word in ['problem', 'issue', 'fix', 'repair', 'help']):
-        response += "**Common Issues We Fix:**\n"
-        for issue in service_info['common_issues'][:5]:
-            response += f"• {issue}\n"
-        response += f"\n **Typical Duration:** {service_info['avg_time']}"
-    
-    elif any(word in query_lower for word in ['tip', 'advice', 'prevent', 'maintain', 'care']):
-        response += "** Helpful Tips:**\n"
-        for tip in service_info['tips']:
-            response += f"• {tip}\n"
-    
-    elif any(word in query_lower for word in ['emergency', 'urgent', 'immediate', 'asap']):
-        response += "** Emergency Signs:**\n"
-        for sign in service_info['emergency_signs']:
-            response += f"• {sign}\n"
-        response += "\n If you're experiencing any of these, book an emergency service immediately!"
-    
-    else:
-        # General information
-        response += "**Common Issues:**\n"
-        for issue in service_info['common_issues'][:4]:
-            response += f"• {issue}\n"
-        response += f"\n **Cost:** {service_info['avg_cost']}\n"
-        response += f"**Duration:** {service_info['avg_time']}\n\n"
-        response += "Would you like to book this service?"
-    
-    return response
+    answers = FAQ_DATABASE[results[0]['key']]
+    return answers.get(language) or answers.get('en', '')
 
-def search_faq(query):
+@timed(STAGE_SECONDS.labels('faq_search'))
+def search_faq(query, language='en'):
     """Search FAQ database"""
-    query_lower = query.lower()
-    
-    for question, answers in FAQ_DATABASE.items():
-        if any(word in query_lower for word in question.split()):
-            return answers.get('en', '')
-    
-    return None
+    return _faq_answer(KNOWLEDGE_INDEX.search(query, top_k=1, where=_is_faq, margin=FAQ_MIN_MARGIN), language)
+
+@timed(STAGE_SECONDS.labels('faq_search_batch'))
+def search_faq_batch(queries, languages=None):
+    """Search FAQ database for many queries in one pass"""
+    languages = languages or ['en'] * len(queries)
+    results = KNOWLEDGE_INDEX.search_batch(queries, top_k=1, where=_is_faq, margin=FAQ_MIN_MARGIN)
+    return [_faq_answer(result, language) for result, language in zip(results, languages)]
+
+def search_knowledge(query, top_k=3, min_score=None):
+    """Search FAQs and service knowledge; returns scored documents, best first"""
+    return KNOWLEDGE_INDEX.search(query, top_k=top_k, min_score=min_score)
+
+def technician_query(service_type=None, location=None):
+    """Build query parameters for the available technicians endpoint"""
+    params = {}
+    if service_type:
+        params['skill'] = service_type  # Backend uses 'skill' not 'skills'
+    if location:
+        params['location'] = location
+    return params
+
+def parse_technicians_response(response):
+    """Get the technician list out of a backend response (None on error)"""
+    if response.status_code == 200:
+        data = response.json()
+        logger.debug('technicians_fetched', extra={
+            'status': response.status_code,
+            'count': len(data) if isinstance(data, list) else None
+        })
+        # Backend returns array directly, not object with 'technicians' property
+        return data if isinstance(data, list) else []
+    else:
+        logger.warning('technicians_backend_error', extra={'status': response.status_code})
+        return None
 
 def fetch_available_technicians(service_type=None, location=None):
     """Fetch available technicians from backend"""
     try:
-        # Build query parameters
-        params = {}
-        if service_type:
-            params['skill'] = service_type  # Backend uses 'skill' not 'skills'
-        if location:
-            params['location'] = location
-        
         # Call backend API
-        response = requests.get(
-            f'{BACKEND_URL}/api/technicians/available',
-            params=params,
-            timeout=5
+        response = BACKEND.get(
+            '/api/technicians/available',
+            params=technician_query(service_type, location),
+            endpoint='technicians_available'
         )
-        
-        print(f"Backend response status: {response.status_code}")
-        
-        if response.status_code == 200:
-            data = response.json()
-            print(f"Backend returned: {len(data) if isinstance(data, list) else 'not a list'} technicians")
-            # Backend returns array directly, not object with 'technicians' property
-            return data if isinstance(data, list) else []
-        else:
-            print(f"Backend error: {response.status_code}")
-            return None
+        return parse_technicians_response(response)
     except Exception as e:
-        print(f"Error fetching technicians: {e}")
+        logger.warning('technicians_fetch_failed', extra={'error': str(e)})
         return None
 
-def format_technician_list(technicians, service_type):
-    """Format technician information for display"""
-    if not technicians or len(technicians) == 0:
+async def fetch_available_technicians_async(service_type=None, location=None):
+    """Fetch available technicians from backend without blocking the event loop"""
+    try:
+        response = await ASYNC_BACKEND.get(
+            '/api/technicians/available',
+            params=technician_query(service_type, location),
+            endpoint='technicians_available'
+        )
+        return parse_technicians_response(response)
+    except Exception as e:
+        logger.warning('technicians_fetch_failed', extra={'error': str(e)})
+        return None
+
+def get_available_technicians(service_type=None, location=None):
+    """Available technicians, served from TECHNICIAN_CACHE when possible"""
+    return TECHNICIAN_CACHE.get(
+        (service_type, location),
+        lambda: fetch_available_technicians(service_type, location),
+        timeout=remaining_budget()
+    )
+
+async def get_available_technicians_async(service_type=None, location=None):
+    """Available technicians for the async path, sharing TECHNICIAN_CACHE"""
+    return await TECHNICIAN_CACHE.get_async(
+        (service_type, location),
+        lambda: fetch_available_technicians_async(service_type, location),
+        timeout=remaining_budget()
+    )
+
+def format_technician_list(technicians, service_type, coordinates=None):
+    """Format technician information for display
+    
+    With the user's (lat, lng) the list is ranked by distance and rating;
+    otherwise it keeps the backend's order.
+    """
+    if not technicians:
         return f"I don't have specific technician details available right now, but we have qualified {service_type} professionals ready to help you!\n\nWould you like to book a service? Our system will match you with the best available technician in your area."
     
-    response = f"**Available {service_type.title()} Technicians:**\n\n"
+    if coordinates:
+        technicians = TECHNICIAN_RANKER.rank(technicians, *coordinates, k=5)
+    
+    lines = [f"**Available {service_type.title()} Technicians:**", ""]
     
     for i, tech in enumerate(technicians[:5], 1):  # Show max 5 technicians
         # Get user info (backend structure: tech.user.name)
         user = tech.get('user', {})
-        name = user.get('name', 'Technician') if isinstance(user, dict) else 'Technician'
-        phone = user.get('phone', '') if isinstance(user, dict) else ''
-        
-        # Get location (backend structure: tech.location.coordinates)
-        location = tech.get('location', {})
-        # Location is stored as GeoJSON: {type: 'Point', coordinates: [lng, lat]}
-        coords = location.get('coordinates', []) if isinstance(location, dict) else []
+        if isinstance(user, dict):
+            name = user.get('name', 'Technician')
+            phone = user.get('phone', '')
+        else:
+            name, phone = 'Technician', ''
         
-        # Get rating and skills
-        rating = tech.get('rating', 0)
-        skills = tech.get('skills', [])
         distance = tech.get('distance', None)
+        skills = tech.get('skills', [])
         
-        response += f"**{i}. {name}**\n"
-        
-        # Show phone if available
+        lines.append(f"**{i}. {name}**")
         if phone:
-            response += f"   Phone: {phone}\n"
-        
+            lines.append(f"   Phone: {phone}")
         # Show distance if calculated
         if distance and distance < 999:
-            response += f"    Distance: {distance:.1f} km away\n"
-        
-        # Show rating
-        response += f"    Rating: {rating:.1f}/5.0\n"
-        
-        # Show skills
-        if skills and len(skills) > 0:
-            skills_str = ', '.join(skills[:3])  # Show first 3 skills
-            response += f"   Skills: {skills_str}\n"
-        
-        response += "\n"
+            lines.append(f"    Distance: {distance:.1f} km away")
+        lines.append(f"    Rating: {tech.get('rating', 0):.1f}/5.0")
+        if skills:
+            lines.append(f"   Skills: {', '.join(skills[:3])}")  # Show first 3 skills
+        lines.append("")
     
-    response += "Would you like to book one of these technicians? Just say 'book' and I'll help you!"
-    return response
+    lines.append("Would you like to book one of these technicians? Just say 'book' and I'll help you!")
+    return "\n".join(lines)
 
+def new_conversation_context():
+    """Create an empty conversation context"""
+    return {
+        'last_intent': None,
+        'last_service': None,
+        'booking_in_progress': False,
+        'messages': [],
+        'created_at': datetime.now().isoformat()
+    }
+
+@timed(STAGE_SECONDS.labels('context_load'))
 def get_conversation_context(user_id):
     """Get conversation context for a user"""
-    if user_id not in conversation_contexts:
-        conversation_contexts[user_id] = {
-            'last_intent': None,
-            'last_service': None,
-            'booking_in_progress': False,
-            'messages': [],
-            'created_at': datetime.now().isoformat()
-        }
-    return conversation_contexts[user_id]
+    return conversation_contexts.get_or_create(user_id, new_conversation_context)
 
+def peek_conversation_context(user_id):
+    """Get conversation context for a user without creating one (None if unknown)"""
+    return conversation_contexts.get(user_id)
+
+@timed(STAGE_SECONDS.labels('context_save'))
 def update_conversation_context(user_id, intent=None, service_type=None, message=None):
     """Update conversation context"""
     context = get_conversation_context(user_id)
@@ -861,8 +1060,9 @@ def update_conversation_context(user_id, intent=None, service_type=None, message
         })
         # Keep only last 10 messages
         context['messages'] = context['messages'][-10:]
+        TRAFFIC.record(intent, service_type)
     
-    conversation_contexts[user_id] = context
+    conversation_contexts.set(user_id, context)
     return context
 
 def initiate_booking(service_type, user_id):
@@ -870,6 +1070,7 @@ def initiate_booking(service_type, user_id):
     context = get_conversation_context(user_id)
     context['booking_in_progress'] = True
     context['booking_service'] = service_type
+    conversation_contexts.set(user_id, context)
     
     response = f"**Starting {service_type.replace('_', ' ').title()} Booking**\n\n"
     response += "To complete your booking, I need:\n"
@@ -881,34 +1082,46 @@ def initiate_booking(service_type, user_id):
     
     return response
 
+def describe_payment_status(response):
+    """Summarize the payment state from a booking response"""
+    if response.status_code == 200:
+        booking = response.json()
+        payment = booking.get('payment', {})
+        status = payment.get('status', 'pending')
+        method = payment.get('method', 'N/A')
+        
+        if status == 'completed':
+            return f"Payment completed via {method.upper()}"
+        elif status == 'pending':
+            return f"Payment pending - Method: {method.upper()}"
+        else:
+            return f"Payment status: {status}"
+    return "Unable to fetch payment status"
+
 def check_payment_status(booking_id):
     """Check payment status for a booking"""
     try:
-        response = requests.get(
-            f'{BACKEND_URL}/api/bookings/{booking_id}',
-            timeout=5
+        response = BACKEND.get(
+            f'/api/bookings/{booking_id}',
+            endpoint='booking_detail'
         )
-        if response.status_code == 200:
-            booking = response.json()
-            payment = booking.get('payment', {})
-            status = payment.get('status', 'pending')
-            method = payment.get('method', 'N/A')
-            
-            if status == 'completed':
-                return f"Payment completed via {method.upper()}"
-            elif status == 'pending':
-                return f"Payment pending - Method: {method.upper()}"
-            else:
-                return f"Payment status: {status}"
-        return "Unable to fetch payment status"
+        return describe_payment_status(response)
     except:
         return "Unable to connect to server"
 
-def generate_smart_response(message, service_type, intent, user_id='anonymous'):
-    """Generate intelligent contextual responses"""
-    message_lower = message.lower()
-    
-    # Check if asking for technician names/list/details (HIGH PRIORITY)
+async def check_payment_status_async(booking_id):
+    """Check payment status for a booking without blocking the event loop"""
+    try:
+        response = await ASYNC_BACKEND.get(
+            f'/api/bookings/{booking_id}',
+            endpoint='booking_detail'
+        )
+        return describe_payment_status(response)
+    except Exception:
+        return "Unable to connect to server"
+
+def asking_for_technicians(message_lower):
+    """Check if the user is asking for technician names, lists or locations"""
     asking_for_list = any(phrase in message_lower for phrase in [
         'who are the', 'show me', 'list of', 'available', 
         'names of', 'name of', 'technician names', 'plumber names',
@@ -918,11 +1131,25 @@ def generate_smart_response(message, service_type, intent, user_id='anonymous'):
     
     asking_for_location = any(word in message_lower for word in ['village', 'location', 'area', 'city', 'where are'])
     
-    if (asking_for_list or asking_for_location) and service_type:
+    return asking_for_list or asking_for_location
+
+@timed(STAGE_SECONDS.labels('smart_response'))
+def generate_smart_response(message, service_type, intent, user_id='anonymous', technicians=FETCH, coordinates=None):
+    """Generate intelligent contextual responses
+    
+    Pass ``technicians`` when the list was already fetched (None if the
+    backend was unavailable); by default it is fetched here when needed.
+    ``coordinates`` is the user's (lat, lng), if the request carried it.
+    """
+    message_lower = message.lower()
+    
+    # Check if asking for technician names/list/details (HIGH PRIORITY)
+    if service_type and asking_for_technicians(message_lower):
         # User is asking for specific technician names/locations
-        technicians = fetch_available_technicians(service_type)
+        if technicians is FETCH:
+            technicians = get_available_technicians(service_type)
         if technicians is not None:
-            return format_technician_list(technicians, service_type)
+            return format_technician_list(technicians, service_type, coordinates)
     
     # Check if asking about a specific service
     if service_type:
@@ -952,51 +1179,444 @@ def generate_smart_response(message, service_type, intent, user_id='anonymous'):
             elif q_type == 'where':
                 return "**Service Areas:**\n\nWe currently serve:\n• Colombo and all suburbs\n• Gampaha District\n• Kandy City\n• Galle and surrounding areas\n\nExpanding to more cities soon!\n\nNot sure if we cover your area? Share your location and I'll check for you!"
     
-    # Check for specific keywords
-    if any(word in message_lower for word in ['leak', 'water', 'pipe', 'tap', 'drain']):
-        return get_service_info('plumbing', message_lower)
+    return None
+
+CHAT_ERROR_MESSAGE = 'Sorry, I encountered an error. Please try again.'
+
+# Streamed while a slow backend lookup is still running
+HOLDING_MESSAGES = {
+    'en': "One moment, I'm checking that for you...",
+    'si': "මොහොතක් රැඳී සිටින්න, මම එය පරීක්ෂා කරමින් සිටිමි...",
+    'ta': "ஒரு நிமிடம், நான் அதைச் சரிபார்க்கிறேன்..."
+}
+
+def chat_request_error(data):
+    """Why a chat payload cannot be answered, or None if it can"""
+    if not isinstance(data, dict) or 'message' not in data:
+        return 'Message is required'
+    if not isinstance(data['message'], str):
+        return 'Message must be a string'
+    return None
+
+def parse_chat_request(data):
+    """Get (message, user_id, session_id, coordinates) from a chat payload, or None if it is invalid
+    
+    ``coordinates`` is the user's (lat, lng) when the payload has a valid
+    latitude/longitude or location, else None. ``chat_request_error`` says
+    why a payload is invalid.
+    """
+    if chat_request_error(data):
+        return None
     
-    elif any(word in message_lower for word in ['power', 'electric', 'light', 'switch', 'wiring']):
-        return get_service_info('electrical', message_lower)
+    user_message = data['message']
+    # Support both userId and user_id for compatibility
+    user_id = data.get('userId') or data.get('user_id', 'anonymous')
+    session_id = data.get('sessionId') or data.get('session_id', 'default')
+    return user_message, user_id, session_id, parse_coordinates(data)
+
+def log_chat_request(user_message, user_id, session_id, coordinates=None):
+    """Debug logging for an incoming chat message"""
+    logger.debug('chat_request', extra={
+        'userId': user_id,
+        'sessionId': session_id,
+        'userMessage': user_message,
+        'hasLocation': coordinates is not None
+    })
+
+BOOKING_ID_PATTERN = re.compile(r'\b[a-f0-9]{24}\b')
+
+def analyze_message(user_message):
+    """Run the CPU-only NLU stages: language, intent and entities"""
+    # Note: preprocess_text() is only worth calling once a stage consumes
+    # its output - none of the stages below do yet
     
-    elif any(word in message_lower for word in ['door', 'window', 'furniture', 'wood', 'cabinet']):
-        return get_service_info('carpentry', message_lower)
+    # Check for booking ID in message (for payment/status queries)
+    booking_id_match = BOOKING_ID_PATTERN.search(user_message)
+    language, language_confidence = detect_language(user_message)
     
-    elif any(word in message_lower for word in ['paint', 'wall', 'color', 'ceiling']):
-        return get_service_info('painting', message_lower)
+    return {
+        'language': language,
+        'language_confidence': language_confidence,
+        'intent': detect_intent(user_message),
+        'service_type': extract_service_type(user_message),
+        'booking_id': booking_id_match.group(0) if booking_id_match else None
+    }
+
+@timed(STAGE_SECONDS.labels('nlu_batch'))
+def analyze_messages(user_messages):
+    """analyze_message for a whole batch: every stage is one scan over all the messages"""
+    booking_id_matches = first_matches(BOOKING_ID_PATTERN, user_messages)
+    return [{
+        'language': language,
+        'language_confidence': language_confidence,
+        'intent': intent,
+        'service_type': service_type,
+        'booking_id': booking_id_match.group(0) if booking_id_match else None
+    } for (language, language_confidence), intent, service_type, booking_id_match in zip(
+        detect_language_batch(user_messages),
+        INTENT_MATCHER.detect_batch(user_messages),
+        SERVICE_MATCHER.best_batch(user_messages),
+        booking_id_matches
+    )]
+
+def plan_backend_call(user_message, nlu):
+    """Work out which backend lookup the reply needs: (kind, argument) or None"""
+    intent = nlu['intent']
+    service_type = nlu['service_type']
     
-    elif any(word in message_lower for word in ['clean', 'maid', 'housekeeping', 'sanitize']):
-        return get_service_info('cleaning', message_lower)
+    if intent == 'payment' and nlu['booking_id']:
+        return ('payment_status', nlu['booking_id'])
+    if intent == 'booking' and service_type:
+        return None
+    if service_type and asking_for_technicians(user_message.lower()):
+        return ('technicians', service_type)
+    return None
+
+@timed(STAGE_SECONDS.labels('backend'))
+def run_backend_call(call):
+    """Make a planned backend call (blocking)"""
+    kind, argument = call
+    if kind == 'payment_status':
+        return check_payment_status(argument)
+    return get_available_technicians(argument)
+
+@timed(STAGE_SECONDS.labels('backend_batch'))
+def run_backend_calls(calls):
+    """Make each distinct planned call once, several at a time; returns {call: result}"""
+    unique_calls = list(dict.fromkeys(call for call in calls if call))
+    if len(unique_calls) <= 1:
+        return {call: run_backend_call(call) for call in unique_calls}
     
-    elif any(word in message_lower for word in ['fridge', 'washing', 'microwave', 'appliance', 'ac unit']):
-        return get_service_info('appliance_repair', message_lower)
+    with ThreadPoolExecutor(max_workers=min(len(unique_calls), CHAT_BATCH_BACKEND_CONCURRENCY)) as executor:
+        # Each call runs in a copy of this context so it keeps the request's deadline
+        futures = {
+            call: executor.submit(contextvars.copy_context().run, run_backend_call, call)
+            for call in unique_calls
+        }
+        return {call: future.result() for call, future in futures.items()}
+
+@timed(STAGE_SECONDS.labels('backend'))
+async def run_backend_call_async(call):
+    """Make a planned backend call without blocking the event loop"""
+    kind, argument = call
+    if kind == 'payment_status':
+        return await check_payment_status_async(argument)
+    return await get_available_technicians_async(argument)
+
+def reply_cache_key(user_message, nlu, context, coordinates=None):
+    """Everything a composed reply depends on, for REPLY_CACHE
     
-    elif any(word in message_lower for word in ['ac', 'air conditioning', 'hvac', 'cooling', 'heating']):
-        return get_service_info('hvac', message_lower)
+    Replies only look at the lowercased message, so case and surrounding
+    whitespace are folded; the NLU results are part of the key because
+    booking IDs are matched case-sensitively. The conversation only matters
+    through the "you were asking about" suggestion on default intents, and
+    the user's coordinates only through a ranked technician list.
+    """
+    intent = nlu['intent']
+    last_service = context['last_service'] if intent == 'default' else None
+    if not (nlu['service_type'] and asking_for_technicians(user_message.lower())):
+        coordinates = None
+    return (user_message.strip().lower(), nlu['language'], intent, nlu['service_type'], last_service, coordinates)
+
+def compose_reply(user_message, nlu, context, user_id='anonymous', backend_result=FETCH, faq_response=FETCH,
+                  coordinates=None):
+    """Smart, FAQ or intent-based reply for a message that is not a payment or booking request"""
+    language = nlu['language']
+    intent = nlu['intent']
     
-    elif any(word in message_lower for word in ['lock', 'key', 'locked out', 'security']):
-        return get_service_info('locksmith', message_lower)
+    smart_response = generate_smart_response(user_message, nlu['service_type'], intent, user_id,
+                                             technicians=backend_result, coordinates=coordinates)
     
-    return None
+    # Check FAQ
+    if faq_response is FETCH:
+        faq_response = search_faq(user_message, language)
+    
+    # Generate response (priority: smart > faq > intent-based)
+    if smart_response:
+        return smart_response
+    if faq_response:
+        return faq_response
+    
+    bot_response = get_response(intent, language)
+    
+    # Add context-aware suggestions
+    if context['last_service'] and intent == 'default':
+        bot_response += f"\n\nI noticed you were asking about {context['last_service']}. Would you like to book this service?"
+    return bot_response
 
-@app.route('/', methods=['GET'])
-def home():
-    """Root endpoint"""
-    return jsonify({
+def reply_metadata(nlu):
+    """Extracted entities and the suggested next step - known before the reply is written"""
+    metadata = {}
+    if nlu['service_type']:
+        metadata['serviceType'] = nlu['service_type']
+        metadata['suggestedAction'] = 'book_service'
+    
+    if nlu['intent'] == 'emergency':
+        metadata['priority'] = 'high'
+        metadata['suggestedAction'] = 'emergency_booking'
+    
+    if nlu['intent'] == 'booking':
+        metadata['suggestedAction'] = 'open_booking_screen'
+    return metadata
+
+def build_chat_response(user_message, user_id, session_id, nlu, backend_result=FETCH, faq_response=FETCH,
+                        coordinates=None):
+    """Compose the reply, update the conversation context and build the response payload
+    
+    ``backend_result`` is the outcome of the planned backend call, and
+    ``faq_response`` the FAQ answer for the message; by default each is
+    looked up here if the reply needs it. ``coordinates`` is the user's
+    (lat, lng) for ranking technicians, if known.
+    """
+    language = nlu['language']
+    intent = nlu['intent']
+    service_type = nlu['service_type']
+    booking_id = nlu['booking_id']
+    
+    # Get conversation context
+    context = get_conversation_context(user_id)
+    
+    # Handle payment queries
+    if intent == 'payment' and booking_id:
+        payment_status = check_payment_status(booking_id) if backend_result is FETCH else backend_result
+        bot_response = f"**Payment Status for Booking {booking_id[:8]}...**\n\n{payment_status}\n\nNeed help with anything else?"
+    # Handle booking intent with service type
+    elif intent == 'booking' and service_type:
+        bot_response = initiate_booking(service_type, user_id)
+    # Try intelligent response
+    else:
+        cache_key = reply_cache_key(user_message, nlu, context, coordinates)
+        bot_response = REPLY_CACHE.get(cache_key)
+        if bot_response is None:
+            bot_response = compose_reply(user_message, nlu, context, user_id, backend_result, faq_response,
+                                         coordinates)
+            live = service_type and asking_for_technicians(user_message.lower())
+            REPLY_CACHE.set(cache_key, bot_response, ttl=REPLY_CACHE_LIVE_TTL if live else None)
+    
+    # Update conversation context
+    context = update_conversation_context(user_id, intent, service_type, user_message)
+    
+    # Build response
+    response_data = {
+        'message': bot_response,
+        'reply': bot_response,  # For compatibility
+        'intent': intent,
+        'language': language,
+        'languageConfidence': nlu['language_confidence'],
+        'timestamp': datetime.now().isoformat(),
+        'sessionId': session_id,
+        'context': intent
+    }
+    
+    # Add extracted entities
+    response_data.update(reply_metadata(nlu))
+    
+    # Add conversation stats
+    response_data['conversationStats'] = {
+        'messageCount': len(context['messages']),
+        'lastIntent': context['last_intent'],
+        'lastService': context['last_service']
+    }
+    
+    CHAT_MESSAGES.labels(intent).inc()
+    
+    # Log conversation (in production, save to database)
+    logger.info('chat_reply', extra={
+        'userId': user_id,
+        'sessionId': session_id,
+        'userMessage': user_message,
+        'intent': intent,
+        'serviceType': service_type,
+        'language': language,
+        'reply': bot_response[:100]
+    })
+    
+    return response_data
+
+def handle_chat_message(user_message, user_id, session_id, coordinates=None):
+    """Run the whole chat pipeline for one message (blocking on backend calls)"""
+    log_chat_request(user_message, user_id, session_id, coordinates)
+    nlu = analyze_message(user_message)
+    call = plan_backend_call(user_message, nlu)
+    backend_result = run_backend_call(call) if call else FETCH
+    return build_chat_response(user_message, user_id, session_id, nlu, backend_result, coordinates=coordinates)
+
+async def handle_chat_message_async(user_message, user_id, session_id, coordinates=None):
+    """Async chat pipeline: NLU and reply building stay synchronous (CPU only),
+    only the backend call is awaited"""
+    log_chat_request(user_message, user_id, session_id, coordinates)
+    nlu = analyze_message(user_message)
+    call = plan_backend_call(user_message, nlu)
+    backend_result = await run_backend_call_async(call) if call else FETCH
+    return build_chat_response(user_message, user_id, session_id, nlu, backend_result, coordinates=coordinates)
+
+def handle_chat_batch(items):
+    """Run the chat pipeline for a batch of chat payloads
+    
+    NLU, FAQ search and backend lookups run once over the whole batch; the
+    replies are then built in order, so each user's context is updated in
+    the order their messages were sent. An invalid payload gets an inline
+    {'error': ...} in its place.
+    """
+    parsed = [parse_chat_request(item) for item in items]
+    valid = [item for item in parsed if item is not None]
+    messages = [user_message for user_message, _, _, _ in valid]
+    for item in valid:
+        log_chat_request(*item)
+    
+    nlus = analyze_messages(messages)
+    calls = [plan_backend_call(user_message, nlu) for user_message, nlu in zip(messages, nlus)]
+    backend_results = run_backend_calls(calls)
+    faq_responses = search_faq_batch(messages, [nlu['language'] for nlu in nlus])
+    
+    replies = iter([
+        build_chat_response(user_message, user_id, session_id, nlu,
+                            backend_results[call] if call else FETCH, faq_response, coordinates)
+        for (user_message, user_id, session_id, coordinates), nlu, call, faq_response
+        in zip(valid, nlus, calls, faq_responses)
+    ])
+    return [next(replies) if parsed_item is not None else {'error': chat_request_error(item)}
+            for item, parsed_item in zip(items, parsed)]
+
+def sse_event(event, payload):
+    """One Server-Sent Event carrying ``payload`` as JSON"""
+    return f"event: {event}\ndata: {app.json.dumps(payload)}\n\n"
+
+def stream_chat_message(user_message, user_id, session_id, coordinates=None, omit_reply=False):
+    """Run the chat pipeline for one message, yielding SSE events
+    
+    Only the framing goes out early: 'meta' (intent, language, suggested
+    action) before any backend wait, and 'holding' if the backend call is
+    still running after CHAT_STREAM_HOLD_AFTER seconds. Replies are composed
+    whole, not token by token, so once built the reply follows in a single
+    write as 'delta' events, one per paragraph, and 'done' with the same
+    payload /chat returns (without 'reply' if ``omit_reply``).
+    """
+    log_chat_request(user_message, user_id, session_id, coordinates)
+    nlu = analyze_message(user_message)
+    call = plan_backend_call(user_message, nlu)
+    # Start the lookup first so it runs while the metadata is sent
+    future = STREAM_BACKEND_EXECUTOR.submit(contextvars.copy_context().run, run_backend_call, call) if call else None
+    
+    yield sse_event('meta', {
+        'intent': nlu['intent'],
+        'language': nlu['language'],
+        'languageConfidence': nlu['language_confidence'],
+        'sessionId': session_id,
+        **reply_metadata(nlu)
+    })
+    
+    backend_result = FETCH
+    if future is not None:
+        done, _ = wait([future], timeout=CHAT_STREAM_HOLD_AFTER)
+        if not done:
+            yield sse_event('holding', {'text': HOLDING_MESSAGES.get(nlu['language'], HOLDING_MESSAGES['en'])})
+        backend_result = future.result()
+    
+    response_data = build_chat_response(user_message, user_id, session_id, nlu, backend_result,
+                                        coordinates=coordinates)
+    if omit_reply:
+        del response_data['reply']
+    # Nothing is gained by flushing paragraphs of a finished reply one by one
+    paragraphs = response_data['message'].split('\n\n')
+    events = [sse_event('delta', {'text': paragraph + '\n\n'}) for paragraph in paragraphs[:-1]]
+    events.append(sse_event('delta', {'text': paragraphs[-1]}))
+    events.append(sse_event('done', response_data))
+    yield ''.join(events)
+
+@app.before_request
+def start_request_timer():
+    g.request_started = perf_counter()
+
+@app.after_request
+def record_request_metrics(response):
+    """Request latency and status per route"""
+    started = g.pop('request_started', None)
+    if started is not None:
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        HTTP_SECONDS.labels(route).observe(perf_counter() - started)
+        HTTP_REQUESTS.labels(route, str(response.status_code)).inc()
+    return response
+
+@app.after_request
+def compress_response(response):
+    """gzip/brotli for clients that accept it (see ResponseCompressor)"""
+    if COMPRESSOR is not None:
+        COMPRESSOR.process(request, response)
+    return response
+
+@app.before_request
+def bind_log_route():
+    """Tag this request's log records with its route, for per-route sampling"""
+    g.log_route_token = bind_route(request.url_rule.rule if request.url_rule else request.path)
+
+@app.teardown_request
+def unbind_log_route(exc=None):
+    token = g.pop('log_route_token', None)
+    if token is not None:
+        unbind_route(token)
+
+@app.before_request
+def start_request_budget():
+    """Start the latency budget that backend calls made while chatting draw from"""
+    # chat_stream makes its backend call while streaming, so it opens its own budget there
+    if request.endpoint and request.endpoint.startswith('chat') and request.endpoint != 'chat_stream':
+        g.deadline_token = start_deadline(CHAT_LATENCY_BUDGET)
+
+@app.teardown_request
+def end_request_budget(exc=None):
+    """Close the latency budget opened for this request"""
+    token = g.pop('deadline_token', None)
+    if token is not None:
+        end_deadline(token)
+
+# Constant GET payloads (/, /intents, /faq), encoded once and revalidated by ETag;
+# clients may reuse them for STATIC_CACHE_MAX_AGE seconds without asking
+STATIC_CACHE_MAX_AGE = int(os.environ.get('STATIC_CACHE_MAX_AGE', 300))
+STATIC_RESPONSES = {
+    name: StaticJSONResponse(app.json, max_age=STATIC_CACHE_MAX_AGE, compressor=COMPRESSOR)
+    for name in ('home', 'intents', 'faq')
+}
+
+def refresh_static_responses():
+    """Encode the constant GET payloads again
+    
+    Runs at import; call it again after changing CHATBOT_CONFIG,
+    INTENT_PATTERNS or FAQ_DATABASE. The root endpoint's timestamp is the
+    time of the last refresh.
+    """
+    STATIC_RESPONSES['home'].refresh({
         'service': 'QuickFix AI Chatbot',
         'version': CHATBOT_CONFIG['version'],
         'status': 'running',
         'endpoints': {
             'health': '/health',
             'chat': '/chat (POST)',
+            'chatBatch': '/chat/batch (POST)',
+            'chatStream': '/chat/stream (POST, Server-Sent Events)',
             'intents': '/intents',
             'faq': '/faq',
-            'analytics': '/analytics'
+            'analytics': '/analytics',
+            'metrics': '/metrics'
         },
         'features': CHATBOT_CONFIG['features'],
         'languages': CHATBOT_CONFIG['languages'],
         'timestamp': datetime.now().isoformat()
     })
+    STATIC_RESPONSES['intents'].refresh({
+        'intents': list(INTENT_PATTERNS.keys()),
+        'languages': CHATBOT_CONFIG['languages']
+    })
+    STATIC_RESPONSES['faq'].refresh({
+        'faqs': FAQ_DATABASE
+    })
+
+refresh_static_responses()
+
+@app.route('/', methods=['GET'])
+def home():
+    """Root endpoint"""
+    return STATIC_RESPONSES['home'].respond(request)
 
 @app.route('/health', methods=['GET'])
 def health_check():
@@ -1013,172 +1633,229 @@ def chat():
     """Main chat endpoint with enhanced NLP and context management"""
     try:
         data = request.get_json()
+        parsed = parse_chat_request(data)
         
-        if not data or 'message' not in data:
+        if parsed is None:
             return jsonify({
-                'error': 'Message is required'
+                'error': chat_request_error(data)
             }), 400
         
-        user_message = data['message']
-        # Support both userId and user_id for compatibility
-        user_id = data.get('userId') or data.get('user_id', 'anonymous')
-        session_id = data.get('sessionId') or data.get('session_id', 'default')
-        
-        # Debug logging
-        print(f"\n=== NEW CHAT REQUEST ===")
-        print(f"User ID: {user_id}")
-        print(f"Session ID: {session_id}")
-        print(f"Message: {user_message}")
-        
-        # Get conversation context
-        context = get_conversation_context(user_id)
-        
-        # Preprocess message with NLP
-        processed_message = preprocess_text(user_message)
-        
-        # Detect language and intent
-        language = detect_language(user_message)
-        intent = detect_intent(user_message)
-        
-        # Extract entities
-        service_type = extract_service_type(user_message)
-        
-        # Check for booking ID in message (for payment/status queries)
-        booking_id_match = re.search(r'\b[a-f0-9]{24}\b', user_message)
-        booking_id = booking_id_match.group(0) if booking_id_match else None
-        
-        # Handle payment queries
-        if intent == 'payment' and booking_id:
-            payment_status = check_payment_status(booking_id)
-            bot_response = f"**Payment Status for Booking {booking_id[:8]}...**\n\n{payment_status}\n\nNeed help with anything else?"
-        # Handle booking intent with service type
-        elif intent == 'booking' and service_type:
-            bot_response = initiate_booking(service_type, user_id)
-        # Try intelligent response
-        else:
-            smart_response = generate_smart_response(user_message, service_type, intent, user_id)
-            
-            # Check FAQ
-            faq_response = search_faq(user_message)
-            
-            # Generate response (priority: smart > faq > intent-based)
-            if smart_response:
-                bot_response = smart_response
-            elif faq_response:
-                bot_response = faq_response
-            else:
-                bot_response = get_response(intent, language)
-                
-                # Add context-aware suggestions
-                if context['last_service'] and intent == 'default':
-                    bot_response += f"\n\nI noticed you were asking about {context['last_service']}. Would you like to book this service?"
-        
-        # Update conversation context
-        update_conversation_context(user_id, intent, service_type, user_message)
-        
-        # Build response
-        response_data = {
-            'message': bot_response,
-            'reply': bot_response,  # For compatibility
-            'intent': intent,
-            'language': language,
-            'timestamp': datetime.now().isoformat(),
-            'sessionId': session_id,
-            'context': intent
-        }
-        
-        # Add extracted entities
-        if service_type:
-            response_data['serviceType'] = service_type
-            response_data['suggestedAction'] = 'book_service'
-        
-        if intent == 'emergency':
-            response_data['priority'] = 'high'
-            response_data['suggestedAction'] = 'emergency_booking'
+        response_data = PROFILER.call(handle_chat_message, parsed, forced=profile_requested(),
+                                      tags=lambda reply: (reply['intent'], reply.get('serviceType')))
+        if omit_reply_requested():
+            del response_data['reply']
+        return jsonify(response_data)
         
-        if intent == 'booking':
-            response_data['suggestedAction'] = 'open_booking_screen'
+    except Exception:
+        logger.exception('chat_error')
+        return jsonify({
+            'error': 'Internal server error',
+            'message': CHAT_ERROR_MESSAGE,
+            'reply': CHAT_ERROR_MESSAGE
+        }), 500
+
+@app.route('/chat/batch', methods=['POST'])
+def chat_batch():
+    """Answer many chat messages in one round trip
+    
+    Takes a JSON array of {message, userId, sessionId, location} objects (or
+    {"messages": [...]}) and returns the /chat response for each, in order.
+    """
+    try:
+        data = request.get_json()
+        items = data.get('messages') if isinstance(data, dict) else data
         
-        # Add conversation stats
-        response_data['conversationStats'] = {
-            'messageCount': len(context['messages']),
-            'lastIntent': context['last_intent'],
-            'lastService': context['last_service']
-        }
+        if not isinstance(items, list) or not items:
+            return jsonify({
+                'error': 'A non-empty list of messages is required'
+            }), 400
         
-        # Log conversation (in production, save to database)
-        print(f"[{datetime.now()}] User {user_id}: {user_message}")
-        print(f"[{datetime.now()}] Intent: {intent}, Service: {service_type}")
-        print(f"[{datetime.now()}] Bot: {bot_response[:100]}...")
+        if len(items) > CHAT_BATCH_MAX_SIZE:
+            return jsonify({
+                'error': f'Batch too large (max {CHAT_BATCH_MAX_SIZE} messages)'
+            }), 400
         
-        return jsonify(response_data)
+        responses = handle_chat_batch(items)
+        if omit_reply_requested():
+            for response_data in responses:
+                response_data.pop('reply', None)
+        return jsonify({
+            'responses': responses,
+            'count': len(responses)
+        })
         
-    except Exception as e:
-        print(f"Error in chat endpoint: {str(e)}")
-        import traceback
-        traceback.print_exc()
+    except Exception:
+        logger.exception('chat_batch_error')
         return jsonify({
             'error': 'Internal server error',
-            'message': 'Sorry, I encountered an error. Please try again.',
-            'reply': 'Sorry, I encountered an error. Please try again.'
+            'message': CHAT_ERROR_MESSAGE,
+            'reply': CHAT_ERROR_MESSAGE
         }), 500
 
+@app.route('/chat/stream', methods=['POST'])
+def chat_stream():
+    """Streaming /chat: the reply as Server-Sent Events (see stream_chat_message)"""
+    error = {
+        'error': 'Internal server error',
+        'message': CHAT_ERROR_MESSAGE,
+        'reply': CHAT_ERROR_MESSAGE
+    }
+    try:
+        data = request.get_json()
+        parsed = parse_chat_request(data)
+    except Exception:
+        logger.exception('chat_stream_error')
+        return jsonify(error), 500
+    
+    if parsed is None:
+        return jsonify({
+            'error': chat_request_error(data)
+        }), 400
+    omit_reply = omit_reply_requested()
+    
+    def events():
+        # Teardown handlers run as this view returns (and again once the stream ends),
+        # resetting the log route bound before the request, so the stream binds its own
+        # route and opens its own latency budget
+        route_token = bind_route('/chat/stream')
+        try:
+            with deadline_scope(CHAT_LATENCY_BUDGET):
+                yield from stream_chat_message(*parsed, omit_reply=omit_reply)
+        except Exception:
+            logger.exception('chat_stream_error')
+            yield sse_event('error', error)
+        finally:
+            unbind_route(route_token)
+    
+    return Response(stream_with_context(events()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
 @app.route('/intents', methods=['GET'])
 def get_intents():
     """Get available intents"""
-    return jsonify({
-        'intents': list(INTENT_PATTERNS.keys()),
-        'languages': CHATBOT_CONFIG['languages']
-    })
+    return STATIC_RESPONSES['intents'].respond(request)
 
 @app.route('/faq', methods=['GET'])
 def get_faq():
     """Get FAQ database"""
-    return jsonify({
-        'faqs': FAQ_DATABASE
-    })
+    return STATIC_RESPONSES['faq'].respond(request)
 
 @app.route('/analytics', methods=['GET'])
 def get_analytics():
     """Get chatbot analytics"""
-    total_conversations = len(conversation_contexts)
-    
-    # Calculate intent distribution
-    intent_counts = {}
-    for context in conversation_contexts.values():
-        intent = context.get('last_intent', 'unknown')
-        intent_counts[intent] = intent_counts.get(intent, 0) + 1
-    
-    # Calculate service distribution
-    service_counts = {}
-    for context in conversation_contexts.values():
-        service = context.get('last_service')
-        if service:
-            service_counts[service] = service_counts.get(service, 0) + 1
+    # Kept up to date as contexts change, so this does not scan every conversation
+    distribution = conversation_contexts.distribution()
     
     return jsonify({
-        'totalConversations': total_conversations,
-        'intentDistribution': intent_counts,
-        'serviceDistribution': service_counts,
+        'totalConversations': distribution['total'],
+        'intentDistribution': distribution['intents'],
+        'serviceDistribution': distribution['services'],
+        'traffic': TRAFFIC.snapshot(),
         'features': CHATBOT_CONFIG['features'],
         'version': CHATBOT_CONFIG['version'],
-        'nltk_enabled': NLTK_AVAILABLE
+        'nltk_enabled': NLTK_AVAILABLE,
+        'preprocessing': PREPROCESSOR.stats(),
+        'retrieval': KNOWLEDGE_INDEX.stats(),
+        'contextStore': conversation_contexts.stats(),
+        'backend': BACKEND.stats(),
+        'technicianCache': TECHNICIAN_CACHE.stats(),
+        'replyCache': REPLY_CACHE.stats(),
+        'technicianRanking': TECHNICIAN_RANKER.stats(),
+        'json': {'encoder': 'orjson' if app.json.use_orjson else 'json', 'ensureAscii': app.json.ensure_ascii},
+        'compression': COMPRESSOR.stats() if COMPRESSOR is not None else None,
+        'staticResponses': {name: response.stats() for name, response in STATIC_RESPONSES.items()},
+        'logging': structured_logging.stats(),
+        'profiling': PROFILER.stats(),
+        'startup': STARTUP.report()
     })
 
+Gauge('quickfix_backend_circuit_open', 'Whether the circuit breaker for a backend endpoint is open',
+      lambda: {(name, ): int(stats['state'] == 'open') for name, stats in BACKEND.stats()['breakers'].items()},
+      ['endpoint'])
+Gauge('quickfix_cache_hit_ratio', 'Hit ratio of the in-process caches',
+      lambda: {('reply', ): REPLY_CACHE.stats()['hitRate'],
+               ('technicians', ): TECHNICIAN_CACHE.stats()['hitRate']},
+      ['cache'])
+Gauge('quickfix_startup_seconds', 'Time spent in each startup phase',
+      lambda: {(phase, ): seconds for phase, seconds in STARTUP.phases.items()}, ['phase'])
+
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Prometheus metrics for this worker"""
+    return REGISTRY.render(), 200, {'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
+
 @app.route('/context/<user_id>', methods=['GET'])
 def get_user_context(user_id):
     """Get conversation context for a specific user"""
-    context = get_conversation_context(user_id)
+    context = peek_conversation_context(user_id)
+    if context is None:
+        # Unknown users get an empty context without taking up a slot
+        context = new_conversation_context()
     return jsonify(context)
 
 @app.route('/context/<user_id>', methods=['DELETE'])
 def clear_user_context(user_id):
     """Clear conversation context for a specific user"""
-    if user_id in conversation_contexts:
-        del conversation_contexts[user_id]
+    if conversation_contexts.delete(user_id):
         return jsonify({'message': 'Context cleared successfully'})
     return jsonify({'message': 'No context found for user'}), 404
 
+def admin_authorized():
+    """Whether the request may use /admin endpoints (never while ADMIN_TOKEN is unset)"""
+    return bool(ADMIN_TOKEN) and request.headers.get('X-Admin-Token') == ADMIN_TOKEN
+
+def omit_reply_requested():
+    """Whether the client opted out of 'reply', the duplicate of 'message' (X-Omit-Reply: 1)"""
+    return request.headers.get('X-Omit-Reply') == '1'
+
+def profile_requested():
+    """Whether an admin asked for this request to be profiled"""
+    return request.headers.get('X-Profile') == '1' and admin_authorized()
+
+@app.route('/admin/reply-cache', methods=['DELETE'])
+def flush_reply_cache():
+    """Flush this worker's memoized replies"""
+    if not admin_authorized():
+        return jsonify({'error': 'Forbidden'}), 403
+    flushed = REPLY_CACHE.clear()
+    return jsonify({
+        'message': 'Reply cache flushed',
+        'entriesFlushed': flushed
+    })
+
+@app.route('/admin/profiles', methods=['GET'])
+def get_profiles():
+    """This worker's aggregated /chat profile as collapsed stacks (for flamegraph.pl or speedscope)"""
+    if not admin_authorized():
+        return jsonify({'error': 'Forbidden'}), 403
+    return PROFILER.collapsed(), 200, {'Content-Type': 'text/plain; charset=utf-8'}
+
+@app.route('/admin/profiles', methods=['DELETE'])
+def clear_profiles():
+    """Reset this worker's aggregated profile"""
+    if not admin_authorized():
+        return jsonify({'error': 'Forbidden'}), 403
+    return jsonify({
+        'message': 'Profile cleared',
+        'profilesCleared': PROFILER.clear()
+    })
+
+# No chat stage calls preprocess_text() (see analyze_message), so NLTK is only
+# preloaded on request; NLTK_PRELOAD=true is for when a stage starts using it
+NLTK_PRELOAD = os.environ.get('NLTK_PRELOAD', 'false').lower() == 'true'
+
+def warm_up():
+    """Build what the first message would otherwise wait for: the retrieval index (and NLTK if NLTK_PRELOAD)"""
+    if NLTK_PRELOAD:
+        PREPROCESSOR.warm_up()
+    KNOWLEDGE_INDEX.build()
+
+# NLP_PRELOAD=false leaves the warm-up to the first message that needs it
+if os.environ.get('NLP_PRELOAD', 'true').lower() == 'true':
+    warm_up()
+    STARTUP.mark('nlp_preload')
+STARTUP.ready()
+
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))
     print(f" QuickFix Chatbot v{CHATBOT_CONFIG['version']} starting...")
@@ -0,0 +1,107 @@
+"""
+ASGI entry point for the QuickFix Chatbot
+POST /chat runs the async pipeline, so one worker can keep many conversations
+in flight while they wait on the backend; every other route is served by the
+Flask app as before.
+
+Run with: uvicorn asgi:application --workers 2
+      or: gunicorn -k uvicorn.workers.UvicornWorker asgi:application
+"""
+
+import json
+from time import perf_counter
+
+from asgiref.wsgi import WsgiToAsgi
+
+from app import (app, logger, ASYNC_BACKEND, CHAT_LATENCY_BUDGET, CHAT_ERROR_MESSAGE, COMPRESSOR,
+                 HTTP_SECONDS, HTTP_REQUESTS, chat_request_error, parse_chat_request, handle_chat_message_async)
+from backend_client import deadline_scope
+from structured_logging import bind_route, unbind_route
+
+flask_application = WsgiToAsgi(app)
+
+
+async def read_body(receive):
+    """Collect the full request body"""
+    body = b''
+    more_body = True
+    while more_body:
+        message = await receive()
+        body += message.get('body', b'')
+        more_body = message.get('more_body', False)
+    return body
+
+
+async def send_json(send, payload, status=200, origin=None, started=None, accept_encoding=None):
+    """Send a JSON response encoded (and compressed) the way the Flask routes do"""
+    body = app.json.dumps_bytes(payload)
+    headers = [(b'content-type', b'application/json')]
+    if COMPRESSOR is not None and len(body) >= COMPRESSOR.min_bytes:
+        body, encoding = COMPRESSOR.encode(body, accept_encoding)
+        headers.append((b'vary', b'Accept-Encoding'))
+        if encoding is not None:
+            headers.append((b'content-encoding', encoding.encode('ascii')))
+    headers.append((b'content-length', str(len(body)).encode('ascii')))
+    if origin is not None:
+        # Same headers flask-cors adds for the Flask routes
+        headers.append((b'access-control-allow-origin', origin))
+        headers.append((b'vary', b'Origin'))
+    await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+    await send({'type': 'http.response.body', 'body': body})
+    if started is not None:
+        HTTP_SECONDS.labels('/chat').observe(perf_counter() - started)
+        HTTP_REQUESTS.labels('/chat', str(status)).inc()
+
+
+async def chat(scope, receive, send):
+    """Async /chat endpoint, same payloads as the Flask view"""
+    started = perf_counter()
+    request_headers = dict(scope.get('headers', []))
+    origin = request_headers.get(b'origin')
+    accept_encoding = request_headers.get(b'accept-encoding', b'').decode('latin-1')
+    route_token = bind_route('/chat')
+    try:
+        data = json.loads(await read_body(receive))
+        parsed = parse_chat_request(data)
+        if parsed is None:
+            await send_json(send, {'error': chat_request_error(data)}, 400, origin, started)
+            return
+
+        with deadline_scope(CHAT_LATENCY_BUDGET):
+            response_data = await handle_chat_message_async(*parsed)
+        if request_headers.get(b'x-omit-reply') == b'1':
+            del response_data['reply']
+        await send_json(send, response_data, origin=origin, started=started, accept_encoding=accept_encoding)
+
+    except Exception:
+        logger.exception('chat_error')
+        await send_json(send, {
+            'error': 'Internal server error',
+            'message': CHAT_ERROR_MESSAGE,
+            'reply': CHAT_ERROR_MESSAGE
+        }, 500, origin, started)
+    finally:
+        unbind_route(route_token)
+
+
+async def lifespan(receive, send):
+    """Close the async backend client's connections on shutdown"""
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            if ASYNC_BACKEND is not None:
+                await ASYNC_BACKEND.aclose()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def application(scope, receive, send):
+    """Route POST /chat to the async pipeline and everything else to Flask"""
+    if scope['type'] == 'lifespan':
+        await lifespan(receive, send)
+    elif scope['type'] == 'http' and scope['path'] == '/chat' and scope['method'] == 'POST':
+        await chat(scope, receive, send)
+    else:
+        await flask_application(scope, receive, send)
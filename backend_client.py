@@ -0,0 +1,362 @@
+"""
+HTTP client for the QuickFix backend API
+One pooled keep-alive session per worker, with timeouts, retries, circuit
+breakers, a per-request deadline budget and latency stats
+"""
+
+import asyncio
+import contextvars
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from circuit_breaker import CircuitBreaker
+from metrics import Counter, Histogram
+
+try:
+    import httpx
+    HTTPX_AVAILABLE = True
+except ImportError:
+    HTTPX_AVAILABLE = False
+
+# Statuses worth retrying, and that count against an endpoint's breaker
+RETRY_STATUSES = frozenset([502, 503, 504])
+
+BACKEND_SECONDS = Histogram(
+    'quickfix_backend_request_seconds', 'Backend call latency, retries included', ['endpoint'])
+BACKEND_CALLS = Counter(
+    'quickfix_backend_requests_total', 'Backend calls by outcome (ok, error, rejected, deadline)',
+    ['endpoint', 'outcome'])
+
+# Absolute deadline (time.monotonic()) of the request being served, if any
+_deadline = contextvars.ContextVar('backend_deadline', default=None)
+
+
+class CircuitOpenError(requests.RequestException):
+    """Raised instead of calling an endpoint whose circuit breaker is open"""
+
+
+class DeadlineExceeded(requests.RequestException):
+    """Raised when the request's latency budget has no time left for a backend call"""
+
+
+def start_deadline(seconds):
+    """Start a latency budget of ``seconds`` for the current request; returns a reset token"""
+    return _deadline.set(time.monotonic() + seconds if seconds else None)
+
+
+def end_deadline(token):
+    """End the budget started by ``start_deadline``"""
+    _deadline.reset(token)
+
+
+@contextmanager
+def deadline_scope(seconds):
+    """Give every backend call made inside this block only the time left of ``seconds``"""
+    token = start_deadline(seconds)
+    try:
+        yield
+    finally:
+        end_deadline(token)
+
+
+def remaining_budget():
+    """Seconds left before the current deadline, or None if there is none"""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return max(deadline - time.monotonic(), 0.0)
+
+
+class BackendClient:
+    """Connection-pooled client for ``base_url``.
+
+    Every worker process gets its own ``requests.Session`` (sessions must not
+    be shared across a fork), so repeated calls reuse warm TCP/TLS
+    connections. GETs are retried a bounded number of times with exponential
+    backoff on connection errors, timeouts and 502/503/504 responses, but
+    never past the deadline set by ``deadline_scope``. Each endpoint has its
+    own circuit breaker; while it is open, calls fail immediately with
+    ``CircuitOpenError``.
+    """
+
+    def __init__(self, base_url, pool_size=10, connect_timeout=3.05, read_timeout=5,
+                 retries=2, backoff_factor=0.2, min_call_seconds=0.05, breaker_options=None):
+        self.base_url = base_url.rstrip('/')
+        self.pool_size = pool_size
+        self.timeout = (connect_timeout, read_timeout)
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.min_call_seconds = min_call_seconds
+        self.breaker_options = breaker_options or {}
+        self._session = None
+        self._session_pid = None
+        self._lock = threading.Lock()
+        self._endpoints = {}
+        self._breakers = {}
+
+    def _build_session(self):
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size, max_retries=0)
+        session = requests.Session()
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        session.headers.update({'Accept': 'application/json', 'Connection': 'keep-alive'})
+        return session
+
+    @property
+    def session(self):
+        """The pooled session for the current process"""
+        if self._session_pid != os.getpid():
+            with self._lock:
+                if self._session_pid != os.getpid():
+                    self._session = self._build_session()
+                    self._session_pid = os.getpid()
+        return self._session
+
+    def breaker(self, endpoint):
+        """The circuit breaker guarding ``endpoint``"""
+        breaker = self._breakers.get(endpoint)
+        if breaker is None:
+            with self._lock:
+                breaker = self._breakers.setdefault(
+                    endpoint, CircuitBreaker(endpoint, **self.breaker_options))
+        return breaker
+
+    def _call_timeout(self, timeout):
+        """Connect/read timeouts clipped to what is left of the deadline"""
+        connect_timeout, read_timeout = timeout or self.timeout
+        remaining = remaining_budget()
+        if remaining is None:
+            return connect_timeout, read_timeout
+        if remaining < self.min_call_seconds:
+            raise DeadlineExceeded('No time left in the request budget')
+        return min(connect_timeout, remaining), min(read_timeout, remaining)
+
+    def get(self, path, params=None, endpoint=None, timeout=None):
+        """GET ``path`` from the backend; raises ``requests.RequestException`` on failure"""
+        endpoint = endpoint or path
+        breaker = self.breaker(endpoint)
+        if not breaker.allow():
+            self._record(endpoint, 0.0, None, rejected=True)
+            raise CircuitOpenError(f'Circuit open for {endpoint}')
+
+        url = f'{self.base_url}{path}'
+        start = time.perf_counter()
+        attempt = 0
+        while True:
+            try:
+                response = self.session.get(url, params=params, timeout=self._call_timeout(timeout))
+            except DeadlineExceeded:
+                if attempt:
+                    breaker.record_failure()  # The earlier attempts failed
+                else:
+                    breaker.release()
+                self._record(endpoint, time.perf_counter() - start, None, deadline=True)
+                raise
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt < self.retries and self._backoff(attempt):
+                    attempt += 1
+                    continue
+                breaker.record_failure()
+                self._record(endpoint, time.perf_counter() - start, None)
+                raise e
+            except requests.RequestException:
+                breaker.record_failure()
+                self._record(endpoint, time.perf_counter() - start, None)
+                raise
+
+            if response.status_code in RETRY_STATUSES and attempt < self.retries and self._backoff(attempt):
+                response.close()
+                attempt += 1
+                continue
+            if response.status_code >= 500:
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+            self._record(endpoint, time.perf_counter() - start, response.status_code)
+            return response
+
+    def _backoff(self, attempt):
+        """Sleep before the next attempt; False if the deadline does not allow one"""
+        delay = self.backoff_factor * (2 ** attempt)
+        remaining = remaining_budget()
+        if remaining is not None and remaining - delay < self.min_call_seconds:
+            return False
+        time.sleep(delay)
+        return True
+
+    def _record(self, endpoint, elapsed, status_code, rejected=False, deadline=False):
+        """Update per-endpoint latency and error counters"""
+        if rejected:
+            outcome = 'rejected'
+        elif deadline:
+            outcome = 'deadline'
+        else:
+            outcome = 'error' if status_code is None or status_code >= 500 else 'ok'
+            BACKEND_SECONDS.labels(endpoint).observe(elapsed)
+        BACKEND_CALLS.labels(endpoint, outcome).inc()
+
+        with self._lock:
+            stats = self._endpoints.get(endpoint)
+            if stats is None:
+                stats = self._endpoints[endpoint] = {
+                    'requests': 0, 'errors': 0, 'rejected': 0, 'deadlineExceeded': 0,
+                    'totalMs': 0.0, 'maxMs': 0.0, 'lastStatus': None
+                }
+            if rejected:
+                stats['rejected'] += 1
+                return
+            if deadline:
+                stats['deadlineExceeded'] += 1
+                return
+            elapsed_ms = elapsed * 1000
+            stats['requests'] += 1
+            stats['totalMs'] += elapsed_ms
+            stats['maxMs'] = max(stats['maxMs'], elapsed_ms)
+            stats['lastStatus'] = status_code
+            if status_code is None or status_code >= 500:
+                stats['errors'] += 1
+
+    def connection_stats(self):
+        """Connections opened vs requests sent through this worker's pools"""
+        opened = sent = 0
+        if self._session is not None and self._session_pid == os.getpid():
+            for adapter in set(self._session.adapters.values()):
+                for key in adapter.poolmanager.pools.keys():
+                    pool = adapter.poolmanager.pools.get(key)
+                    if pool is not None:
+                        opened += pool.num_connections
+                        sent += pool.num_requests
+        return {
+            'connectionsOpened': opened,
+            'requestsSent': sent,
+            'connectionsReused': max(sent - opened, 0),
+            'reuseRate': round((sent - opened) / sent, 4) if sent else 0.0
+        }
+
+    def stats(self):
+        """Per-endpoint latency, breaker state and connection reuse for this worker"""
+        with self._lock:
+            endpoints = {
+                name: dict(stats,
+                           totalMs=round(stats['totalMs'], 3),
+                           maxMs=round(stats['maxMs'], 3),
+                           avgMs=round(stats['totalMs'] / stats['requests'], 3) if stats['requests'] else 0.0)
+                for name, stats in self._endpoints.items()
+            }
+            breakers = dict(self._breakers)
+        return {
+            'baseUrl': self.base_url,
+            'poolSize': self.pool_size,
+            'connectTimeout': self.timeout[0],
+            'readTimeout': self.timeout[1],
+            'retries': self.retries,
+            'endpoints': endpoints,
+            'breakers': {name: breaker.stats() for name, breaker in breakers.items()},
+            'connections': self.connection_stats()
+        }
+
+
+class AsyncBackendClient:
+    """Non-blocking counterpart of ``BackendClient`` built on ``httpx.AsyncClient``.
+
+    It shares the sync client's base URL, timeouts, retry policy, circuit
+    breakers and per-endpoint stats, so both paths see the same backend
+    health. One ``httpx.AsyncClient`` is kept per event loop.
+    """
+
+    def __init__(self, client, max_connections=100):
+        if not HTTPX_AVAILABLE:
+            raise RuntimeError('httpx is required for the async backend client')
+        self.client = client
+        self.max_connections = max_connections
+        self._http = None
+        self._http_loop = None
+
+    @property
+    def http(self):
+        """The pooled ``httpx.AsyncClient`` for the running event loop"""
+        loop = asyncio.get_running_loop()
+        if self._http_loop is not loop:
+            self._http = httpx.AsyncClient(
+                base_url=self.client.base_url,
+                headers={'Accept': 'application/json'},
+                limits=httpx.Limits(max_connections=self.max_connections,
+                                    max_keepalive_connections=self.client.pool_size)
+            )
+            self._http_loop = loop
+        return self._http
+
+    async def aclose(self):
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+            self._http_loop = None
+
+    async def get(self, path, params=None, endpoint=None, timeout=None):
+        """GET ``path`` from the backend; raises ``requests.RequestException`` on failure"""
+        client = self.client
+        endpoint = endpoint or path
+        breaker = client.breaker(endpoint)
+        if not breaker.allow():
+            client._record(endpoint, 0.0, None, rejected=True)
+            raise CircuitOpenError(f'Circuit open for {endpoint}')
+
+        start = time.perf_counter()
+        attempt = 0
+        try:
+            while True:
+                try:
+                    connect_timeout, read_timeout = client._call_timeout(timeout)
+                    response = await self.http.get(
+                        path, params=params,
+                        timeout=httpx.Timeout(read_timeout, connect=connect_timeout)
+                    )
+                except DeadlineExceeded:
+                    if attempt:
+                        breaker.record_failure()
+                    else:
+                        breaker.release()
+                    client._record(endpoint, time.perf_counter() - start, None, deadline=True)
+                    raise
+                except httpx.HTTPError as e:
+                    if attempt < client.retries and await self._backoff(attempt):
+                        attempt += 1
+                        continue
+                    breaker.record_failure()
+                    client._record(endpoint, time.perf_counter() - start, None)
+                    raise requests.ConnectionError(str(e)) from e
+
+                if response.status_code in RETRY_STATUSES and attempt < client.retries and await self._backoff(attempt):
+                    attempt += 1
+                    continue
+                if response.status_code >= 500:
+                    breaker.record_failure()
+                else:
+                    breaker.record_success()
+                client._record(endpoint, time.perf_counter() - start, response.status_code)
+                return response
+        except requests.RequestException:
+            raise  # The breaker has already heard about this call
+        except BaseException:
+            # Cancelled (or broken) before an outcome was recorded. As with a
+            # deadline, give back an unused permission so a half-open breaker
+            # can try again
+            if attempt:
+                breaker.record_failure()  # The earlier attempts failed
+            else:
+                breaker.release()
+            raise
+
+    async def _backoff(self, attempt):
+        """Wait before the next attempt; False if the deadline does not allow one"""
+        delay = self.client.backoff_factor * (2 ** attempt)
+        remaining = remaining_budget()
+        if remaining is not None and remaining - delay < self.client.min_call_seconds:
+            return False
+        await asyncio.sleep(delay)
+        return True
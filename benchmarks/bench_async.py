@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Benchmark: sync vs async /chat throughput at different backend latencies
+Runs fully offline against a local stand-in backend.
+Run from the repository root: python benchmarks/bench_async.py
+"""
+
+import asyncio
+import contextlib
+import io
+import json
+import os
+import time
+
+from corpus import ROOT_DIR  # noqa: F401  (puts the app modules on sys.path)
+from standin_backend import StandInBackend
+
+LATENCIES = [0.0, 0.05, 0.2]
+SYNC_REQUESTS = 40
+ASYNC_REQUESTS = 400
+ASYNC_CONCURRENCY = 50
+
+
+def backend_messages(count):
+    """Messages that all need a backend call (unique booking IDs defeat any caching)"""
+    return [f"payment status for {i:024x}" if i % 2 else "show me available plumbers"
+            for i in range(count)]
+
+
+def run_sync(app_module, messages):
+    """One sync worker: requests are served strictly one after another"""
+    client = app_module.app.test_client()
+    start = time.perf_counter()
+    for i, message in enumerate(messages):
+        response = client.post('/chat', json={'message': message, 'userId': f'sync-{i % 20}'})
+        assert response.status_code == 200, response.status_code
+    return len(messages) / (time.perf_counter() - start)
+
+
+async def call_asgi(application, payload):
+    """Drive one request through the ASGI app in-process"""
+    body = json.dumps(payload).encode('utf-8')
+    sent = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': body, 'more_body': False}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {'type': 'http', 'method': 'POST', 'path': '/chat', 'headers': [],
+             'query_string': b'', 'http_version': '1.1'}
+    await application(scope, receive, send)
+    return sent[0]['status']
+
+
+async def run_async(application, messages, concurrency):
+    """One async worker serving up to ``concurrency`` conversations at once"""
+    queue = list(enumerate(messages))
+    queue.reverse()
+
+    async def client():
+        while queue:
+            i, message = queue.pop()
+            status = await call_asgi(application, {'message': message, 'userId': f'async-{i % 20}'})
+            assert status == 200, status
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return len(messages) / (time.perf_counter() - start)
+
+
+def main():
+    with StandInBackend() as backend:
+        os.environ['BACKEND_URL'] = backend.url
+        os.environ['TECH_CACHE_TTL'] = '0'
+        os.environ['TECH_CACHE_STALE_TTL'] = '0'
+        with contextlib.redirect_stdout(io.StringIO()):
+            import app as app_module
+            import asgi
+
+        print("Sync vs async /chat throughput (every message needs a backend call)\n")
+        print(f"{'backend latency':>16} {'sync req/s':>12} {'async req/s':>12} {'speedup':>9}")
+        for latency in LATENCIES:
+            backend.set_latency(latency)
+            with contextlib.redirect_stdout(io.StringIO()):
+                sync_rps = run_sync(app_module, backend_messages(SYNC_REQUESTS))
+                async_rps = asyncio.run(run_async(asgi.application, backend_messages(ASYNC_REQUESTS),
+                                                  ASYNC_CONCURRENCY))
+            print(f"{latency * 1000:>13.0f} ms {sync_rps:>12.1f} {async_rps:>12.1f} {async_rps / sync_rps:>8.1f}x")
+        print(f"\nsync: 1 worker, sequential; async: 1 worker, {ASYNC_CONCURRENCY} concurrent clients")
+
+
+if __name__ == "__main__":
+    main()
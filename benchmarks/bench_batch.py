@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Benchmark: per-message cost of /chat/batch vs one /chat call per message
+Runs fully offline against a local stand-in backend.
+Run from the repository root: python benchmarks/bench_batch.py
+"""
+
+import contextlib
+import io
+import os
+import time
+
+from corpus import CORPUS
+from standin_backend import StandInBackend
+
+BATCH_SIZES = [10, 50, 100]
+ROUNDS = 5
+
+
+def items_for(size, offset=0):
+    """``size`` corpus messages spread over a handful of users"""
+    return [{'message': CORPUS[(offset + i) % len(CORPUS)], 'userId': f'user-{i % 7}'}
+            for i in range(size)]
+
+
+def time_single(client, items):
+    start = time.perf_counter()
+    for item in items:
+        assert client.post('/chat', json=item).status_code == 200
+    return time.perf_counter() - start
+
+
+def time_batch(client, items):
+    start = time.perf_counter()
+    response = client.post('/chat/batch', json=items)
+    assert response.status_code == 200 and response.get_json()['count'] == len(items)
+    return time.perf_counter() - start
+
+
+def main():
+    with StandInBackend(latency=0.02) as backend:
+        os.environ['BACKEND_URL'] = backend.url
+        with contextlib.redirect_stdout(io.StringIO()):
+            import app
+        client = app.app.test_client()
+
+        print("Per-message cost: /chat per message vs /chat/batch (20 ms backend)\n")
+        print(f"{'batch size':>10} {'/chat us/msg':>14} {'batch us/msg':>14} {'speedup':>9}")
+        for size in BATCH_SIZES:
+            single = batch = 0.0
+            for round_number in range(ROUNDS):
+                items = items_for(size, offset=round_number * size)
+                with contextlib.redirect_stdout(io.StringIO()):
+                    single += time_single(client, items)
+                    batch += time_batch(client, items)
+            messages = size * ROUNDS
+            print(f"{size:>10} {single / messages * 1e6:>14.0f} {batch / messages * 1e6:>14.0f} "
+                  f"{single / batch:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
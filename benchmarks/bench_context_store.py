@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Benchmark: per-request conversation context overhead for each store backend
+Run from the repository root: python benchmarks/bench_context_store.py
+"""
+
+import os
+import tempfile
+import time
+from datetime import datetime
+
+import corpus  # noqa: F401  (puts the app modules on sys.path)
+
+from context_store import MemoryContextStore, SQLiteContextStore
+
+
+def new_context():
+    return {
+        'last_intent': None,
+        'last_service': None,
+        'booking_in_progress': False,
+        'messages': [],
+        'created_at': datetime.now().isoformat()
+    }
+
+
+def simulate_request(store, user_id, message):
+    """The context work one /chat request does: read, then update"""
+    context = store.get_or_create(user_id, new_context)
+    context = store.get(user_id) or context
+    context['last_intent'] = 'booking'
+    context['messages'].append({'message': message, 'timestamp': datetime.now().isoformat()})
+    context['messages'] = context['messages'][-10:]
+    store.set(user_id, context)
+
+
+def run(label, store, users=500, requests=20000):
+    """Replay ``requests`` messages spread over ``users`` users"""
+    start = time.perf_counter()
+    for i in range(requests):
+        simulate_request(store, f'user-{i % users}', 'I need a plumber')
+    store.flush()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<34} {elapsed / requests * 1e6:8.1f} us/request")
+    return store.stats()
+
+
+def main():
+    print("Context store overhead (500 users, 20000 requests)\n")
+    run("memory", MemoryContextStore())
+
+    with tempfile.TemporaryDirectory() as directory:
+        stats = run("sqlite (read cache, batched)",
+                    SQLiteContextStore(os.path.join(directory, 'cached.db')))
+        print(f"{'':<34} {stats['flushes']} flushes, {stats['dbReads']} db reads")
+
+        stats = run("sqlite (no read cache)",
+                    SQLiteContextStore(os.path.join(directory, 'uncached.db'), cache_ttl=0))
+        print(f"{'':<34} {stats['flushes']} flushes, {stats['dbReads']} db reads")
+
+        stats = run("sqlite (flush on every write)",
+                    SQLiteContextStore(os.path.join(directory, 'sync.db'), cache_ttl=0, batch_size=1))
+        print(f"{'':<34} {stats['flushes']} flushes, {stats['dbReads']} db reads")
+
+
+if __name__ == "__main__":
+    main()
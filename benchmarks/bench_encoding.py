@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Benchmark: bytes per /chat response and serialization CPU, by reply language
+Compares Flask's default encoding (\\uXXXX escapes) with the UTF-8 provider,
+with and without the duplicate 'reply' field, and gzip/brotli on top.
+Runs fully offline against a local stand-in backend.
+Run from the repository root: python benchmarks/bench_encoding.py
+"""
+
+import contextlib
+import io
+import json
+import os
+import statistics
+import timeit
+
+from corpus import ENGLISH_MESSAGES, SINHALA_MESSAGES, TAMIL_MESSAGES
+from standin_backend import StandInBackend
+
+LANGUAGES = {'en': ENGLISH_MESSAGES, 'si': SINHALA_MESSAGES, 'ta': TAMIL_MESSAGES}
+
+
+def escaped(payload):
+    """Flask's default provider: sorted keys, compact, ASCII with \\uXXXX escapes"""
+    return (json.dumps(payload, ensure_ascii=True, sort_keys=True, separators=(',', ':')) + '\n').encode('ascii')
+
+
+def encode_us(func, payloads, number=200):
+    """Mean microseconds to encode one payload"""
+    best = min(timeit.repeat(lambda: [func(payload) for payload in payloads], repeat=3, number=number))
+    return best / (number * len(payloads)) * 1e6
+
+
+def main():
+    with StandInBackend() as backend:
+        os.environ['BACKEND_URL'] = backend.url
+        with contextlib.redirect_stdout(io.StringIO()):
+            import app
+            client = app.app.test_client()
+            replies = {
+                language: [client.post('/chat', json={'message': message, 'userId': f'bench-{language}'}).get_json()
+                           for message in messages]
+                for language, messages in LANGUAGES.items()
+            }
+
+    provider = app.app.json
+    compressor = app.COMPRESSOR
+    print(f"Mean bytes per /chat response (JSON encoder: {'orjson' if provider.use_orjson else 'json'})\n")
+    print(f"{'lang':<5} {'escaped':>8} {'utf-8':>8} {'no reply':>9} {'gzip':>7} {'br':>7}   "
+          f"{'escape us':>9} {'utf-8 us':>9} {'gzip us':>8} {'br us':>7}")
+    for language, payloads in replies.items():
+        compact = [{key: value for key, value in payload.items() if key != 'reply'} for payload in payloads]
+        sizes = {
+            'escaped': [len(escaped(payload)) for payload in payloads],
+            'utf-8': [len(provider.dumps_bytes(payload)) for payload in payloads],
+            'no reply': [len(provider.dumps_bytes(payload)) for payload in compact]
+        }
+        bodies = [provider.dumps_bytes(payload) for payload in compact]
+        for encoding in compressor.encodings:
+            sizes[encoding] = [len(compressor.compress(body, encoding)) for body in bodies]
+
+        timings = [
+            encode_us(escaped, payloads),
+            encode_us(provider.dumps_bytes, payloads),
+            *(encode_us(lambda body, encoding=encoding: compressor.compress(body, encoding), bodies, number=50)
+              for encoding in ('gzip', 'br') if encoding in compressor.encodings)
+        ]
+        row = ' '.join(f"{statistics.mean(sizes[column]):>{width}.0f}" if column in sizes else f"{'-':>{width}}"
+                       for column, width in (('escaped', 8), ('utf-8', 8), ('no reply', 9), ('gzip', 7), ('br', 7)))
+        print(f"{language:<5} {row}   " + ' '.join(f"{timing:>8.1f}" for timing in timings))
+
+    print("\nSizes after 'no reply' drop the duplicate field; gzip/br compress that body "
+          f"(levels {compressor.levels}), though bodies under {compressor.min_bytes} bytes are sent as is.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: compiled intent matcher vs the original per-pattern loop
+Run from the repository root: python benchmarks/bench_intents.py
+"""
+
+import re
+import timeit
+
+from corpus import CORPUS
+
+from app import INTENT_PATTERNS, INTENT_MATCHER
+
+
+def legacy_scores(message):
+    """Original detect_intent scoring: one re.search per pattern"""
+    message_lower = message.lower()
+    intent_scores = {}
+    for intent, patterns in INTENT_PATTERNS.items():
+        score = 0
+        for pattern in patterns:
+            if re.search(pattern, message_lower, re.IGNORECASE):
+                score += 1
+        intent_scores[intent] = score
+    return intent_scores
+
+
+def legacy_detect_intent(message):
+    """Original detect_intent"""
+    intent_scores = legacy_scores(message)
+    if max(intent_scores.values()) > 0:
+        return max(intent_scores, key=intent_scores.get)
+    return 'default'
+
+
+def check_equivalence():
+    """Both implementations must agree on every score and every winner"""
+    mismatches = 0
+    for message in CORPUS:
+        if (legacy_scores(message) != INTENT_MATCHER.scores(message)
+                or legacy_detect_intent(message) != INTENT_MATCHER.detect(message)):
+            mismatches += 1
+            print(f"MISMATCH: {message!r}")
+    return mismatches
+
+
+def run(label, func, rounds=5, number=200):
+    """Time a full corpus pass and report the per-message cost"""
+    def corpus_pass():
+        for message in CORPUS:
+            func(message)
+    best = min(timeit.repeat(corpus_pass, repeat=rounds, number=number))
+    per_message_us = best / (number * len(CORPUS)) * 1e6
+    print(f"{label:<28} {per_message_us:8.2f} us/message")
+    return per_message_us
+
+
+def main():
+    print(f"Intent detection benchmark ({len(CORPUS)} messages, en/si/ta)\n")
+    mismatches = check_equivalence()
+    print(f"Equivalence check: {'OK' if mismatches == 0 else f'{mismatches} mismatches'}\n")
+
+    legacy = run("legacy detect_intent", legacy_detect_intent)
+    compiled = run("IntentMatcher.detect", INTENT_MATCHER.detect)
+    run("IntentMatcher.scores", INTENT_MATCHER.scores)
+    print(f"\nSpeedup: {legacy / compiled:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
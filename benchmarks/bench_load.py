@@ -0,0 +1,368 @@
+#!/usr/bin/env python3
+"""
+Load and latency benchmark for the chatbot HTTP API
+Replays a weighted en/si/ta corpus plus multi-turn conversations with
+concurrent clients and reports throughput, latency and time-to-first-byte
+percentiles, and memory. --endpoint stream drives /chat/stream instead of /chat.
+
+Targets:
+  --target inprocess   Flask test client, one per client thread (default)
+  --target gunicorn    local gunicorn with gunicorn.conf.py (--workers, --worker-class,
+                       --threads, --no-preload override it)
+  --url URL            an already running server
+
+Examples (from the repository root):
+  python benchmarks/bench_load.py --clients 8 --requests 2000 --output results.json
+  python benchmarks/bench_load.py --target gunicorn --workers 2 --baseline baseline.json
+  python benchmarks/bench_load.py --target gunicorn --worker-class sync --no-preload
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime
+
+import requests
+
+from corpus import ROOT_DIR, WEIGHTED_MESSAGES, CONVERSATIONS
+from standin_backend import StandInBackend
+
+
+def build_schedule(client, count, seed, conversation_share):
+    """Deterministic list of (user_id, message) for one client"""
+    rng = random.Random(seed * 1000 + client)
+    groups = [messages for messages, _ in WEIGHTED_MESSAGES]
+    weights = [weight for _, weight in WEIGHTED_MESSAGES]
+    schedule = []
+    conversation = 0
+    while len(schedule) < count:
+        if rng.random() < conversation_share:
+            user_id = f'conv-{client}-{conversation}'
+            conversation += 1
+            schedule.extend((user_id, message) for message in rng.choice(CONVERSATIONS))
+        else:
+            messages = rng.choices(groups, weights)[0]
+            schedule.append((f'user-{client}-{rng.randrange(50)}', rng.choice(messages)))
+    return schedule[:count]
+
+
+def stream_failed(body):
+    """Whether a /chat/stream body ended in an error event"""
+    return b'event: error' in body
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = max(int(round(fraction * len(sorted_values) + 0.5)) - 1, 0)
+    return sorted_values[min(index, len(sorted_values) - 1)]
+
+
+def _proc_kb(path, field):
+    try:
+        with open(path) as status:
+            for line in status:
+                if line.startswith(field):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        return None
+    return None
+
+
+def rss_mb(pid):
+    """Resident memory of a process in MB (None where /proc is unavailable)"""
+    return _proc_kb(f'/proc/{pid}/status', 'VmRSS:')
+
+
+def pss_mb(pid):
+    """Proportional set size in MB: pages shared copy-on-write count once per sharer"""
+    return _proc_kb(f'/proc/{pid}/smaps_rollup', 'Pss:')
+
+
+def child_pids(parent):
+    """Pids whose parent is ``parent`` (gunicorn workers of a master)"""
+    pids = []
+    for entry in os.listdir('/proc') if os.path.isdir('/proc') else []:
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as stat:
+                fields = stat.read().rsplit(')', 1)[1].split()
+        except OSError:
+            continue
+        if int(fields[1]) == parent:
+            pids.append(int(entry))
+    return sorted(pids)
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class InProcessTarget:
+    """The Flask app in this process"""
+
+    name = 'inprocess'
+
+    def __init__(self, endpoint='/chat'):
+        with contextlib.redirect_stdout(io.StringIO()):
+            import app
+        self.app = app.app
+        self.endpoint = endpoint
+
+    def client(self):
+        test_client = self.app.test_client()
+
+        def send(payload):
+            """(succeeded, seconds to the first body chunk)"""
+            began = time.perf_counter()
+            response = test_client.post(self.endpoint, json=payload, buffered=False)
+            chunks = iter(response.response)
+            first = next(chunks, b'')
+            first_byte = time.perf_counter() - began
+            body = b''.join(chunk if isinstance(chunk, bytes) else chunk.encode() for chunk in [first, *chunks])
+            response.close()
+            return response.status_code == 200 and not stream_failed(body), first_byte
+        return send
+
+    def memory(self):
+        return {'workers': [rss_mb(os.getpid())], 'workersPss': [pss_mb(os.getpid())]}
+
+    def close(self):
+        pass
+
+
+class HTTPTarget:
+    """A server reachable over HTTP; optionally a gunicorn we start ourselves"""
+
+    def __init__(self, url=None, workers=2, threads=1, worker_class='gthread', preload=True, env=None,
+                 endpoint='/chat'):
+        self.process = None
+        self.endpoint = endpoint
+        started = time.perf_counter()
+        if url is None:
+            port = free_port()
+            url = f'http://127.0.0.1:{port}'
+            command = [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'app:app',
+                       '--bind', f'127.0.0.1:{port}', '--workers', str(workers),
+                       '--worker-class', worker_class, '--threads', str(threads), '--log-level', 'warning']
+            env = dict(env or os.environ, GUNICORN_PRELOAD=str(preload).lower())
+            self.process = subprocess.Popen(command, cwd=ROOT_DIR, env=env,
+                                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            self.name = f"gunicorn-{worker_class}-{workers}w{threads}t{'-preload' if preload else ''}"
+        else:
+            self.name = url
+        self.url = url.rstrip('/')
+        self._wait_ready()
+        self.ready_seconds = time.perf_counter() - started
+
+    def _wait_ready(self, timeout=60):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                if requests.get(f'{self.url}/health', timeout=1).status_code == 200:
+                    return
+            except requests.RequestException:
+                pass
+            if self.process is not None and self.process.poll() is not None:
+                raise RuntimeError('gunicorn exited during startup')
+            time.sleep(0.2)
+        raise RuntimeError(f'{self.url} did not become healthy')
+
+    def client(self):
+        session = requests.Session()
+        url = f'{self.url}{self.endpoint}'
+
+        def send(payload):
+            """(succeeded, seconds to the first body chunk)"""
+            began = time.perf_counter()
+            with session.post(url, json=payload, timeout=30, stream=True) as response:
+                chunks = response.iter_content(chunk_size=None)
+                first = next(chunks, b'')
+                first_byte = time.perf_counter() - began
+                body = first + b''.join(chunks)
+            return response.status_code == 200 and not stream_failed(body), first_byte
+        return send
+
+    def memory(self):
+        if self.process is None:
+            return {'workers': [], 'workersPss': []}
+        pids = child_pids(self.process.pid)
+        return {'master': rss_mb(self.process.pid),
+                'workers': [rss_mb(pid) for pid in pids],
+                'workersPss': [pss_mb(pid) for pid in pids]}
+
+    def close(self):
+        if self.process is not None:
+            self.process.terminate()
+            self.process.wait(timeout=30)
+
+
+def run_load(target, clients, total_requests, warmup, seed, conversation_share):
+    """Drive ``target`` with ``clients`` concurrent clients; returns the results dict"""
+    per_client = max(total_requests // clients, 1)
+    schedules = [build_schedule(client, per_client + warmup, seed, conversation_share)
+                 for client in range(clients)]
+    latencies = [[] for _ in range(clients)]
+    first_bytes = [[] for _ in range(clients)]
+    errors = [0] * clients
+    start_barrier = threading.Barrier(clients + 1)
+
+    def worker(index):
+        send = target.client()
+        schedule = schedules[index]
+        for user_id, message in schedule[:warmup]:
+            send({'message': message, 'userId': user_id})
+        start_barrier.wait()
+        timings = latencies[index]
+        for user_id, message in schedule[warmup:]:
+            began = time.perf_counter()
+            try:
+                succeeded, first_byte = send({'message': message, 'userId': user_id})
+            except requests.RequestException:
+                succeeded, first_byte = False, None
+            timings.append(time.perf_counter() - began)
+            if first_byte is not None:
+                first_bytes[index].append(first_byte)
+            if not succeeded:
+                errors[index] += 1
+
+    threads = [threading.Thread(target=worker, args=(index,), daemon=True) for index in range(clients)]
+    for thread in threads:
+        thread.start()
+    start_barrier.wait()
+    began = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - began
+
+    samples = sorted(latency for timings in latencies for latency in timings)
+    ttfb = sorted(seconds for timings in first_bytes for seconds in timings)
+    memory = target.memory()
+    worker_memory = [mb for mb in memory['workers'] if mb is not None]
+    worker_pss = [mb for mb in memory['workersPss'] if mb is not None]
+    return {
+        'target': target.name,
+        'endpoint': target.endpoint,
+        'clients': clients,
+        'requests': len(samples),
+        'errors': sum(errors),
+        'durationSeconds': round(elapsed, 3),
+        'requestsPerSecond': round(len(samples) / elapsed, 1) if elapsed else 0.0,
+        'latencyMs': {
+            'mean': round(sum(samples) / len(samples) * 1000, 3) if samples else 0.0,
+            'p50': round(percentile(samples, 0.50) * 1000, 3),
+            'p95': round(percentile(samples, 0.95) * 1000, 3),
+            'p99': round(percentile(samples, 0.99) * 1000, 3),
+            'max': round(samples[-1] * 1000, 3) if samples else 0.0
+        },
+        'ttfbMs': {
+            'p50': round(percentile(ttfb, 0.50) * 1000, 3),
+            'p95': round(percentile(ttfb, 0.95) * 1000, 3),
+            'p99': round(percentile(ttfb, 0.99) * 1000, 3)
+        },
+        'memoryMb': dict(memory, totalWorkers=round(sum(worker_memory), 1),
+                         totalWorkersPss=round(sum(worker_pss), 1)),
+        'readySeconds': round(getattr(target, 'ready_seconds', 0.0), 3),
+        'seed': seed,
+        'conversationShare': conversation_share,
+        'python': platform.python_version(),
+        'timestamp': datetime.now().isoformat()
+    }
+
+
+def compare(results, baseline, max_throughput_drop, max_latency_increase):
+    """Regressions of ``results`` against ``baseline``, as readable strings"""
+    failures = []
+    old_rps, new_rps = baseline['requestsPerSecond'], results['requestsPerSecond']
+    if old_rps and (old_rps - new_rps) / old_rps > max_throughput_drop:
+        failures.append(f"throughput {new_rps} req/s is more than {max_throughput_drop:.0%} "
+                        f"below the baseline {old_rps} req/s")
+    for metric, label in (('latencyMs', 'latency'), ('ttfbMs', 'time to first byte')):
+        if metric not in baseline:
+            continue
+        for key in ('p50', 'p95', 'p99'):
+            old, new = baseline[metric][key], results[metric][key]
+            if old and (new - old) / old > max_latency_increase:
+                failures.append(f"{key} {label} {new} ms is more than {max_latency_increase:.0%} "
+                                f"above the baseline {old} ms")
+    if results['errors'] > baseline.get('errors', 0):
+        failures.append(f"{results['errors']} errors (baseline {baseline.get('errors', 0)})")
+    return failures
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--target', choices=['inprocess', 'gunicorn'], default='inprocess')
+    parser.add_argument('--url', help='benchmark a running server instead of starting one')
+    parser.add_argument('--endpoint', choices=['chat', 'stream'], default='chat',
+                        help='POST /chat or /chat/stream (Server-Sent Events)')
+    parser.add_argument('--workers', type=int, default=2, help='gunicorn workers')
+    parser.add_argument('--threads', type=int, default=1, help='gunicorn threads per worker')
+    parser.add_argument('--worker-class', choices=['sync', 'gthread'], default='gthread')
+    parser.add_argument('--no-preload', dest='preload', action='store_false',
+                        help='let every gunicorn worker import and warm the app itself')
+    parser.add_argument('--clients', type=int, default=8, help='concurrent clients')
+    parser.add_argument('--requests', type=int, default=2000, help='measured requests in total')
+    parser.add_argument('--warmup', type=int, default=20, help='unmeasured requests per client')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--conversation-share', type=float, default=0.3,
+                        help='chance that a client starts a multi-turn conversation')
+    parser.add_argument('--backend-latency', type=float, default=0.02,
+                        help='seconds the stand-in backend takes per call')
+    parser.add_argument('--output', help='write results as JSON to this file')
+    parser.add_argument('--baseline', help='fail if results regress against this results file')
+    parser.add_argument('--max-throughput-drop', type=float, default=0.15)
+    parser.add_argument('--max-latency-increase', type=float, default=0.25)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    endpoint = {'chat': '/chat', 'stream': '/chat/stream'}[args.endpoint]
+    with contextlib.ExitStack() as stack:
+        if args.url:
+            target = HTTPTarget(url=args.url, endpoint=endpoint)
+        else:
+            backend = stack.enter_context(StandInBackend(latency=args.backend_latency))
+            os.environ['BACKEND_URL'] = backend.url
+            os.environ.setdefault('LOG_LEVEL', 'WARNING')
+            if args.target == 'gunicorn':
+                target = HTTPTarget(workers=args.workers, threads=args.threads, worker_class=args.worker_class,
+                                    preload=args.preload, env=dict(os.environ), endpoint=endpoint)
+            else:
+                target = InProcessTarget(endpoint)
+        stack.callback(target.close)
+        results = run_load(target, args.clients, args.requests, args.warmup, args.seed,
+                           args.conversation_share)
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(results, output, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            failures = compare(results, json.load(baseline_file),
+                               args.max_throughput_drop, args.max_latency_increase)
+        if failures:
+            print('REGRESSION:\n  ' + '\n  '.join(failures), file=sys.stderr)
+            return 1
+        print('No regression against the baseline', file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
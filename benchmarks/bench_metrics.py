@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Benchmark: overhead of the /metrics instrumentation on the chat pipeline
+Runs the corpus through handle_chat_message with METRICS_ENABLED on and off
+(each in a fresh process), offline against a local stand-in backend.
+Run from the repository root: python benchmarks/bench_metrics.py
+"""
+
+import contextlib
+import io
+import os
+import subprocess
+import sys
+import time
+
+from corpus import CORPUS
+from standin_backend import StandInBackend
+
+ROUNDS = 20
+
+
+def run_pipeline():
+    """Per-message pipeline time in this process, in microseconds"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        import app
+        for i, message in enumerate(CORPUS):  # warm up caches and lazy loads
+            app.handle_chat_message(message, f'user-{i % 7}', 'bench')
+        start = time.perf_counter()
+        for _ in range(ROUNDS):
+            for i, message in enumerate(CORPUS):
+                app.handle_chat_message(message, f'user-{i % 7}', 'bench')
+        elapsed = time.perf_counter() - start
+    return elapsed / (ROUNDS * len(CORPUS)) * 1e6
+
+
+def micro():
+    """Cost of one histogram observation and of one timed() call"""
+    from metrics import Histogram, timed
+    series = Histogram('bench_seconds', 'benchmark', ['stage'], registry=None).labels('x')
+    n = 200000
+    start = time.perf_counter()
+    for _ in range(n):
+        series.observe(0.0001)
+    observe_us = (time.perf_counter() - start) / n * 1e6
+
+    def plain():
+        return None
+    wrapped = timed(series)(plain)
+    start = time.perf_counter()
+    for _ in range(n):
+        plain()
+    base = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(n):
+        wrapped()
+    timed_us = (time.perf_counter() - start - base) / n * 1e6
+    return observe_us, timed_us
+
+
+def measure(enabled, backend_url):
+    env = dict(os.environ, METRICS_ENABLED='true' if enabled else 'false', BACKEND_URL=backend_url,
+               REPLY_CACHE_MAX_ENTRIES='0', LOG_LEVEL='WARNING')
+    output = subprocess.run([sys.executable, __file__, '--child'], env=env, capture_output=True,
+                            text=True, check=True).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def main():
+    if '--child' in sys.argv:
+        print(run_pipeline())
+        return
+
+    observe_us, timed_us = micro()
+    print(f"histogram observe: {observe_us:.3f} us, timed() wrapper: {timed_us:.3f} us per call\n")
+    with StandInBackend() as backend:
+        off = min(measure(False, backend.url) for _ in range(3))
+        on = min(measure(True, backend.url) for _ in range(3))
+    print(f"chat pipeline, metrics off: {off:.1f} us/message")
+    print(f"chat pipeline, metrics on:  {on:.1f} us/message ({(on - off) / off * 100:+.1f}%)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: grid-indexed top-k technician ranking vs scoring and sorting every technician
+Run from the repository root: python benchmarks/bench_ranking.py
+"""
+
+import math
+import random
+import timeit
+
+import corpus  # noqa: F401  (puts the app modules on sys.path)
+from standin_backend import make_technicians
+
+from technician_ranking import EARTH_RADIUS_KM, TechnicianIndex, rating_factor, technician_point
+
+# One city's worth of technicians, and the users asking around it
+CITY_SIZES = (40, 1000, 5000, 20000)
+QUERIES = 200
+K = 5
+
+
+def make_queries(count, seed=11):
+    rng = random.Random(seed)
+    return [(6.93 + rng.uniform(-0.3, 0.3), 79.85 + rng.uniform(-0.3, 0.3)) for _ in range(count)]
+
+
+def full_sort(technicians, lat, lng, k=K, weight=1.0):
+    """Score every technician and sort them all (the obvious implementation)"""
+    scored = []
+    for position, technician in enumerate(technicians):
+        point = technician_point(technician)
+        if point is None:
+            continue
+        lat2, lng2 = math.radians(point[0]), math.radians(point[1])
+        a = (math.sin((lat2 - math.radians(lat)) / 2) ** 2
+             + math.cos(math.radians(lat)) * math.cos(lat2) * math.sin((lng2 - math.radians(lng)) / 2) ** 2)
+        distance = 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(min(a, 1.0)))
+        scored.append((distance * rating_factor(technician.get('rating'), weight), distance, position))
+    return sorted(scored)[:k]
+
+
+def check_equivalence(technicians, queries, index):
+    """The index must return the same technicians, in the same order, as the full sort"""
+    mismatches = 0
+    for lat, lng in queries:
+        expected = [position for _, _, position in full_sort(technicians, lat, lng)]
+        if [position for _, _, position in index.nearest(lat, lng, K)] != expected:
+            mismatches += 1
+    return mismatches
+
+
+def per_query_us(func, queries, rounds=3):
+    best = min(timeit.repeat(lambda: [func(lat, lng) for lat, lng in queries], repeat=rounds, number=1))
+    return best / len(queries) * 1e6
+
+
+def main():
+    queries = make_queries(QUERIES)
+    # Users far outside the city still get the nearest technicians, as do
+    # users abroad or with swapped coordinates
+    queries += [(7.29, 80.63), (9.66, 80.02), (0.0, 0.0), (79.86, 6.9), (51.5, -0.12)]
+    print(f"Technician ranking benchmark (top {K}, {len(queries)} queries per city size)\n")
+    print(f"{'technicians':>12} {'full sort':>12} {'grid+numpy':>12} {'grid':>12} {'build':>10}  mismatches")
+    total_mismatches = 0
+    for size in CITY_SIZES:
+        technicians = make_technicians(size, seed=size)
+        vectorized = TechnicianIndex(technicians, use_numpy=True)
+        pure = TechnicianIndex(technicians, use_numpy=False)
+        mismatches = check_equivalence(technicians, queries, vectorized) + check_equivalence(technicians, queries, pure)
+        total_mismatches += mismatches
+
+        sort_us = per_query_us(lambda lat, lng: full_sort(technicians, lat, lng), queries[:50])
+        numpy_us = per_query_us(lambda lat, lng: vectorized.nearest(lat, lng, K), queries)
+        pure_us = per_query_us(lambda lat, lng: pure.nearest(lat, lng, K), queries)
+        build_ms = min(timeit.repeat(lambda: TechnicianIndex(technicians), repeat=3, number=1)) * 1000
+        print(f"{size:>12} {sort_us:>9.1f} us {numpy_us:>9.1f} us {pure_us:>9.1f} us {build_ms:>7.2f} ms  {mismatches}")
+
+    print(f"\n{'OK' if not total_mismatches else 'FAILED'}: {total_mismatches} mismatched rankings")
+    return 1 if total_mismatches else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
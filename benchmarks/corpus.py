@@ -0,0 +1,96 @@
+"""
+Shared message corpus for the QuickFix chatbot benchmarks
+Mixed English, Sinhala and Tamil messages in rough production proportions
+"""
+
+import os
+import sys
+
+# Benchmarks live one level below the app modules
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+ENGLISH_MESSAGES = [
+    "Hello",
+    "hi",
+    "Good morning, I need some help",
+    "I need a plumber",
+    "How much does it cost?",
+    "how much",
+    "Emergency! Water leak in the kitchen!",
+    "My pipe burst and the bathroom is flooding",
+    "How can I pay?",
+    "Can I pay by card or bank transfer?",
+    "I want to book electrical service",
+    "show me available plumbers",
+    "who are the electricians in my area",
+    "Where is my technician? What is the ETA?",
+    "I want to cancel my booking",
+    "I don't want the service anymore",
+    "The technician was bad, I am not satisfied",
+    "I want to rate my technician 5 stars",
+    "thanks a lot!",
+    "What are the working hours?",
+    "when can you come",
+    "my fridge is not cooling",
+    "the AC makes strange noises",
+    "I am locked out of my house, lost my key",
+    "need someone to paint my living room wall",
+    "the door of my cabinet is broken",
+    "are your carpenters qualified and certified?",
+    "any tips to prevent clogged drains?",
+    "payment status 64b7f0c2a1d3e4f5a6b7c8d9",
+    "please contact me",
+    "my monkey ate the remote",
+]
+
+SINHALA_MESSAGES = [
+    "හායි",
+    "ආයුබෝවන්, මට උදව් අවශ්‍යයි",
+    "මට ජල නළ කාර්මිකයෙක් ඕනේ දැන්ම",
+    "ගාස්තුව කීයද?",
+    "ගෙවීම කරන්නේ කොහොමද?",
+    "මගේ වෙන්කිරීම අවලංගු කරන්න",
+    "ස්තූතියි",
+    "මගේ කාර්මිකයා ස්ථානය කොහෙද",
+]
+
+TAMIL_MESSAGES = [
+    "வணக்கம்",
+    "எனக்கு உடனடி உதவி தேவை",
+    "விலை என்ன?",
+    "செலுத்துதல் எப்படி?",
+    "என் பதிவு நிலை என்ன?",
+    "பதிவு ரத்து செய்ய வேண்டும்",
+    "நன்றி",
+    "ஒரு பிரச்சினை உள்ளது",
+]
+
+# Code-mixed messages seen from the mobile app
+MIXED_MESSAGES = [
+    "hi, මට plumber කෙනෙක් ඕනේ",
+    "வணக்கம், I need an electrician urgently",
+    "AC repair ගාස්තුව how much?",
+]
+
+CORPUS = ENGLISH_MESSAGES + SINHALA_MESSAGES + TAMIL_MESSAGES + MIXED_MESSAGES
+
+# Share of single-message traffic per language
+WEIGHTED_MESSAGES = [
+    (ENGLISH_MESSAGES, 0.70),
+    (SINHALA_MESSAGES, 0.15),
+    (TAMIL_MESSAGES, 0.10),
+    (MIXED_MESSAGES, 0.05),
+]
+
+# Multi-turn conversations, replayed in order by one user
+CONVERSATIONS = [
+    ["hi", "I need a plumber", "how much", "show me available plumbers", "I want to book plumbing service", "thanks"],
+    ["Emergency! Water leak in the kitchen!", "I want to book plumbing service", "Where is my technician? What is the ETA?"],
+    ["my fridge is not cooling", "what can I do?", "are your technicians certified?", "book appliance repair"],
+    ["How can I pay?", "payment status 64b7f0c2a1d3e4f5a6b7c8d9", "thanks a lot!"],
+    ["හායි", "මට ජල නළ කාර්මිකයෙක් ඕනේ දැන්ම", "ගාස්තුව කීයද?", "ස්තූතියි"],
+    ["வணக்கம்", "எனக்கு உடனடி உதவி தேவை", "விலை என்ன?", "நன்றி"],
+    ["I want to cancel my booking", "The technician was bad, I am not satisfied", "I want to rate my technician 5 stars"],
+]
@@ -0,0 +1,79 @@
+"""
+Local stand-in for the QuickFix backend API, for offline benchmarks
+Serves /api/technicians/available and /api/bookings/<id> with a configurable delay
+"""
+
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+SERVICES = ['plumbing', 'electrical', 'carpentry', 'painting',
+            'cleaning', 'appliance_repair', 'hvac', 'locksmith']
+
+
+def make_technicians(count=40, seed=7):
+    """Technicians scattered around Colombo, in backend (GeoJSON) format"""
+    rng = random.Random(seed)
+    return [{
+        'user': {'name': f'Technician {i}', 'phone': f'07{rng.randint(10000000, 99999999)}'},
+        'location': {'type': 'Point',
+                     'coordinates': [79.85 + rng.uniform(-0.3, 0.3), 6.93 + rng.uniform(-0.3, 0.3)]},
+        'rating': round(rng.uniform(3.0, 5.0), 1),
+        'skills': rng.sample(SERVICES, 3)
+    } for i in range(count)]
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        time.sleep(self.server.latency)
+        path = urlparse(self.path).path
+        if path == '/api/technicians/available':
+            body = self.server.technicians
+        elif path.startswith('/api/bookings/'):
+            body = {'_id': path.rsplit('/', 1)[-1], 'payment': {'status': 'completed', 'method': 'card'}}
+        else:
+            self.send_error(404)
+            return
+        payload = json.dumps(body).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StandInBackend:
+    """Run the stand-in backend on a background thread: ``with StandInBackend(0.05) as url:``"""
+
+    def __init__(self, latency=0.0, technicians=None, port=0):
+        self.server = ThreadingHTTPServer(('127.0.0.1', port), StandInHandler)
+        self.server.daemon_threads = True
+        self.server.request_queue_size = 1024
+        self.server.latency = latency
+        self.server.technicians = technicians if technicians is not None else make_technicians()
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self.server.server_address
+        return f'http://{host}:{port}'
+
+    def set_latency(self, latency):
+        self.server.latency = latency
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
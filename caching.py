@@ -0,0 +1,295 @@
+"""
+In-process caches for the QuickFix chatbot
+"""
+
+import asyncio
+import logging
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+class _Flight:
+    """A load in progress that other callers (threads or coroutines) can wait on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.async_waiters = []  # (loop, future) pairs
+
+    def add_async_waiter(self, lock):
+        """Return a future resolved with the value when the load lands"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        with lock:
+            if self.done.is_set():
+                future.set_result(self.value)
+            else:
+                self.async_waiters.append((loop, future))
+        return future
+
+
+def _resolve(future, value):
+    if not future.done():
+        future.set_result(value)
+
+
+class SingleFlightCache:
+    """Bounded TTL cache with single-flight loads and stale-while-revalidate.
+
+    A value younger than ``ttl`` is served as is. Until it is ``ttl +
+    stale_ttl`` old it is still served, while one background refresh reloads
+    it. Concurrent misses for the same key share a single ``loader()`` call.
+    ``None`` means the load failed: it is never cached, and a failed refresh
+    keeps the stale value. ``get`` takes a blocking loader, ``get_async`` a
+    coroutine function; both share the same entries and in-flight loads.
+    """
+
+    def __init__(self, ttl=30, stale_ttl=300, max_entries=256, clock=time.monotonic):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self._clock = clock
+        self._entries = OrderedDict()  # key -> (value, loaded_at)
+        self._flights = {}  # key -> _Flight
+        self._tasks = set()  # background refresh tasks (kept referenced until done)
+        self._lock = threading.Lock()
+        self._stats = {
+            'hits': 0,
+            'staleHits': 0,
+            'misses': 0,
+            'coalesced': 0,
+            'refreshes': 0,
+            'refreshFailures': 0,
+            'loadFailures': 0,
+            'evictions': 0
+        }
+
+    def _lookup(self, key):
+        """Decide how to serve ``key``: ('hit'|'stale', value, refresh flight) or ('wait'|'lead', flight)"""
+        with self._lock:
+            now = self._clock()
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, loaded_at = entry
+                age = now - loaded_at
+                if age < self.ttl:
+                    self._stats['hits'] += 1
+                    self._entries.move_to_end(key)
+                    return 'hit', value, None
+                if age < self.ttl + self.stale_ttl:
+                    self._stats['staleHits'] += 1
+                    self._entries.move_to_end(key)
+                    refresh = None
+                    if key not in self._flights:
+                        refresh = self._flights[key] = _Flight()
+                        self._stats['refreshes'] += 1
+                    return 'stale', value, refresh
+
+            flight = self._flights.get(key)
+            if flight is not None:
+                self._stats['coalesced'] += 1
+                return 'wait', flight, None
+            self._stats['misses'] += 1
+            flight = self._flights[key] = _Flight()
+            return 'lead', flight, None
+
+    def get(self, key, loader, timeout=None):
+        """Return the cached value for ``key``, loading it with ``loader()`` if needed.
+
+        A caller that joins someone else's load waits at most ``timeout``
+        seconds and gets None if it is not done by then.
+        """
+        state, result, refresh = self._lookup(key)
+        if state == 'hit':
+            return result
+        if state == 'stale':
+            if refresh is not None:
+                threading.Thread(target=self._refresh, args=(key, refresh, loader),
+                                 name='cache-refresh', daemon=True).start()
+            return result
+        if state == 'wait':
+            if not result.done.wait(timeout):
+                return None
+            return result.value
+
+        value = None
+        try:
+            value = loader()
+        finally:
+            self._land(key, result, value, failure_stat='loadFailures')
+        return value
+
+    async def get_async(self, key, loader, timeout=None):
+        """Like ``get``, with ``loader`` a coroutine function; never blocks the event loop"""
+        state, result, refresh = self._lookup(key)
+        if state == 'hit':
+            return result
+        if state == 'stale':
+            if refresh is not None:
+                task = asyncio.get_running_loop().create_task(self._refresh_async(key, refresh, loader))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+            return result
+        if state == 'wait':
+            future = result.add_async_waiter(self._lock)
+            try:
+                return await asyncio.wait_for(asyncio.shield(future), timeout)
+            except asyncio.TimeoutError:
+                return None
+
+        value = None
+        try:
+            value = await loader()
+        finally:
+            self._land(key, result, value, failure_stat='loadFailures')
+        return value
+
+    def _refresh(self, key, flight, loader):
+        """Background reload of a stale entry"""
+        value = None
+        try:
+            value = loader()
+        except Exception as e:
+            logger.warning('cache_refresh_failed', extra={'key': repr(key), 'error': str(e)})
+        finally:
+            self._land(key, flight, value, failure_stat='refreshFailures')
+
+    async def _refresh_async(self, key, flight, loader):
+        """Background reload of a stale entry on the event loop"""
+        value = None
+        try:
+            value = await loader()
+        except Exception as e:
+            logger.warning('cache_refresh_failed', extra={'key': repr(key), 'error': str(e)})
+        finally:
+            self._land(key, flight, value, failure_stat='refreshFailures')
+
+    def _land(self, key, flight, value, failure_stat):
+        """Store a load result and release everyone waiting on it"""
+        with self._lock:
+            if value is None:
+                self._stats[failure_stat] += 1
+            else:
+                self._entries[key] = (value, self._clock())
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self._stats['evictions'] += 1
+            self._flights.pop(key, None)
+            flight.value = value
+            flight.done.set()
+            waiters, flight.async_waiters = flight.async_waiters, []
+        for loop, future in waiters:
+            loop.call_soon_threadsafe(_resolve, future, value)
+
+    def invalidate(self, key=None):
+        """Drop one key, or everything"""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def stats(self):
+        """Return size and hit/miss/refresh counters"""
+        with self._lock:
+            lookups = self._stats['hits'] + self._stats['staleHits'] + self._stats['misses'] + self._stats['coalesced']
+            return dict(
+                self._stats,
+                size=len(self._entries),
+                maxEntries=self.max_entries,
+                ttlSeconds=self.ttl,
+                staleTtlSeconds=self.stale_ttl,
+                inFlight=len(self._flights),
+                hitRate=round((self._stats['hits'] + self._stats['staleHits']) / lookups, 4) if lookups else 0.0
+            )
+
+
+def _approx_size(value):
+    """Rough memory footprint of a cache key or value in bytes"""
+    size = sys.getsizeof(value)
+    if isinstance(value, tuple):
+        size += sum(_approx_size(item) for item in value)
+    return size
+
+
+class LRUCache:
+    """Bounded LRU cache with per-entry expiry and approximate memory accounting.
+
+    Entries live ``ttl`` seconds unless ``set`` is given a shorter one, and
+    the least recently used entry is dropped once ``max_entries`` is reached.
+    ``max_entries=0`` disables the cache.
+    """
+
+    def __init__(self, max_entries=2048, ttl=3600, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._clock = clock
+        self._entries = OrderedDict()  # key -> (value, expires_at, size)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'expired': 0, 'evictions': 0, 'flushes': 0}
+
+    def get(self, key):
+        """Return the cached value, or None on a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats['misses'] += 1
+                return None
+            value, expires_at, size = entry
+            if self._clock() >= expires_at:
+                del self._entries[key]
+                self._bytes -= size
+                self._stats['expired'] += 1
+                self._stats['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats['hits'] += 1
+            return value
+
+    def set(self, key, value, ttl=None):
+        """Cache ``value`` for ``ttl`` seconds (the cache's ttl by default)"""
+        if self.max_entries <= 0:
+            return
+        size = _approx_size(key) + _approx_size(value)
+        expires_at = self._clock() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[2]
+            self._entries[key] = (value, expires_at, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries:
+                _, (_, _, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self._stats['evictions'] += 1
+
+    def clear(self):
+        """Drop every entry; returns how many there were"""
+        with self._lock:
+            count = len(self._entries)
+            self._entries.clear()
+            self._bytes = 0
+            self._stats['flushes'] += 1
+            return count
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        """Return size, approximate memory use and hit/miss counters"""
+        with self._lock:
+            lookups = self._stats['hits'] + self._stats['misses']
+            return dict(
+                self._stats,
+                size=len(self._entries),
+                maxEntries=self.max_entries,
+                ttlSeconds=self.ttl,
+                approxBytes=self._bytes,
+                hitRate=round(self._stats['hits'] / lookups, 4) if lookups else 0.0
+            )
@@ -0,0 +1,104 @@
+"""
+Circuit breaker for QuickFix backend calls
+"""
+
+import threading
+import time
+from collections import deque
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitBreaker:
+    """Failure-rate circuit breaker over a rolling window of calls.
+
+    While closed, calls go through and outcomes are recorded. Once at least
+    ``min_calls`` of the last ``window`` calls are recorded and the failure
+    rate reaches ``failure_rate``, the breaker opens and rejects calls for
+    ``open_seconds``. It then lets ``half_open_calls`` trial calls through:
+    a success closes it again, a failure re-opens it.
+    """
+
+    def __init__(self, name, failure_rate=0.5, min_calls=5, window=20, open_seconds=30,
+                 half_open_calls=1, clock=time.monotonic):
+        self.name = name
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.open_seconds = open_seconds
+        self.half_open_calls = half_open_calls
+        self._clock = clock
+        self._outcomes = deque(maxlen=window)  # True for failure
+        self._state = CLOSED
+        self._opened_at = None
+        self._trials = 0
+        self._lock = threading.Lock()
+        self._stats = {'trips': 0, 'rejected': 0, 'successes': 0, 'failures': 0}
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self):
+        if self._state == OPEN and self._clock() - self._opened_at >= self.open_seconds:
+            self._state = HALF_OPEN
+            self._trials = 0
+        return self._state
+
+    def _open(self):
+        self._state = OPEN
+        self._opened_at = self._clock()
+        self._stats['trips'] += 1
+
+    def allow(self):
+        """Return True if a call may go through now"""
+        with self._lock:
+            state = self._current_state()
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN and self._trials < self.half_open_calls:
+                self._trials += 1
+                return True
+            self._stats['rejected'] += 1
+            return False
+
+    def release(self):
+        """Give back a permission from ``allow()`` for a call that was never made"""
+        with self._lock:
+            if self._state == HALF_OPEN and self._trials > 0:
+                self._trials -= 1
+
+    def record_success(self):
+        with self._lock:
+            self._stats['successes'] += 1
+            if self._current_state() == HALF_OPEN:
+                self._state = CLOSED
+                self._outcomes.clear()
+            self._outcomes.append(False)
+
+    def record_failure(self):
+        with self._lock:
+            self._stats['failures'] += 1
+            state = self._current_state()
+            if state == HALF_OPEN:
+                self._open()
+                return
+            self._outcomes.append(True)
+            if state == CLOSED and len(self._outcomes) >= self.min_calls:
+                if sum(self._outcomes) / len(self._outcomes) >= self.failure_rate:
+                    self._open()
+
+    def stats(self):
+        """Return state, trip count and call outcomes"""
+        with self._lock:
+            state = self._current_state()
+            recent = len(self._outcomes)
+            return dict(
+                self._stats,
+                state=state,
+                recentFailureRate=round(sum(self._outcomes) / recent, 4) if recent else 0.0,
+                openForSeconds=round(max(self.open_seconds - (self._clock() - self._opened_at), 0), 3)
+                if state == OPEN else 0
+            )
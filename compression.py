@@ -0,0 +1,92 @@
+"""
+Response compression for the QuickFix chatbot
+gzip or brotli, whichever the client's Accept-Encoding prefers, for bodies
+big enough to be worth it
+"""
+
+import gzip
+import threading
+
+from werkzeug.http import parse_accept_header
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+COMPRESSIBLE_TYPES = frozenset(['application/json', 'text/plain', 'text/html'])
+
+
+class ResponseCompressor:
+    """Compress response bodies for clients that accept it.
+
+    Bodies under ``min_bytes`` are sent as they are, as the headers and CPU
+    would cost more than the bytes saved. So are streamed responses (SSE
+    events must reach the client one by one) and anything already encoded.
+    Brotli is preferred on equal quality when the brotli package is installed.
+    """
+
+    def __init__(self, min_bytes=512, gzip_level=6, brotli_quality=4):
+        self.min_bytes = min_bytes
+        self.levels = {'gzip': gzip_level, 'br': brotli_quality}
+        self.encodings = ('br', 'gzip') if BROTLI_AVAILABLE else ('gzip',)
+        self._lock = threading.Lock()
+        self.compressed = {encoding: 0 for encoding in self.encodings}
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def negotiate(self, accept_encoding):
+        """The encoding to use for an Accept-Encoding header value, or None"""
+        if not accept_encoding:
+            return None
+        return parse_accept_header(accept_encoding).best_match(self.encodings)
+
+    def compress(self, body, encoding, level=None):
+        level = self.levels[encoding] if level is None else level
+        if encoding == 'br':
+            return brotli.compress(body, quality=level)
+        return gzip.compress(body, compresslevel=level, mtime=0)
+
+    def encode(self, body, accept_encoding):
+        """(body, encoding) for a client; encoding is None when the body is sent as is"""
+        if len(body) < self.min_bytes:
+            return body, None
+        encoding = self.negotiate(accept_encoding)
+        if encoding is None:
+            return body, None
+        compressed = self.compress(body, encoding)
+        if len(compressed) >= len(body):
+            return body, None
+        with self._lock:
+            self.compressed[encoding] += 1
+            self.bytes_in += len(body)
+            self.bytes_out += len(compressed)
+        return compressed, encoding
+
+    def process(self, request, response):
+        """Compress a Flask response in place if the client and the body allow it"""
+        if (response.direct_passthrough or response.is_streamed
+                or response.status_code < 200 or response.status_code in (204, 304)
+                or 'Content-Encoding' in response.headers
+                or response.mimetype not in COMPRESSIBLE_TYPES):
+            return response
+        body = response.get_data()
+        if len(body) < self.min_bytes:
+            return response
+        response.vary.add('Accept-Encoding')
+        body, encoding = self.encode(body, request.headers.get('Accept-Encoding'))
+        if encoding is not None:
+            response.set_data(body)
+            response.headers['Content-Encoding'] = encoding
+        return response
+
+    def stats(self):
+        with self._lock:
+            return {
+                'encodings': list(self.encodings),
+                'minBytes': self.min_bytes,
+                'compressed': dict(self.compressed),
+                'bytesIn': self.bytes_in,
+                'bytesOut': self.bytes_out
+            }
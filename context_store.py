@@ -0,0 +1,583 @@
+"""
+Conversation context storage for the QuickFix chatbot
+Pluggable stores: bounded in-process memory, or SQLite shared by every worker
+"""
+
+import atexit
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter, OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+def _histogram_key(context):
+    """(intent, service) a context counts towards in the distributions"""
+    return context.get('last_intent') or 'unknown', context.get('last_service') or None
+
+
+class _Histogram:
+    """Intent and service counts over a set of contexts, kept up to date entry by entry"""
+
+    def __init__(self):
+        self._counted = {}  # user_id -> (intent, service) it is counted under
+        self.intents = Counter()
+        self.services = Counter()
+
+    def _discount(self, key):
+        intent, service = key
+        self.intents[intent] -= 1
+        if not self.intents[intent]:
+            del self.intents[intent]
+        if service:
+            self.services[service] -= 1
+            if not self.services[service]:
+                del self.services[service]
+
+    def update(self, user_id, context):
+        key = _histogram_key(context)
+        previous = self._counted.get(user_id)
+        if previous == key:
+            return
+        if previous is not None:
+            self._discount(previous)
+        self._counted[user_id] = key
+        self.intents[key[0]] += 1
+        if key[1]:
+            self.services[key[1]] += 1
+
+    def remove(self, user_id):
+        previous = self._counted.pop(user_id, None)
+        if previous is not None:
+            self._discount(previous)
+
+
+class ContextStore:
+    """Interface every conversation context store implements.
+
+    ``get`` never creates entries; ``get_or_create`` is the only path that
+    does. Contexts are plain JSON-serializable dicts, and a store only sees
+    changes made to one after it is passed back through ``set``.
+    """
+
+    backend = None
+
+    def get(self, user_id):
+        """Return the context for ``user_id``, or None"""
+        raise NotImplementedError
+
+    def set(self, user_id, context):
+        """Store a context and mark it as most recently used"""
+        raise NotImplementedError
+
+    def delete(self, user_id):
+        """Remove a context; returns True if one was stored"""
+        raise NotImplementedError
+
+    def values(self):
+        """Snapshot of every live context"""
+        raise NotImplementedError
+
+    def stats(self):
+        """Return size, limits and counters"""
+        raise NotImplementedError
+
+    def distribution(self):
+        """Live context count and how many were last about each intent and service"""
+        raise NotImplementedError
+
+    def __len__(self):
+        raise NotImplementedError
+
+    def __contains__(self, user_id):
+        return self.get(user_id) is not None
+
+    def get_or_create(self, user_id, factory):
+        """Return the context for ``user_id``, creating it with ``factory()`` if needed"""
+        context = self.get(user_id)
+        if context is None:
+            context = factory()
+            self._stats['creates'] += 1
+            self.set(user_id, context)
+        return context
+
+    def flush(self):
+        """Write out anything buffered (no-op for unbuffered stores)"""
+
+
+class MemoryContextStore(ContextStore):
+    """In-process store of per-user conversation contexts.
+
+    Entries are kept in least-recently-used order. An entry idle for longer
+    than ``idle_ttl`` seconds expires, and once ``max_entries`` is reached the
+    least recently used entry is evicted. Reads through ``get`` never create
+    entries; ``get_or_create`` is the only path that does.
+    """
+
+    backend = 'memory'
+
+    def __init__(self, max_entries=10000, idle_ttl=3600, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.idle_ttl = idle_ttl
+        self._clock = clock
+        self._entries = OrderedDict()  # user_id -> (context, last_access)
+        self._histogram = _Histogram()
+        self._lock = threading.RLock()
+        self._stats = {
+            'hits': 0,
+            'misses': 0,
+            'creates': 0,
+            'evictions': 0,
+            'expirations': 0,
+            'deletes': 0
+        }
+
+    def _expired(self, last_access, now):
+        return self.idle_ttl is not None and now - last_access > self.idle_ttl
+
+    def _prune(self, now):
+        """Drop expired entries and enforce the size bound (oldest first)"""
+        entries = self._entries
+        while entries:
+            user_id, (_, last_access) = next(iter(entries.items()))
+            if self._expired(last_access, now):
+                self._stats['expirations'] += 1
+            elif len(entries) > self.max_entries:
+                self._stats['evictions'] += 1
+            else:
+                break
+            entries.popitem(last=False)
+            self._histogram.remove(user_id)
+
+    def get(self, user_id):
+        """Return the context for ``user_id``, or None - never creates an entry"""
+        with self._lock:
+            now = self._clock()
+            entry = self._entries.get(user_id)
+            if entry is None:
+                self._stats['misses'] += 1
+                return None
+            if self._expired(entry[1], now):
+                del self._entries[user_id]
+                self._histogram.remove(user_id)
+                self._stats['expirations'] += 1
+                self._stats['misses'] += 1
+                return None
+            self._stats['hits'] += 1
+            self._entries[user_id] = (entry[0], now)
+            self._entries.move_to_end(user_id)
+            return entry[0]
+
+    def get_or_create(self, user_id, factory):
+        with self._lock:
+            return super().get_or_create(user_id, factory)
+
+    def set(self, user_id, context):
+        """Store a context and mark it as most recently used"""
+        with self._lock:
+            now = self._clock()
+            self._entries[user_id] = (context, now)
+            self._entries.move_to_end(user_id)
+            self._histogram.update(user_id, context)
+            self._prune(now)
+
+    def delete(self, user_id):
+        """Remove a context; returns True if one was stored"""
+        with self._lock:
+            if self._entries.pop(user_id, None) is None:
+                return False
+            self._histogram.remove(user_id)
+            self._stats['deletes'] += 1
+            return True
+
+    def values(self):
+        """Snapshot of every live context"""
+        with self._lock:
+            self._prune(self._clock())
+            return [context for context, _ in self._entries.values()]
+
+    def distribution(self):
+        """Live context count and per-intent/per-service counts, without a scan"""
+        with self._lock:
+            self._prune(self._clock())
+            return {
+                'total': len(self._entries),
+                'intents': dict(self._histogram.intents),
+                'services': dict(self._histogram.services)
+            }
+
+    def __contains__(self, user_id):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            return entry is not None and not self._expired(entry[1], self._clock())
+
+    def __len__(self):
+        with self._lock:
+            self._prune(self._clock())
+            return len(self._entries)
+
+    def stats(self):
+        """Return size, limits and hit/miss/eviction counters"""
+        with self._lock:
+            lookups = self._stats['hits'] + self._stats['misses']
+            return dict(
+                self._stats,
+                backend=self.backend,
+                size=len(self._entries),
+                maxEntries=self.max_entries,
+                idleTtlSeconds=self.idle_ttl,
+                hitRate=round(self._stats['hits'] / lookups, 4) if lookups else 0.0
+            )
+
+
+class SQLiteContextStore(ContextStore):
+    """Conversation contexts in a SQLite database shared by every worker.
+
+    The database runs in WAL mode so workers read while another writes.
+    Writes are buffered and flushed as one transaction every
+    ``flush_interval`` seconds (or once ``batch_size`` are pending), and
+    reads go through a small per-worker cache that trusts an entry for
+    ``cache_ttl`` seconds. With ``flush_interval`` 0 every write is
+    committed before ``set`` returns, and with ``cache_ttl`` 0 every read
+    goes to the database, so a user's next message sees the last context
+    whichever worker serves it. Triggers keep per-intent and per-service
+    counts in ``context_counts`` as rows are written and removed, so
+    distributions are read without a scan. The same counts give the row
+    total, so a flush only evicts (oldest ``last_access`` first) once the
+    table is over ``max_entries``. Idle contexts are deleted at most every
+    ``expire_interval`` seconds; until then reads already treat them as gone.
+    """
+
+    backend = 'sqlite'
+
+    def __init__(self, path, max_entries=10000, idle_ttl=3600, cache_size=1024,
+                 cache_ttl=1.0, flush_interval=0.05, batch_size=64, expire_interval=60):
+        self.path = path
+        self.max_entries = max_entries
+        self.idle_ttl = idle_ttl
+        self.cache_size = cache_size
+        self.cache_ttl = cache_ttl
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.expire_interval = expire_interval
+
+        self._cache = OrderedDict()  # user_id -> (context, cached_at)
+        self._pending = {}  # user_id -> (serialized context or None for a touch, last_access)
+        self._lock = threading.RLock()
+        self._local = threading.local()
+        self._flusher_pid = None
+        self._wakeup = threading.Event()
+        self._expired_at = float('-inf')  # when this process last deleted idle contexts
+        self._stats = {
+            'hits': 0,
+            'misses': 0,
+            'creates': 0,
+            'evictions': 0,
+            'expirations': 0,
+            'deletes': 0,
+            'cacheHits': 0,
+            'dbReads': 0,
+            'writes': 0,
+            'flushes': 0,
+            'flushedRows': 0
+        }
+
+        self._create_schema()
+
+    def _create_schema(self):
+        connection = self._connection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS contexts ('
+                'user_id TEXT PRIMARY KEY, data TEXT NOT NULL, last_access REAL NOT NULL)'
+            )
+            connection.execute(
+                'CREATE INDEX IF NOT EXISTS contexts_last_access ON contexts (last_access)'
+            )
+            counted = connection.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'context_counts'"
+            ).fetchone()
+            if not counted:
+                for statement in _COUNT_SCHEMA:
+                    connection.execute(statement)
+                # Count what an older database already holds
+                connection.execute(
+                    f"INSERT INTO context_counts SELECT 'intent', {_INTENT_OF.format(row='contexts')}, COUNT(*) "
+                    "FROM contexts WHERE true GROUP BY 2"
+                )
+                connection.execute(
+                    f"INSERT INTO context_counts SELECT 'service', {_SERVICE_OF.format(row='contexts')}, COUNT(*) "
+                    f"FROM contexts WHERE {_SERVICE_OF.format(row='contexts')} IS NOT NULL GROUP BY 2"
+                )
+            connection.execute('COMMIT')
+        except Exception:
+            connection.execute('ROLLBACK')
+            raise
+
+    def _connection(self):
+        """One connection per thread per process (connections must not cross a fork)"""
+        local = self._local
+        if getattr(local, 'pid', None) != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            local.connection = connection
+            local.pid = os.getpid()
+        return local.connection
+
+    def _ensure_flusher(self):
+        """Start the background flush thread in this process if needed (none when writing through)"""
+        if self._flusher_pid == os.getpid():
+            return
+        self._flusher_pid = os.getpid()
+        if self.flush_interval > 0:
+            thread = threading.Thread(target=self._flush_loop, name='context-flusher', daemon=True)
+            thread.start()
+        atexit.register(self._flush_at_exit)
+
+    def _flush_loop(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except sqlite3.Error as e:
+                logger.error('context_flush_failed', extra={'error': str(e)})
+
+    def _flush_at_exit(self):
+        """Last flush when a worker exits, so buffered writes are not lost"""
+        if self._flusher_pid != os.getpid():
+            return
+        try:
+            self.flush()
+        except sqlite3.Error as e:
+            logger.error('context_flush_failed', extra={'error': str(e)})
+
+    def _cache_put(self, user_id, context, now):
+        cache = self._cache
+        cache[user_id] = (context, now)
+        cache.move_to_end(user_id)
+        while len(cache) > self.cache_size:
+            cache.popitem(last=False)
+
+    def get(self, user_id):
+        """Return the context for ``user_id``, or None - never creates an entry"""
+        now = time.time()
+        self._ensure_flusher()
+        with self._lock:
+            cached = self._cache.get(user_id)
+            if cached is not None and now - cached[1] <= self.cache_ttl:
+                self._stats['hits'] += 1
+                self._stats['cacheHits'] += 1
+                self._cache.move_to_end(user_id)
+                if user_id not in self._pending:
+                    self._pending[user_id] = (None, now)
+                return cached[0]
+
+            pending = self._pending.get(user_id)
+            if pending is not None and pending[0] is not None:
+                # Written here but not flushed yet - the local copy is newest
+                context = json.loads(pending[0])
+                self._stats['hits'] += 1
+                self._cache_put(user_id, context, now)
+                return context
+
+        self._stats['dbReads'] += 1
+        row = self._connection().execute(
+            'SELECT data, last_access FROM contexts WHERE user_id = ?', (user_id,)
+        ).fetchone()
+        with self._lock:
+            if row is None or (self.idle_ttl is not None and now - row[1] > self.idle_ttl):
+                self._stats['misses'] += 1
+                self._cache.pop(user_id, None)
+                return None
+            context = json.loads(row[0])
+            self._stats['hits'] += 1
+            self._cache_put(user_id, context, now)
+            self._pending.setdefault(user_id, (None, now))
+            return context
+
+    def set(self, user_id, context):
+        """Buffer a write; it reaches the shared database on the next flush"""
+        now = time.time()
+        data = json.dumps(context, ensure_ascii=False)
+        with self._lock:
+            self._cache_put(user_id, context, now)
+            self._pending[user_id] = (data, now)
+            self._stats['writes'] += 1
+            pending = len(self._pending)
+        self._ensure_flusher()
+        if self.flush_interval <= 0:
+            self.flush()
+        elif pending >= self.batch_size:
+            self._wakeup.set()
+
+    def flush(self):
+        """Write every buffered context and touch in one transaction"""
+        with self._lock:
+            if not self._pending:
+                return
+            pending, self._pending = self._pending, {}
+
+        writes = [(user_id, data, last_access)
+                  for user_id, (data, last_access) in pending.items() if data is not None]
+        touches = [(last_access, user_id)
+                   for user_id, (data, last_access) in pending.items() if data is None]
+        connection = self._connection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            connection.executemany(
+                'INSERT INTO contexts (user_id, data, last_access) VALUES (?, ?, ?) '
+                'ON CONFLICT(user_id) DO UPDATE SET data = excluded.data, last_access = excluded.last_access',
+                writes
+            )
+            connection.executemany(
+                'UPDATE contexts SET last_access = MAX(last_access, ?) WHERE user_id = ?', touches
+            )
+            expired = 0
+            now = time.time()
+            if self.idle_ttl is not None and now - self._expired_at >= self.expire_interval:
+                self._expired_at = now
+                expired = connection.execute(
+                    'DELETE FROM contexts WHERE last_access < ?', (now - self.idle_ttl,)
+                ).rowcount
+            evicted = 0
+            # The trigger-kept counts give the row total without a scan
+            excess = connection.execute(_ROW_COUNT).fetchone()[0] - self.max_entries
+            if excess > 0:
+                evicted = connection.execute(
+                    'DELETE FROM contexts WHERE user_id IN ('
+                    'SELECT user_id FROM contexts ORDER BY last_access LIMIT ?)', (excess,)
+                ).rowcount
+            connection.execute('COMMIT')
+        except Exception:
+            connection.execute('ROLLBACK')
+            with self._lock:
+                # Keep anything newer that arrived meanwhile, retry the rest next time
+                for user_id, entry in pending.items():
+                    self._pending.setdefault(user_id, entry)
+            raise
+
+        with self._lock:
+            self._stats['flushes'] += 1
+            self._stats['flushedRows'] += len(pending)
+            self._stats['expirations'] += expired
+            self._stats['evictions'] += evicted
+
+    def delete(self, user_id):
+        """Remove a context from the cache, the write buffer and the database"""
+        with self._lock:
+            self._cache.pop(user_id, None)
+            buffered = self._pending.pop(user_id, (None, None))[0] is not None
+        deleted = self._connection().execute(
+            'DELETE FROM contexts WHERE user_id = ?', (user_id,)
+        ).rowcount
+        if deleted or buffered:
+            self._stats['deletes'] += 1
+            return True
+        return False
+
+    def _expire(self):
+        """Delete contexts idle past ``idle_ttl`` now (flushes only do this every ``expire_interval``)"""
+        if self.idle_ttl is None:
+            return
+        self._expired_at = time.time()
+        expired = self._connection().execute(
+            'DELETE FROM contexts WHERE last_access < ?', (self._expired_at - self.idle_ttl,)
+        ).rowcount
+        if expired:
+            with self._lock:
+                self._stats['expirations'] += expired
+
+    def distribution(self):
+        """Live context count and per-intent/per-service counts across all workers"""
+        self.flush()
+        self._expire()
+        intents, services = {}, {}
+        for kind, name, count in self._connection().execute(
+                'SELECT kind, name, count FROM context_counts WHERE count > 0'):
+            (intents if kind == 'intent' else services)[name] = count
+        return {
+            'total': sum(intents.values()),
+            'intents': intents,
+            'services': services
+        }
+
+    def values(self):
+        """Snapshot of every live context across all workers"""
+        self.flush()
+        cutoff = time.time() - self.idle_ttl if self.idle_ttl is not None else float('-inf')
+        rows = self._connection().execute(
+            'SELECT data FROM contexts WHERE last_access >= ?', (cutoff,)
+        ).fetchall()
+        return [json.loads(data) for (data,) in rows]
+
+    def __len__(self):
+        self.flush()
+        cutoff = time.time() - self.idle_ttl if self.idle_ttl is not None else float('-inf')
+        return self._connection().execute(
+            'SELECT COUNT(*) FROM contexts WHERE last_access >= ?', (cutoff,)
+        ).fetchone()[0]
+
+    def stats(self):
+        """Return size, limits, cache and write-batching counters"""
+        with self._lock:
+            lookups = self._stats['hits'] + self._stats['misses']
+            stats = dict(
+                self._stats,
+                backend=self.backend,
+                maxEntries=self.max_entries,
+                idleTtlSeconds=self.idle_ttl,
+                cacheSize=len(self._cache),
+                pendingWrites=len(self._pending),
+                hitRate=round(self._stats['hits'] / lookups, 4) if lookups else 0.0
+            )
+        stats['size'] = len(self)
+        return stats
+
+
+# SQL for the (intent, service) a stored row counts towards, as in _histogram_key
+_INTENT_OF = "IFNULL(NULLIF(json_extract({row}.data, '$.last_intent'), ''), 'unknown')"
+_SERVICE_OF = "NULLIF(json_extract({row}.data, '$.last_service'), '')"
+
+
+# Every row counts towards exactly one intent, so the intent counts add up to the row total
+_ROW_COUNT = "SELECT IFNULL(SUM(count), 0) FROM context_counts WHERE kind = 'intent'"
+
+
+def _count_change(row, delta):
+    """Statements adding ``delta`` to the counts of ``row`` (NEW or OLD) inside a trigger"""
+    return (
+        f"INSERT INTO context_counts SELECT 'intent', {_INTENT_OF.format(row=row)}, {delta} WHERE true "
+        f"ON CONFLICT(kind, name) DO UPDATE SET count = count + ({delta}); "
+        f"INSERT INTO context_counts SELECT 'service', {_SERVICE_OF.format(row=row)}, {delta} "
+        f"WHERE {_SERVICE_OF.format(row=row)} IS NOT NULL "
+        f"ON CONFLICT(kind, name) DO UPDATE SET count = count + ({delta});"
+    )
+
+
+_COUNT_SCHEMA = [
+    'CREATE TABLE context_counts ('
+    'kind TEXT NOT NULL, name TEXT NOT NULL, count INTEGER NOT NULL, PRIMARY KEY (kind, name))',
+    f"CREATE TRIGGER contexts_counted_insert AFTER INSERT ON contexts BEGIN {_count_change('NEW', 1)} END",
+    'CREATE TRIGGER contexts_counted_update AFTER UPDATE OF data ON contexts BEGIN '
+    f"{_count_change('OLD', -1)} {_count_change('NEW', 1)} END",
+    f"CREATE TRIGGER contexts_counted_delete AFTER DELETE ON contexts BEGIN {_count_change('OLD', -1)} END"
+]
+
+
+def create_context_store(backend='memory', **options):
+    """Build the context store named by ``backend`` ('memory' or 'sqlite')"""
+    if backend == 'memory':
+        return MemoryContextStore(
+            max_entries=options.get('max_entries', 10000),
+            idle_ttl=options.get('idle_ttl', 3600)
+        )
+    if backend == 'sqlite':
+        return SQLiteContextStore(options.pop('path'), **options)
+    raise ValueError(f"Unknown context store backend: {backend}")
@@ -0,0 +1,32 @@
+"""
+Download the NLTK data the chatbot uses into a local directory
+Run once at build time; the app only reads this directory and never downloads.
+
+Usage: python download_nltk_data.py [target_dir]   (default: NLTK_DATA_DIR or ./nltk_data)
+"""
+
+import os
+import sys
+
+import nltk
+
+# punkt_tab is what word_tokenize reads on NLTK 3.8.2 and later
+PACKAGES = ['punkt', 'punkt_tab', 'stopwords', 'wordnet', 'omw-1.4']
+OPTIONAL_PACKAGES = {'punkt_tab'}  # Not on the index for older NLTK releases
+
+
+def main(target_dir):
+    os.makedirs(target_dir, exist_ok=True)
+    failed = [package for package in PACKAGES
+              if not nltk.download(package, download_dir=target_dir, quiet=True)
+              and package not in OPTIONAL_PACKAGES]
+    if failed:
+        print(f"Failed to download: {', '.join(failed)}", file=sys.stderr)
+        return 1
+    print(f"NLTK data ready in {target_dir}")
+    return 0
+
+
+if __name__ == '__main__':
+    default_dir = os.environ.get('NLTK_DATA_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'nltk_data'))
+    sys.exit(main(sys.argv[1] if len(sys.argv) > 1 else default_dir))
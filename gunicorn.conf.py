@@ -0,0 +1,71 @@
+"""
+Gunicorn settings for the QuickFix chatbot
+Run with: gunicorn -c gunicorn.conf.py app:app
+
+With preload (the default) the master imports the app, builds every matcher,
+rendered reply and index (and loads NLTK with NLTK_PRELOAD=true), then
+freezes those objects out of the garbage collector before forking. Workers
+share the pages copy-on-write instead of building their own copies.
+"""
+
+import gc
+import multiprocessing
+import os
+import time
+
+# sync or gthread; gthread keeps a worker useful while a thread waits on the backend
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+threads = int(os.environ.get('GUNICORN_THREADS', 4 if worker_class == 'gthread' else 1))
+
+# Conversation contexts are per process with CONTEXT_BACKEND=memory, so several
+# workers need the shared sqlite store; without it the default is one worker.
+# Sync workers block on backend calls, so they need more processes per core.
+# GUNICORN_MAX_WORKERS caps the default for small instances (512 MB on the free plan).
+_cpus = multiprocessing.cpu_count()
+_default_workers = _cpus + 1 if worker_class == 'gthread' else 2 * _cpus + 1
+if os.environ.get('CONTEXT_BACKEND', 'memory') != 'sqlite':
+    _default_workers = 1
+workers = int(os.environ.get('WEB_CONCURRENCY',
+                             min(_default_workers, int(os.environ.get('GUNICORN_MAX_WORKERS', 2)))))
+
+# An explicit WEB_CONCURRENCY above 1 shares contexts through sqlite unless a
+# backend was chosen; with memory set explicitly, each worker keeps its own
+if workers > 1:
+    os.environ.setdefault('CONTEXT_BACKEND', 'sqlite')
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'true').lower() == 'true'
+
+# Recycle workers to cap slow leaks; the jitter keeps them from restarting together.
+# Use CONTEXT_BACKEND=sqlite to keep conversations across restarts.
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 2000))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', 200))
+
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+
+errorlog = '-'
+loglevel = os.environ.get('GUNICORN_LOG_LEVEL', 'info')
+
+
+def on_starting(server):
+    if workers > 1 and os.environ.get('CONTEXT_BACKEND') != 'sqlite':
+        server.log.warning('%d workers with CONTEXT_BACKEND=%s: each worker keeps its own conversations; '
+                           'set CONTEXT_BACKEND=sqlite to share them', workers, os.environ.get('CONTEXT_BACKEND'))
+
+
+def when_ready(server):
+    """Warm the preloaded app in the master, just before the first fork"""
+    if not preload_app:
+        return
+    import app as chatbot
+
+    started = time.perf_counter()
+    chatbot.warm_up()
+    # Objects that survive this collection never move again, so the collector
+    # in the workers does not write to (and un-share) their pages
+    gc.collect()
+    gc.freeze()
+    server.log.info('Warmed up in %.1f ms; %d objects frozen for copy-on-write sharing',
+                    (time.perf_counter() - started) * 1000, gc.get_freeze_count())
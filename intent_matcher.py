@@ -0,0 +1,139 @@
+"""
+Compiled intent matcher for the QuickFix chatbot
+Merges every intent pattern into a single regex so a message is scanned once
+"""
+
+import re
+from bisect import bisect_right
+
+from keyword_automaton import trie_pattern, join_texts
+
+# A pattern we can decompose: \bword\b or \b(word|other words)\b
+_LITERAL_PATTERN = re.compile(r"^\\b\(?((?:[^\\()|.^$*+?{}\[\]]|\\')+(?:\|(?:[^\\()|.^$*+?{}\[\]]|\\')+)*)\)?\\b$")
+_WORD_BOUNDARY = re.compile(r'\b')
+
+
+def _split_literals(pattern):
+    """Return the plain-text alternatives of a pattern, or None if it is not a literal list"""
+    match = _LITERAL_PATTERN.match(pattern)
+    if not match:
+        return None
+    if pattern.startswith(r'\b(') != pattern.endswith(r')\b'):
+        return None
+    return [alternative.replace("\\'", "'") for alternative in match.group(1).split('|')]
+
+
+class IntentMatcher:
+    """Scores every intent in one pass over the message.
+
+    Scores are identical to running ``re.search`` for each pattern: an intent
+    gets one point per pattern that matches anywhere in the message, and ties
+    go to the intent declared first.
+    """
+
+    def __init__(self, intent_patterns, flags=re.IGNORECASE):
+        self.intents = list(intent_patterns.keys())
+
+        literal_patterns = {}  # literal text -> set of pattern ids
+        pattern_intents = []   # pattern id -> intent
+        self.fallback_patterns = []  # (pattern id, compiled) for non-literal patterns
+
+        for intent, patterns in intent_patterns.items():
+            for pattern in patterns:
+                pattern_id = len(pattern_intents)
+                pattern_intents.append(intent)
+                literals = _split_literals(pattern)
+                if literals is None:
+                    self.fallback_patterns.append((pattern_id, re.compile(pattern, flags)))
+                    continue
+                for literal in literals:
+                    if flags & re.IGNORECASE:
+                        literal = literal.lower()
+                    literal_patterns.setdefault(literal, set()).add(pattern_id)
+
+        self.pattern_intents = pattern_intents
+
+        # Longest literal first so the alternation prefers the longest hit at a position
+        literals = sorted(literal_patterns, key=len, reverse=True)
+        self._group_patterns = {}
+        for index, literal in enumerate(literals):
+            # A shorter literal that is a word-bounded prefix of this one matches at the
+            # same position, but the alternation only reports the longest - credit it here
+            pattern_ids = set(literal_patterns[literal])
+            for other in literals[index + 1:]:
+                if (re.fullmatch(re.escape(other), literal[:len(other)], flags)
+                        and _WORD_BOUNDARY.match(literal, len(other))):
+                    pattern_ids |= literal_patterns[other]
+            self._group_patterns[f'l{index}'] = frozenset(pattern_ids)
+
+        if literals:
+            self._regex = re.compile(rf'\b(?:{trie_pattern(literals)})\b', flags)
+        else:
+            self._regex = None
+
+    def _iter_literal_hits(self, text):
+        """Yield (start, pattern ids) for every literal match in ``text``"""
+        if self._regex is None:
+            return
+        search = self._regex.search
+        group_patterns = self._group_patterns
+        match = search(text)
+        while match:
+            yield match.start(), group_patterns[match.lastgroup]
+            # Restart one character later so overlapping literals are still seen
+            match = search(text, match.start() + 1)
+
+    def _add_fallback_matches(self, message, matched):
+        for pattern_id, compiled in self.fallback_patterns:
+            if compiled.search(message):
+                matched.add(pattern_id)
+        return matched
+
+    def _matched_patterns(self, message):
+        """Return the ids of every pattern that matches the message"""
+        matched = set()
+        for _, pattern_ids in self._iter_literal_hits(message):
+            matched |= pattern_ids
+        return self._add_fallback_matches(message, matched)
+
+    def _score(self, matched):
+        intent_scores = dict.fromkeys(self.intents, 0)
+        pattern_intents = self.pattern_intents
+        for pattern_id in matched:
+            intent_scores[pattern_intents[pattern_id]] += 1
+        return intent_scores
+
+    def scores(self, message):
+        """Return the score of every intent, in declaration order"""
+        return self._score(self._matched_patterns(message))
+
+    def scores_batch(self, messages):
+        """``scores`` for every message; the literals are matched in one scan over the batch"""
+        text, starts = join_texts(messages)
+        matched = [set() for _ in messages]
+        for start, pattern_ids in self._iter_literal_hits(text):
+            matched[bisect_right(starts, start) - 1] |= pattern_ids
+        # Fallback patterns may match anything, so they still run per message
+        return [self._score(self._add_fallback_matches(message, found))
+                for message, found in zip(messages, matched)]
+
+    def ranked(self, message):
+        """Return (intent, score) pairs with a positive score, best first"""
+        intent_scores = self.scores(message)
+        # sorted() is stable, so ties keep declaration order like max() does
+        return sorted(((intent, score) for intent, score in intent_scores.items() if score > 0),
+                      key=lambda item: item[1], reverse=True)
+
+    def detect(self, message, default='default'):
+        """Return the best scoring intent, or ``default`` if nothing matched"""
+        return self._best(self.scores(message), default)
+
+    def detect_batch(self, messages, default='default'):
+        """``detect`` for every message, in one scan over the batch"""
+        return [self._best(intent_scores, default) for intent_scores in self.scores_batch(messages)]
+
+    @staticmethod
+    def _best(intent_scores, default):
+        if max(intent_scores.values(), default=0) > 0:
+            return max(intent_scores, key=intent_scores.get)
+        return default
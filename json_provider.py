@@ -0,0 +1,61 @@
+"""
+JSON encoding for the QuickFix chatbot
+Raw UTF-8 output, so a Sinhala or Tamil letter costs 3 bytes instead of a
+6-byte \\uXXXX escape, through orjson when it is installed
+"""
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+class CompactJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider that writes raw UTF-8, with orjson when installed.
+
+    Payloads encode like the default provider's except that non-ASCII text is
+    not escaped (set ``ensure_ascii`` to get the escapes back) and orjson
+    output is always compact. Types orjson does not handle the same way
+    (datetimes, dataclasses, anything custom) go through the default
+    provider's conversions, and whatever orjson rejects outright (integers
+    beyond 64 bits) is encoded by the json module instead.
+    """
+
+    ensure_ascii = False
+    use_orjson = ORJSON_AVAILABLE
+
+    def _orjson_options(self):
+        options = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+        return options | orjson.OPT_SORT_KEYS if self.sort_keys else options
+
+    def _fast(self, kwargs=None):
+        # orjson cannot escape to ASCII or indent
+        return self.use_orjson and not self.ensure_ascii and not (kwargs and kwargs.keys() - {'separators'})
+
+    def dumps(self, obj, **kwargs):
+        if self._fast(kwargs):
+            try:
+                return orjson.dumps(obj, default=self.default, option=self._orjson_options()).decode('utf-8')
+            except orjson.JSONEncodeError:
+                pass
+        return super().dumps(obj, **kwargs)
+
+    def dumps_bytes(self, obj):
+        """``obj`` as compact UTF-8 bytes with a trailing newline, the body jsonify sends"""
+        if self._fast():
+            try:
+                return orjson.dumps(obj, default=self.default,
+                                    option=self._orjson_options() | orjson.OPT_APPEND_NEWLINE)
+            except orjson.JSONEncodeError:
+                pass
+        return (super().dumps(obj, separators=(',', ':')) + '\n').encode('utf-8')
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        # Debug mode (and compact=False) pretty-prints through the default provider
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            return super().response(obj)
+        return self._app.response_class(self.dumps_bytes(obj), mimetype=self.mimetype)
@@ -0,0 +1,182 @@
+"""
+Multi-keyword matching for the QuickFix chatbot
+Finds every keyword mention in one pass over the message, on token boundaries
+"""
+
+import re
+from bisect import bisect_right
+
+# Joins a batch of texts so one scan covers all of them. No keyword contains it,
+# and as a non-word character it leaves \b at each text's edges as it was
+BATCH_SEPARATOR = '\x00'
+
+
+def join_texts(texts):
+    """Join ``texts`` for a single scan; returns (joined text, start offset of each text)"""
+    starts = []
+    offset = 0
+    for text in texts:
+        starts.append(offset)
+        offset += len(text) + 1
+    return BATCH_SEPARATOR.join(texts), starts
+
+
+def first_matches(regex, texts):
+    """Return the first match of ``regex`` in each of ``texts`` (None if none), in one scan.
+
+    ``regex`` must not be able to match across ``BATCH_SEPARATOR``; match
+    offsets are relative to the joined text.
+    """
+    text, starts = join_texts(texts)
+    found = [None] * len(starts)
+    search = regex.search
+    match = search(text)
+    while match:
+        index = bisect_right(starts, match.start()) - 1
+        found[index] = match
+        if index + 1 == len(starts):
+            break
+        # Skip the rest of this text
+        match = search(text, starts[index + 1])
+    return found
+
+
+def trie_pattern(literals):
+    """Build a prefix-factored alternation of ``literals``.
+
+    Each literal ends in an empty named group ``l<index>`` (its index in
+    ``literals``) so ``match.lastgroup`` tells which one matched. Longer
+    continuations are tried before a literal that ends at the same node, so
+    the longest literal at a position wins.
+    """
+    trie = {}
+    for index, literal in enumerate(literals):
+        node = trie
+        for char in literal:
+            node = node.setdefault(char, {})
+        node[''] = index
+
+    def render(node):
+        branches = [re.escape(char) + render(child)
+                    for char, child in node.items() if char != '']
+        if '' in node:
+            branches.append(f"(?P<l{node['']}>)")
+        if len(branches) == 1:
+            return branches[0]
+        return '(?:' + '|'.join(branches) + ')'
+
+    return render(trie)
+
+
+class KeywordAutomaton:
+    """Compiled matcher over a set of keywords and phrases.
+
+    A keyword only matches where a token starts and ends ('key' does not
+    match "monkey" and 'ac' does not match "contact"); inflected forms must
+    be keywords of their own. Overlapping mentions ("door lock" ->
+    'door lock', 'door', 'lock') are all reported.
+    """
+
+    def __init__(self, keywords, flags=re.IGNORECASE):
+        fold = str.lower if flags & re.IGNORECASE else str
+        self.keywords = sorted({fold(keyword) for keyword in keywords}, key=len, reverse=True)
+
+        # Shorter keywords that match at the start of a longer one are hidden by
+        # the alternation, which only reports the longest - precompute them
+        self._group_keywords = {}
+        for index, keyword in enumerate(self.keywords):
+            found = [keyword]
+            for other in self.keywords[index + 1:]:
+                if re.match(re.escape(other) + r'\b', keyword, flags):
+                    found.append(other)
+            self._group_keywords[f'l{index}'] = tuple(found)
+
+        if self.keywords:
+            self._regex = re.compile(rf'\b(?:{trie_pattern(self.keywords)})\b', flags)
+        else:
+            self._regex = None
+
+    def iter_matches(self, text):
+        """Yield (start, keywords) for every position where keywords match"""
+        if self._regex is None:
+            return
+        search = self._regex.search
+        group_keywords = self._group_keywords
+        match = search(text)
+        while match:
+            yield match.start(), group_keywords[match.lastgroup]
+            # Restart one character later so overlapping keywords are still seen
+            match = search(text, match.start() + 1)
+
+    def iter_matches_batch(self, texts):
+        """Yield (text index, keywords) for every match in ``texts``, scanned as one string"""
+        text, starts = join_texts(texts)
+        for start, keywords in self.iter_matches(text):
+            yield bisect_right(starts, start) - 1, keywords
+
+    def find_all(self, text):
+        """Return the set of keywords mentioned in ``text``"""
+        found = set()
+        for _, keywords in self.iter_matches(text):
+            found.update(keywords)
+        return found
+
+
+class ServiceMatcher:
+    """Ranks the services mentioned in a message.
+
+    ``service_keywords`` maps each service to its synonyms, and each synonym
+    to the inflected forms that count as it ('leak' -> ['leaks', 'leaking']).
+    Only the listed forms match, so 'tap' does not turn up in "the tapes".
+    The service name itself ('appliance_repair' -> "appliance repair") is
+    always a keyword and counts ``name_weight`` points; every other distinct
+    keyword counts one, however many of its forms appear. Ties go to the
+    service declared first.
+    """
+
+    def __init__(self, service_keywords, name_weight=3):
+        self.services = list(service_keywords.keys())
+        self._keyword_services = {}  # keyword -> [(service, weight)]
+        self._form_keywords = {}  # matched form -> keyword it counts as
+
+        for service, keywords in service_keywords.items():
+            name = service.replace('_', ' ')
+            weighted = {name: name_weight}
+            self._form_keywords.setdefault(name, name)
+            for keyword, forms in keywords.items():
+                weighted.setdefault(keyword, 1)
+                for form in (keyword, *forms):
+                    self._form_keywords.setdefault(form.lower(), keyword.lower())
+            for keyword, weight in weighted.items():
+                self._keyword_services.setdefault(keyword.lower(), []).append((service, weight))
+
+        self.automaton = KeywordAutomaton(self._form_keywords)
+
+    def _rank(self, forms):
+        """Score the services behind a set of matched forms, best first"""
+        scores = {}
+        for keyword in {self._form_keywords[form] for form in forms}:
+            for service, weight in self._keyword_services[keyword]:
+                scores[service] = scores.get(service, 0) + weight
+        order = self.services.index
+        return sorted(scores.items(), key=lambda item: (-item[1], order(item[0])))
+
+    def candidates(self, message):
+        """Return (service, score) pairs for every service mentioned, best first"""
+        return self._rank(self.automaton.find_all(message))
+
+    def candidates_batch(self, messages):
+        """``candidates`` for every message, in one scan over the batch"""
+        found = [set() for _ in messages]
+        for index, forms in self.automaton.iter_matches_batch(messages):
+            found[index].update(forms)
+        return [self._rank(forms) for forms in found]
+
+    def best(self, message):
+        """Return the highest ranked service, or None"""
+        ranked = self.candidates(message)
+        return ranked[0][0] if ranked else None
+
+    def best_batch(self, messages):
+        """``best`` for every message, in one scan over the batch"""
+        return [ranked[0][0] if ranked else None for ranked in self.candidates_batch(messages)]
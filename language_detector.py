@@ -0,0 +1,128 @@
+"""
+Language detection for the QuickFix chatbot
+One regex pass splits a message into Sinhala, Tamil and Latin runs; Latin
+words found in a romanized Singlish/Tanglish lexicon count for si/ta
+"""
+
+import re
+
+LANGUAGES = ('en', 'si', 'ta')
+
+# Script runs: Sinhala (U+0D80-0DFF), Tamil (U+0B80-0BFF) and Latin letters
+_RUNS = re.compile(r'(?P<si>[\u0D80-\u0DFF]+)|(?P<ta>[\u0B80-\u0BFF]+)|(?P<latin>[A-Za-z]+)')
+
+# Common romanized words. Words that are also English words or English loanwords
+# (ape, mage, ada, gana, wada, sari, seri, naan, panna, ...) are left out, so a
+# short English message that happens to contain one stays English
+ROMANIZED_SINHALA = [
+    'mata', 'mge', 'oyata', 'oyage', 'apita', 'eyata',
+    'oni', 'ona', 'onee', 'oney', 'kenek', 'kenekw', 'ekak', 'eka', 'ekata',
+    'karanna', 'krnna', 'hadanna', 'hadala', 'ganna', 'denna', 'enna', 'yanna', 'balanna',
+    'puluwan', 'puluwanda', 'kohomada', 'kiyada', 'kiyak', 'keeyada', 'ganan',
+    'thiyanawa', 'tiyanawa', 'thiyenawa', 'tiyenawa', 'nehe', 'naha', 'nathi', 'natho',
+    'wadak', 'gedara', 'gedarata', 'heta', 'ikmanata', 'ikmanin',
+    'harida', 'ayubowan', 'stuthi', 'istuti', 'isthuthi', 'kavuda', 'mokakda',
+    'mokadda', 'mokada', 'neda', 'nedda', 'wenna', 'wathura', 'kadila', 'baas', 'baasunnahe',
+    'mahaththaya', 'nangi', 'malli', 'aiya', 'akka'
+]
+ROMANIZED_TAMIL = [
+    'enakku', 'enaku', 'unakku', 'ungalukku', 'nanga', 'neenga', 'avanga',
+    'venum', 'vendum', 'venam', 'vendam', 'irukku', 'iruku', 'irukka', 'iruka', 'illa',
+    'illai', 'eppadi', 'epdi', 'enna', 'ennoda', 'evvalavu', 'evlo', 'evalavu', 'enga',
+    'inga', 'anga', 'romba', 'konjam', 'pannunga', 'pannanum',
+    'panren', 'vaanga', 'vanga', 'kudunga', 'kodunga', 'theriyum', 'theriyala', 'vanakkam',
+    'nandri', 'sollunga', 'solla', 'udhavi', 'udavi', 'avasaram', 'seekiram', 'sikkiram',
+    'veedu', 'veetla', 'thanni', 'kasivu', 'ippo', 'ippove', 'naalaikku', 'inniku',
+    'yaaru', 'yaar', 'thambi', 'akka', 'ayya', 'da', 'pa', 'la', 'ah'
+]
+
+# Words in both lists ('enna' is "come" in Sinhala and "what" in Tamil, 'akka'
+# is "elder sister" in both) are evidence for neither language, nor for English:
+# they map to '' and their letters are not counted at all
+ROMANIZED_LEXICON = {
+    **{word: 'si' for word in ROMANIZED_SINHALA},
+    **{word: 'ta' for word in ROMANIZED_TAMIL},
+    **{word: '' for word in set(ROMANIZED_SINHALA) & set(ROMANIZED_TAMIL)}
+}
+# Tamil particles that are too short and too common in English chat to count alone
+_WEAK_TAMIL = frozenset(['da', 'pa', 'la', 'ah'])
+
+# A Latin-only message is romanized si/ta when lexicon words make up this share of its letters
+ROMANIZED_MIN_SHARE = 0.25
+
+
+class LanguageDetector:
+    """Guess 'en', 'si' or 'ta' with a confidence between 0 and 1.
+
+    Every letter is evidence: Sinhala and Tamil script letters for si/ta,
+    Latin letters of romanized lexicon words for si/ta, other Latin letters
+    for en; words the lexicon maps to '' (romanized in both) count for
+    nothing. Native script wins whenever present (the larger script, Sinhala
+    on a tie), as a code-mixed message is still written for that reader;
+    otherwise romanized words win once they reach ``min_romanized_share``.
+    The confidence is the winner's share of the letters.
+    """
+
+    def __init__(self, lexicon=None, min_romanized_share=ROMANIZED_MIN_SHARE):
+        self.lexicon = dict(ROMANIZED_LEXICON if lexicon is None else lexicon)
+        self.min_romanized_share = min_romanized_share
+
+    def _tally(self, text):
+        """Letters per language (script, romanized) in ``text``"""
+        script = {'si': 0, 'ta': 0}
+        romanized = {'si': 0, 'ta': 0}
+        english = 0
+        strong_romanized = False
+        lexicon = self.lexicon
+        # findall's tuples are cheaper to walk than match objects
+        for sinhala, tamil, latin in _RUNS.findall(text):
+            if latin:
+                word = latin.lower()
+                language = lexicon.get(word)
+                if language is None:
+                    english += len(latin)
+                elif language:
+                    romanized[language] += len(latin)
+                    strong_romanized = strong_romanized or word not in _WEAK_TAMIL
+            elif sinhala:
+                script['si'] += len(sinhala)
+            else:
+                script['ta'] += len(tamil)
+        return script, romanized, english, strong_romanized
+
+    def _decide(self, script, romanized, english, strong_romanized):
+        total = script['si'] + script['ta'] + romanized['si'] + romanized['ta'] + english
+        if not total:
+            return 'en', 0.0
+        if script['si'] or script['ta']:
+            language = 'si' if script['si'] >= script['ta'] else 'ta'
+            return language, round((script[language] + romanized[language]) / total, 3)
+        language = 'si' if romanized['si'] >= romanized['ta'] else 'ta'
+        if strong_romanized and romanized[language] / total >= self.min_romanized_share:
+            return language, round(romanized[language] / total, 3)
+        return 'en', round(english / total, 3)
+
+    def detect(self, text):
+        """Return (language, confidence) for ``text``"""
+        return self._decide(*self._tally(text))
+
+    def detect_batch(self, texts):
+        """detect() for many texts.
+
+        Unlike the keyword matchers this does not scan the joined batch: the
+        runs would need mapping back to their texts through match objects,
+        which costs more than the scan saves.
+        """
+        return [self._decide(*self._tally(text)) for text in texts]
+
+    def scores(self, text):
+        """Share of the letters that points to each language (for diagnostics)"""
+        script, romanized, english, _ = self._tally(text)
+        total = sum(script.values()) + sum(romanized.values()) + english
+        if not total:
+            return {language: 0.0 for language in LANGUAGES}
+        return {
+            'en': round(english / total, 3),
+            'si': round((script['si'] + romanized['si']) / total, 3),
+            'ta': round((script['ta'] + romanized['ta']) / total, 3)
+        }
@@ -0,0 +1,210 @@
+"""
+Lightweight metrics for the QuickFix chatbot
+Counters, fixed-bucket histograms and callback gauges, rendered in the
+Prometheus text exposition format. Metrics are per worker process.
+"""
+
+import functools
+import inspect
+import os
+import threading
+from bisect import bisect_left
+from time import perf_counter
+
+# Latency buckets in seconds, from 25us (one NLU stage) to 5s (the chat budget)
+LATENCY_BUCKETS = (0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+                   0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+# METRICS_ENABLED=false makes timed() a no-op (for measuring instrumentation overhead)
+ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() == 'true'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _label_text(names, values, extra=''):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _number(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+class Registry:
+    """The set of metrics one /metrics response renders"""
+
+    def __init__(self):
+        self._metrics = []
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        """Every metric in Prometheus text format"""
+        with self._lock:
+            metrics = list(self._metrics)
+        lines = []
+        for metric in metrics:
+            lines.append(f'# HELP {metric.name} {metric.help}')
+            lines.append(f'# TYPE {metric.name} {metric.type}')
+            lines.extend(metric.samples())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+
+class _Metric:
+    type = None
+
+    def __init__(self, name, help, labelnames=(), registry=REGISTRY):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+        if registry is not None:
+            registry.register(self)
+
+    def labels(self, *values):
+        """The series for one combination of label values (cache it on hot paths)"""
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f'{self.name} takes labels {self.labelnames}')
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def _series(self):
+        with self._lock:
+            return list(self._children.items())
+
+
+class _CounterChild:
+    __slots__ = ('value', '_lock')
+
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+
+class Counter(_Metric):
+    """Monotonic count; ``name`` should end in ``_total``"""
+
+    type = 'counter'
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount=1):
+        self.labels().inc(amount)
+
+    def samples(self):
+        return [f'{self.name}{_label_text(self.labelnames, values)} {_number(child.value)}'
+                for values, child in self._series()]
+
+
+class _HistogramChild:
+    __slots__ = ('bounds', 'counts', 'sum', '_lock')
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # Last slot is +Inf
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+
+class Histogram(_Metric):
+    """Distribution of observed values over fixed ``buckets`` (upper bounds)"""
+
+    type = 'histogram'
+
+    def __init__(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS, registry=REGISTRY):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, help, labelnames, registry)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value):
+        self.labels().observe(value)
+
+    def samples(self):
+        lines = []
+        bounds = self.buckets + (float('inf'),)
+        for values, child in self._series():
+            with child._lock:
+                counts, total = list(child.counts), child.sum
+            cumulative = 0
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                le = f'le="{_number(bound)}"'
+                lines.append(f'{self.name}_bucket{_label_text(self.labelnames, values, le)} {cumulative}')
+            labels = _label_text(self.labelnames, values)
+            lines.append(f'{self.name}_sum{labels} {_number(total)}')
+            lines.append(f'{self.name}_count{labels} {cumulative}')
+        return lines
+
+
+class Gauge(_Metric):
+    """Value read at render time from ``callback()``, which returns {label values: value}"""
+
+    type = 'gauge'
+
+    def __init__(self, name, help, callback, labelnames=(), registry=REGISTRY):
+        self.callback = callback
+        super().__init__(name, help, labelnames, registry)
+
+    def samples(self):
+        return [f'{self.name}{_label_text(self.labelnames, values)} {_number(value)}'
+                for values, value in self.callback().items()]
+
+
+def timed(series):
+    """Decorator observing each call's duration in seconds into a histogram series"""
+    def decorate(function):
+        if not ENABLED:
+            return function
+        observe = series.observe
+
+        if inspect.iscoroutinefunction(function):
+            @functools.wraps(function)
+            async def timed_coroutine(*args, **kwargs):
+                start = perf_counter()
+                try:
+                    return await function(*args, **kwargs)
+                finally:
+                    observe(perf_counter() - start)
+            return timed_coroutine
+
+        @functools.wraps(function)
+        def timed_function(*args, **kwargs):
+            start = perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                observe(perf_counter() - start)
+        return timed_function
+    return decorate
@@ -0,0 +1,144 @@
+"""
+Text preprocessing for the QuickFix chatbot
+Loads NLTK resources once per worker and memoizes lemmas per token
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+class TextPreprocessor:
+    """Tokenize, drop stopwords and lemmatize text with cached NLTK resources.
+
+    NLTK itself, stopwords and the lemmatizer are loaded on first use (or by
+    ``warm_up()``) and kept for the life of the worker. Corpora are looked up
+    in ``data_dir`` first and never downloaded. Lemmas are memoized in a
+    bounded LRU keyed by token. If the NLTK data is missing, the preprocessor
+    falls back to ``text.lower()`` for good instead of retrying the lookup on
+    every call.
+    """
+
+    def __init__(self, enabled=True, lemma_cache_size=4096, data_dir=None):
+        self.enabled = enabled
+        self.lemma_cache_size = lemma_cache_size
+        self.data_dir = data_dir
+        self._lemma_cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._cache_lock = threading.Lock()
+        self._loaded = False
+        self._tokenize = None
+        self._stop_words = frozenset()
+        self._lemmatize = None
+        self._stats = {
+            'calls': 0,
+            'fallbacks': 0,
+            'lemma_hits': 0,
+            'lemma_misses': 0,
+            'load_seconds': 0.0,
+            'process_seconds': 0.0,
+        }
+
+    def _load(self):
+        """Load NLTK resources once; disable preprocessing if they are missing"""
+        with self._lock:
+            if self._loaded:
+                return
+            start = time.perf_counter()
+            try:
+                import nltk
+                if self.data_dir and self.data_dir not in nltk.data.path:
+                    nltk.data.path.insert(0, self.data_dir)
+                from nltk.tokenize import word_tokenize
+                from nltk.corpus import stopwords
+                from nltk.stem import WordNetLemmatizer
+
+                self._stop_words = frozenset(stopwords.words('english'))
+                self._lemmatize = WordNetLemmatizer().lemmatize
+                self._tokenize = word_tokenize
+            except (ImportError, LookupError) as e:
+                logger.warning('nltk_resources_unavailable', extra={'error': type(e).__name__})
+                self.enabled = False
+            self._stats['load_seconds'] = time.perf_counter() - start
+            self._loaded = True
+
+    def warm_up(self):
+        """Load NLTK and its corpora now instead of on the first message"""
+        if self.enabled and not self._loaded:
+            self._load()
+        if not self.enabled:
+            return
+        try:
+            # Both are lazy inside NLTK too: the first call reads the corpus files
+            self._tokenize('warm up')
+            self._lemmatize('technicians')
+        except LookupError as e:
+            logger.warning('nltk_tokenizer_unavailable', extra={'error': type(e).__name__})
+            self.enabled = False
+
+    def _lemma(self, token):
+        """Lemmatize a token through the bounded LRU cache"""
+        cache = self._lemma_cache
+        with self._cache_lock:
+            lemma = cache.get(token)
+            if lemma is not None:
+                self._stats['lemma_hits'] += 1
+                cache.move_to_end(token)
+                return lemma
+
+        lemma = self._lemmatize(token)
+        with self._cache_lock:
+            self._stats['lemma_misses'] += 1
+            cache[token] = lemma
+            if len(cache) > self.lemma_cache_size:
+                cache.popitem(last=False)
+        return lemma
+
+    def process(self, text):
+        """Preprocess text using NLP techniques"""
+        self._stats['calls'] += 1
+        if self.enabled and not self._loaded:
+            self._load()
+        if not self.enabled:
+            self._stats['fallbacks'] += 1
+            return text.lower()
+
+        start = time.perf_counter()
+        try:
+            tokens = self._tokenize(text.lower())
+            stop_words = self._stop_words
+            return ' '.join(self._lemma(word) for word in tokens
+                            if word.isalnum() and word not in stop_words)
+        except LookupError as e:
+            # Tokenizer data missing - it will not appear later in this process
+            logger.warning('nltk_tokenizer_unavailable', extra={'error': type(e).__name__})
+            self.enabled = False
+            self._stats['fallbacks'] += 1
+            return text.lower()
+        except Exception:
+            self._stats['fallbacks'] += 1
+            return text.lower()
+        finally:
+            self._stats['process_seconds'] += time.perf_counter() - start
+
+    def stats(self):
+        """Return cache hit rate and time spent preprocessing"""
+        lookups = self._stats['lemma_hits'] + self._stats['lemma_misses']
+        calls = self._stats['calls']
+        return {
+            'enabled': self.enabled,
+            'loaded': self._loaded,
+            'calls': calls,
+            'fallbacks': self._stats['fallbacks'],
+            'lemmaCacheSize': len(self._lemma_cache),
+            'lemmaCacheMaxSize': self.lemma_cache_size,
+            'lemmaHits': self._stats['lemma_hits'],
+            'lemmaMisses': self._stats['lemma_misses'],
+            'lemmaHitRate': round(self._stats['lemma_hits'] / lookups, 4) if lookups else 0.0,
+            'loadMs': round(self._stats['load_seconds'] * 1000, 3),
+            'totalProcessMs': round(self._stats['process_seconds'] * 1000, 3),
+            'avgProcessMs': round(self._stats['process_seconds'] * 1000 / calls, 3) if calls else 0.0,
+        }
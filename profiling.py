@@ -0,0 +1,164 @@
+"""
+On-demand request profiling for the QuickFix chatbot
+Sampled requests run under cProfile. Each profile is saved for pstats or
+snakeviz, and folded into collapsed stacks that flamegraph.pl or speedscope
+can read.
+"""
+
+import cProfile
+import logging
+import os
+import pstats
+import random
+import re
+import threading
+import time
+from collections import Counter
+
+logger = logging.getLogger(__name__)
+
+_UNSAFE_TAG = re.compile(r'[^A-Za-z0-9_.-]+')
+
+
+def _tag(value, default):
+    return _UNSAFE_TAG.sub('_', str(value)) if value else default
+
+
+def _frame_label(func):
+    """flamegraph-safe name for a pstats function key"""
+    filename, lineno, name = func
+    if filename == '~':  # Built-in
+        label = name
+    else:
+        label = f'{os.path.basename(filename)}:{lineno}({name})'
+    return label.replace(';', ',')
+
+
+def fold_stats(stats, root, max_depth=64, min_seconds=1e-6):
+    """Collapsed stacks ({"root;a;b": microseconds}) from a pstats.Stats.
+
+    cProfile records caller/callee pairs rather than whole stacks, so each
+    function's time is split over the paths that reach it in proportion to
+    the time each caller spent in it. Recursive edges are cut.
+    """
+    entries = stats.stats
+    callees = {}
+    for func, (_, _, _, _, callers) in entries.items():
+        for caller, edge in callers.items():
+            callees.setdefault(caller, {})[func] = edge[3]
+
+    folded = Counter()
+
+    def walk(func, path, on_path, share):
+        _, _, own, total, _ = entries[func]
+        fraction = min(share / total, 1.0) if total else 0.0
+        self_time = own * fraction
+        if self_time >= min_seconds:
+            folded[';'.join(path)] += int(self_time * 1e6)
+        if len(path) >= max_depth:
+            return
+        for callee, edge_time in callees.get(func, {}).items():
+            edge_share = edge_time * fraction
+            if callee in on_path or edge_share < min_seconds:
+                continue
+            on_path.add(callee)
+            path.append(_frame_label(callee))
+            walk(callee, path, on_path, edge_share)
+            path.pop()
+            on_path.discard(callee)
+
+    for func, (_, _, _, total, callers) in entries.items():
+        if not callers:
+            walk(func, [root, _frame_label(func)], {func}, total)
+    return folded
+
+
+class RequestProfiler:
+    """Profile sampled requests and keep per-worker collapsed stacks.
+
+    ``sample_rate`` of 0 profiles only forced requests. One request is
+    profiled at a time per worker (cProfile cannot nest); requests that
+    arrive meanwhile run unprofiled. Per-request ``.prof`` files stop after
+    ``max_files`` per worker, while the collapsed stacks keep accumulating.
+    """
+
+    def __init__(self, directory, sample_rate=0.0, max_files=500, max_depth=64, rng=random.random):
+        self.directory = directory
+        self.sample_rate = sample_rate
+        self.max_files = max_files
+        self.max_depth = max_depth
+        self._rng = rng
+        self._busy = threading.Lock()
+        self._lock = threading.Lock()
+        self._folded = Counter()
+        self.profiled = 0
+        self.files_written = 0
+
+    def should_profile(self, forced=False):
+        return forced or (self.sample_rate > 0 and self._rng() < self.sample_rate)
+
+    def call(self, function, args=(), forced=False, tags=None, route='/chat'):
+        """Return ``function(*args)``, profiled if sampled.
+
+        ``tags(result)`` gives the (intent, service type) the profile is filed under.
+        """
+        if not self.should_profile(forced) or not self._busy.acquire(blocking=False):
+            return function(*args)
+        profiler = cProfile.Profile()
+        try:
+            result = profiler.runcall(function, *args)
+        finally:
+            self._busy.release()
+        try:
+            intent, service = tags(result) if tags else (None, None)
+            self._record(profiler, route, intent, service)
+        except Exception:  # A failed profile must not fail the request
+            logger.exception('profile_failed')
+        return result
+
+    def _record(self, profiler, route, intent, service):
+        intent = _tag(intent, 'unknown')
+        service = _tag(service, 'none')
+        stats = pstats.Stats(profiler)
+        folded = fold_stats(stats, f'{route} intent={intent} service={service}', self.max_depth)
+
+        with self._lock:
+            self._folded.update(folded)
+            self.profiled += 1
+            write_file = self.files_written < self.max_files
+            if write_file:
+                self.files_written += 1
+            sequence = self.files_written
+
+        os.makedirs(self.directory, exist_ok=True)
+        if write_file:
+            name = f"{time.strftime('%Y%m%dT%H%M%S')}-{os.getpid()}-{sequence}-{intent}-{service}.prof"
+            stats.dump_stats(os.path.join(self.directory, name))
+        with open(os.path.join(self.directory, f'collapsed-{os.getpid()}.txt'), 'w') as collapsed:
+            collapsed.write(self.collapsed())
+        logger.info('request_profiled', extra={'intent': intent, 'serviceType': service,
+                                               'profileFile': name if write_file else None})
+
+    def collapsed(self):
+        """Aggregated stacks, one "frame;frame;frame microseconds" line each"""
+        with self._lock:
+            items = sorted(self._folded.items())
+        return ''.join(f'{stack} {count}\n' for stack, count in items if count > 0)
+
+    def clear(self):
+        """Drop the aggregated stacks; returns how many profiles they covered"""
+        with self._lock:
+            profiled = self.profiled
+            self._folded.clear()
+            self.profiled = 0
+        return profiled
+
+    def stats(self):
+        with self._lock:
+            return {
+                'sampleRate': self.sample_rate,
+                'directory': self.directory,
+                'profiled': self.profiled,
+                'filesWritten': self.files_written,
+                'stacks': len(self._folded)
+            }
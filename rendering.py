@@ -0,0 +1,131 @@
+"""
+Precompiled reply rendering for the QuickFix chatbot
+Every service/section reply is rendered once at startup, so answering a
+service question is a section check plus a dict lookup
+"""
+
+# Service info sections in priority order, with the phrases that ask for them
+SECTION_KEYWORDS = {
+    'technicians': ['qualification', 'certified', 'licensed', 'experienced', 'training'],
+    'cost': ['cost', 'price', 'charge', 'fee', 'how much'],
+    'issues': ['problem', 'issue', 'fix', 'repair', 'help'],
+    'tips': ['tip', 'advice', 'prevent', 'maintain', 'care'],
+    'emergency': ['emergency', 'urgent', 'immediate', 'asap']
+}
+
+# Asking for names or a list is a technician lookup, not a question about their qualifications
+TECHNICIAN_LIST_KEYWORDS = ['name', 'names', 'list', 'available', 'show me', 'who are']
+
+DEFAULT_SECTION = 'general'
+
+
+def _bullets(items, marker='•'):
+    return ''.join(f"{marker} {item}\n" for item in items)
+
+
+def _render_technicians(info):
+    tech_info = info.get('technician_info', {})
+    return (
+        " **Our Technicians:**\n\n"
+        "**Qualifications:**\n"
+        f"{_bullets(tech_info.get('qualifications', []), '✓')}"
+        "\n**Skills & Expertise:**\n"
+        f"{_bullets(tech_info.get('skills', []))}"
+        "\n**Professional Tools:**\n"
+        f"{_bullets(tech_info.get('tools', []))}"
+        f"\n **{tech_info.get('verification', 'All technicians are verified and insured')}**"
+    )
+
+
+def _render_cost(info):
+    return (
+        f" **Average Cost:** {info['avg_cost']}\n"
+        f" **Typical Duration:** {info['avg_time']}\n\n"
+        "Note: Final cost depends on the specific issue and materials needed."
+    )
+
+
+def _render_issues(info):
+    return (
+        "**Common Issues We Fix:**\n"
+        f"{_bullets(info['common_issues'][:5])}"
+        f"\n **Typical Duration:** {info['avg_time']}"
+    )
+
+
+def _render_tips(info):
+    return "** Helpful Tips:**\n" + _bullets(info['tips'])
+
+
+def _render_emergency(info):
+    return (
+        "** Emergency Signs:**\n"
+        f"{_bullets(info['emergency_signs'])}"
+        "\n If you're experiencing any of these, book an emergency service immediately!"
+    )
+
+
+def _render_general(info):
+    return (
+        "**Common Issues:**\n"
+        f"{_bullets(info['common_issues'][:4])}"
+        f"\n **Cost:** {info['avg_cost']}\n"
+        f"**Duration:** {info['avg_time']}\n\n"
+        "Would you like to book this service?"
+    )
+
+
+SECTION_RENDERERS = {
+    'technicians': _render_technicians,
+    'cost': _render_cost,
+    'issues': _render_issues,
+    'tips': _render_tips,
+    'emergency': _render_emergency,
+    'general': _render_general
+}
+
+
+class ServiceInfoRenderer:
+    """Service information replies, rendered ahead of time.
+
+    ``render(service, query_lower)`` returns the same text as building the
+    reply on the fly: keywords are matched as plain substrings of the query,
+    and the first section in ``SECTION_KEYWORDS`` order that was asked for
+    wins ('technicians' only when no ``TECHNICIAN_LIST_KEYWORDS`` appear).
+    Unknown services render as None.
+    """
+
+    def __init__(self, service_knowledge):
+        self.replies = {
+            service: {
+                section: (f"**{service.replace('_', ' ').title()} Service**\n\n"
+                          f"{info['description']}\n\n{render(info)}")
+                for section, render in SECTION_RENDERERS.items()
+            }
+            for service, info in service_knowledge.items()
+        }
+
+        # Sections in priority order; a plain substring test is the fastest check for
+        # queries this short (a regex scan costs more per character than it saves)
+        self._sections = tuple((section, tuple(keywords)) for section, keywords in SECTION_KEYWORDS.items())
+        self._list_keywords = tuple(TECHNICIAN_LIST_KEYWORDS)
+
+    def section(self, query_lower):
+        """Return the section the query asks about"""
+        for section, keywords in self._sections:
+            for keyword in keywords:
+                if keyword in query_lower:
+                    break
+            else:
+                continue
+            if section == 'technicians' and any(keyword in query_lower for keyword in self._list_keywords):
+                continue
+            return section
+        return DEFAULT_SECTION
+
+    def render(self, service_type, query_lower):
+        """Return the reply for ``service_type`` (None for an unknown service)"""
+        replies = self.replies.get(service_type)
+        if replies is None:
+            return None
+        return replies[self.section(query_lower)]
@@ -0,0 +1,194 @@
+"""
+Retrieval index for the QuickFix chatbot knowledge base
+TF-IDF over character n-grams, so English, Sinhala and Tamil queries all work
+"""
+
+import math
+import threading
+from collections import Counter
+from importlib.util import find_spec
+
+# Checked without importing: scikit-learn takes about a second to import, so it
+# is only loaded when an index is built
+SKLEARN_AVAILABLE = find_spec('sklearn') is not None and find_spec('numpy') is not None
+np = None
+TfidfVectorizer = None
+
+
+def _import_sklearn():
+    """Import numpy and scikit-learn on first use; returns whether that worked"""
+    global np, TfidfVectorizer
+    if TfidfVectorizer is None:
+        try:
+            import numpy
+            from sklearn.feature_extraction.text import TfidfVectorizer as vectorizer
+        except ImportError:
+            return False
+        np, TfidfVectorizer = numpy, vectorizer
+    return True
+
+# Character n-grams inside word boundaries, like TfidfVectorizer(analyzer='char_wb')
+NGRAM_RANGE = (3, 5)
+
+
+class RetrievalIndex:
+    """Top-k retrieval over a fixed set of documents.
+
+    ``documents`` is a list of dicts with a ``text`` to index plus any other
+    fields, which are handed back with each result. The whole collection is
+    vectorized once; a query costs one sparse matrix-vector product. Without
+    scikit-learn the same weighting runs on a pure-Python inverted index.
+    With ``lazy=True`` nothing is built until ``build()`` or the first search.
+    A search filtered by ``where`` can also ask for a ``margin``: results must
+    then beat every document the filter rejects by at least that much.
+    """
+
+    def __init__(self, documents, min_score=0.12, use_sklearn=None, lazy=False):
+        self.documents = list(documents)
+        self.min_score = min_score
+        self.use_sklearn = SKLEARN_AVAILABLE if use_sklearn is None else use_sklearn
+        self._built = False
+        self._lock = threading.Lock()
+        self._rejected = {}  # where -> ids of the documents it rejects
+        if not lazy:
+            self.build()
+
+    def build(self):
+        """Vectorize the documents (once)"""
+        if self._built:
+            return
+        with self._lock:
+            if self._built:
+                return
+            texts = [document['text'] for document in self.documents]
+            if self.use_sklearn and not _import_sklearn():
+                self.use_sklearn = False
+
+            if self.use_sklearn:
+                self._vectorizer = TfidfVectorizer(
+                    analyzer='char_wb',
+                    ngram_range=NGRAM_RANGE,
+                    lowercase=True,
+                    sublinear_tf=True
+                )
+                # Rows are L2-normalized, so a dot product is the cosine similarity
+                self._matrix = self._vectorizer.fit_transform(texts).tocsr()
+            else:
+                self._build_fallback(texts)
+            self._built = True
+
+    def _build_fallback(self, texts):
+        """Build an inverted index with the same smoothed, sublinear TF-IDF weights"""
+        counts = [Counter(_char_ngrams(text)) for text in texts]
+        document_frequency = Counter(gram for count in counts for gram in count)
+        total = len(texts)
+        self._idf = {gram: math.log((1 + total) / (1 + df)) + 1
+                     for gram, df in document_frequency.items()}
+        self._postings = {}
+        for doc_id, count in enumerate(counts):
+            for gram, weight in _normalize(count, self._idf).items():
+                self._postings.setdefault(gram, []).append((doc_id, weight))
+
+    def _fallback_scores(self, query):
+        """Cosine similarity of the query against every document"""
+        scores = [0.0] * len(self.documents)
+        query_vector = _normalize(Counter(g for g in _char_ngrams(query) if g in self._idf), self._idf)
+        for gram, query_weight in query_vector.items():
+            for doc_id, weight in self._postings[gram]:
+                scores[doc_id] += query_weight * weight
+        return scores
+
+    def _rejected_ids(self, where):
+        """Ids of the documents ``where`` rejects (computed once per filter)"""
+        rejected = self._rejected.get(where)
+        if rejected is None:
+            rejected = [doc_id for doc_id, document in enumerate(self.documents) if not where(document)]
+            if self.use_sklearn:
+                rejected = np.array(rejected, dtype=np.intp)
+            self._rejected[where] = rejected
+        return rejected
+
+    def _results(self, scores, top_k, min_score, where, margin=None):
+        """Turn a score row into the top-k result list"""
+        threshold = self.min_score if min_score is None else min_score
+        if margin is not None and where is not None:
+            rejected = self._rejected_ids(where)
+            if len(rejected):
+                rival = scores[rejected].max() if self.use_sklearn else max(scores[doc_id] for doc_id in rejected)
+                threshold = max(threshold, rival + margin)
+        if self.use_sklearn:
+            doc_ids = np.flatnonzero(scores >= threshold)
+            ranked = doc_ids[np.argsort(-scores[doc_ids], kind='stable')]
+        else:
+            ranked = sorted((doc_id for doc_id, score in enumerate(scores) if score >= threshold),
+                            key=lambda doc_id: -scores[doc_id])
+
+        results = []
+        for doc_id in ranked:
+            document = self.documents[doc_id]
+            if where is not None and not where(document):
+                continue
+            results.append(dict(document, score=round(float(scores[doc_id]), 4)))
+            if len(results) == top_k:
+                break
+        return results
+
+    def search(self, query, top_k=3, min_score=None, where=None, margin=None):
+        """Return up to ``top_k`` documents scoring at least ``min_score``, best first"""
+        return self.search_batch([query], top_k, min_score, where, margin)[0]
+
+    def search_batch(self, queries, top_k=3, min_score=None, where=None, margin=None):
+        """Search many queries at once; returns one result list per query"""
+        if not queries or not self.documents:
+            return [[] for _ in queries]
+        self.build()
+        if not self.use_sklearn:
+            return [self._results(self._fallback_scores(query), top_k, min_score, where, margin)
+                    for query in queries]
+
+        # One sparse product scores every query against every document
+        score_matrix = (self._vectorizer.transform(queries) @ self._matrix.T).toarray()
+        return [self._results(row, top_k, min_score, where, margin) for row in score_matrix]
+
+    def stats(self):
+        """Describe the index for diagnostics"""
+        if not self._built:
+            features = None
+        elif self.use_sklearn:
+            features = len(self._vectorizer.vocabulary_)
+        else:
+            features = len(self._idf)
+        return {
+            'backend': 'sklearn' if self.use_sklearn else 'python',
+            'built': self._built,
+            'documents': len(self.documents),
+            'features': features,
+            'minScore': self.min_score
+        }
+
+
+def _char_ngrams(text):
+    """Character n-grams of each whitespace-padded word, as in analyzer='char_wb'"""
+    grams = []
+    low, high = NGRAM_RANGE
+    for word in text.lower().split():
+        word = f' {word} '
+        length = len(word)
+        for n in range(low, high + 1):
+            offset = 0
+            grams.append(word[:n])
+            while offset + n < length:
+                offset += 1
+                grams.append(word[offset:offset + n])
+            if offset == 0:  # Word shorter than n - count it once
+                break
+    return grams
+
+
+def _normalize(counts, idf):
+    """Sublinear TF times IDF, L2-normalized"""
+    weights = {gram: (1 + math.log(count)) * idf[gram] for gram, count in counts.items()}
+    norm = math.sqrt(sum(weight * weight for weight in weights.values()))
+    if not norm:
+        return {}
+    return {gram: weight / norm for gram, weight in weights.items()}
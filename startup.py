@@ -0,0 +1,47 @@
+"""
+Startup timing for the QuickFix chatbot
+Splits the time from the first import of the app to ready into named phases
+"""
+
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class StartupTimer:
+    """Time spent in each startup phase.
+
+    Create it before the heavy imports; each ``mark(name)`` closes a phase
+    that began at the previous mark, and ``ready()`` closes the last one.
+    """
+
+    def __init__(self, clock=time.perf_counter):
+        self._clock = clock
+        self.started = clock()
+        self._last = self.started
+        self.phases = {}
+        self.ready_at = None
+        self.pid = os.getpid()
+
+    def mark(self, phase):
+        now = self._clock()
+        self.phases[phase] = self.phases.get(phase, 0.0) + (now - self._last)
+        self._last = now
+
+    def ready(self, phase='routes'):
+        """Close the final phase and log the timings"""
+        self.mark(phase)
+        self.ready_at = self._last
+        logger.info('startup_complete', extra=self.report())
+
+    def report(self):
+        """Phase durations and import-to-ready time in milliseconds"""
+        end = self.ready_at if self.ready_at is not None else self._clock()
+        return {
+            'phasesMs': {phase: round(seconds * 1000, 3) for phase, seconds in self.phases.items()},
+            'importToReadyMs': round((end - self.started) * 1000, 3),
+            'ready': self.ready_at is not None,
+            'pid': self.pid
+        }
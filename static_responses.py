@@ -0,0 +1,67 @@
+"""
+Pre-serialized JSON responses for the QuickFix chatbot
+Constant payloads are encoded (and compressed) once with a strong ETag, so
+serving one costs a header comparison; a matching If-None-Match gets a 304
+"""
+
+import hashlib
+
+from flask import Response
+
+# Compressed once per refresh, so the slowest, smallest settings are affordable
+PRECOMPRESS_LEVELS = {'gzip': 9, 'br': 11}
+
+
+class StaticJSONResponse:
+    """One constant JSON payload, served from cached bytes.
+
+    ``refresh(payload)`` encodes it with the app's JSON provider (the same
+    bytes jsonify would send) and, given a ResponseCompressor, compresses it
+    with each encoding the compressor offers; call it again whenever the
+    data behind the payload changes. The ETag is a hash of the bytes, so it
+    is the same in every worker and only changes with the content; each
+    compressed variant has its own.
+    """
+
+    def __init__(self, json_provider, max_age=300, compressor=None):
+        self.json_provider = json_provider
+        self.compressor = compressor
+        self.cache_control = f'public, max-age={max_age}'
+        self._variants = None  # {encoding or None: (body, etag)}, replaced whole so a request never sees a mix
+
+    def refresh(self, payload):
+        body = self.json_provider.response(payload).get_data()
+        etag = hashlib.sha256(body).hexdigest()[:32]
+        variants = {None: (body, etag)}
+        if self.compressor is not None and len(body) >= self.compressor.min_bytes:
+            for encoding in self.compressor.encodings:
+                compressed = self.compressor.compress(body, encoding, PRECOMPRESS_LEVELS[encoding])
+                if len(compressed) < len(body):
+                    variants[encoding] = (compressed, f'{etag}-{encoding}')
+        self._variants = variants
+        return etag
+
+    def respond(self, request):
+        """The cached body in the client's preferred encoding, or an empty 304 if it already has it"""
+        variants = self._variants
+        encoding = None
+        headers = {'Cache-Control': self.cache_control}
+        if len(variants) > 1:
+            headers['Vary'] = 'Accept-Encoding'
+            encoding = self.compressor.negotiate(request.headers.get('Accept-Encoding'))
+            if encoding not in variants:
+                encoding = None
+        body, etag = variants[encoding]
+        headers['ETag'] = f'"{etag}"'
+        if request.if_none_match.contains_weak(etag):
+            return Response(status=304, headers=headers)
+        if encoding is not None:
+            headers['Content-Encoding'] = encoding
+        return Response(body, mimetype='application/json', headers=headers)
+
+    def stats(self):
+        variants = self._variants or {None: (b'', None)}
+        return {
+            'etag': variants[None][1],
+            'bytes': {encoding or 'identity': len(body) for encoding, (body, _) in variants.items()}
+        }
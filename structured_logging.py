@@ -0,0 +1,189 @@
+"""
+Structured, non-blocking logging for the QuickFix chatbot
+Request threads only enqueue log records; a background thread formats them
+as JSON lines and writes them out
+"""
+
+import atexit
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import threading
+from datetime import datetime, timezone
+
+# Route of the request being served, for per-route sampling
+_route = contextvars.ContextVar('log_route', default=None)
+
+# Fields holding user or bot text, hidden when redaction is on
+REDACTED_FIELDS = frozenset(['userMessage', 'reply'])
+
+_STANDARD_ATTRIBUTES = frozenset(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+def bind_route(route):
+    """Tag log records from the current request with ``route``; returns a reset token"""
+    return _route.set(route)
+
+
+def unbind_route(token):
+    _route.reset(token)
+
+
+def parse_rates(spec):
+    """Parse "DEBUG=0.1,/health=0" into {'DEBUG': 0.1, '/health': 0.0}"""
+    rates = {}
+    for item in (spec or '').split(','):
+        if '=' in item:
+            name, rate = item.split('=', 1)
+            rates[name.strip()] = float(rate)
+    return rates
+
+
+class SamplingFilter(logging.Filter):
+    """Keep a fraction of records per level name and per route (both rates apply)"""
+
+    def __init__(self, level_rates=None, route_rates=None, rng=random.random):
+        super().__init__()
+        self.level_rates = {logging.getLevelName(name) if isinstance(name, str) else name: rate
+                            for name, rate in (level_rates or {}).items()}
+        self.route_rates = dict(route_rates or {})
+        self._rng = rng
+        self.sampled_out = 0
+
+    def filter(self, record):
+        rate = self.level_rates.get(record.levelno, 1.0)
+        route = _route.get()
+        if route is not None:
+            record.route = route
+            rate *= self.route_rates.get(route, 1.0)
+        if rate >= 1.0 or (rate > 0 and self._rng() < rate):
+            return True
+        self.sampled_out += 1
+        return False
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per record: time, level, logger, event and any ``extra`` fields"""
+
+    def __init__(self, redact=False):
+        super().__init__()
+        self.redact = redact
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'event': record.getMessage()
+        }
+        for key, value in vars(record).items():
+            if key in _STANDARD_ATTRIBUTES:
+                continue
+            if self.redact and key in REDACTED_FIELDS and isinstance(value, str):
+                value = f'[redacted {len(value)} chars]'
+            entry[key] = value
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class _DrainingListener(logging.handlers.QueueListener):
+    """Queue listener whose stop waits for room in a full queue instead of failing"""
+
+    def enqueue_sentinel(self):
+        self.queue.put(self._sentinel)
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """Queue records for a background writer, dropping them when the queue is full.
+
+    Records are handed over as they are: formatting (and redaction) happens
+    on the writer thread. Each worker process starts its own writer on first
+    use, so the handler survives a gunicorn fork.
+    """
+
+    def __init__(self, target, queue_size=10000):
+        super().__init__(queue.Queue(queue_size))
+        self.target = target
+        self.queue_size = queue_size
+        self.enqueued = 0
+        self.dropped = 0
+        self._listener = None
+        self._listener_pid = None
+        self._lock = threading.Lock()
+
+    def _ensure_listener(self):
+        """Start the writer thread in this process if needed"""
+        if self._listener_pid == os.getpid():
+            return
+        with self._lock:
+            if self._listener_pid == os.getpid():
+                return
+            self.queue = queue.Queue(self.queue_size)  # The parent's queue is useless after a fork
+            self._listener = _DrainingListener(self.queue, self.target)
+            self._listener.start()
+            self._listener_pid = os.getpid()
+            atexit.register(self.stop)
+
+    def prepare(self, record):
+        return record
+
+    def enqueue(self, record):
+        self._ensure_listener()
+        try:
+            self.queue.put_nowait(record)
+            self.enqueued += 1
+        except queue.Full:
+            self.dropped += 1
+
+    def stop(self):
+        """Write out everything still queued (called at exit)"""
+        if self._listener is not None and self._listener_pid == os.getpid():
+            self._listener.stop()
+            self._listener = None
+            self._listener_pid = None
+
+
+_handler = None
+_sampler = None
+
+
+def configure_logging(level='INFO', queue_size=10000, level_rates=None, route_rates=None,
+                      redact=False, stream=None):
+    """Send every log record through the non-blocking JSON pipeline"""
+    global _handler, _sampler
+    target = logging.StreamHandler(stream or sys.stdout)
+    target.setFormatter(JSONFormatter(redact=redact))
+
+    _sampler = SamplingFilter(level_rates, route_rates)
+    _handler = NonBlockingQueueHandler(target, queue_size=queue_size)
+    _handler.addFilter(_sampler)
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        if isinstance(handler, NonBlockingQueueHandler):
+            root.removeHandler(handler)
+            handler.stop()
+    root.addHandler(_handler)
+    root.setLevel(level)
+    return _handler
+
+
+def stats():
+    """Queue depth and enqueued/dropped/sampled-out counts for this worker"""
+    if _handler is None:
+        return {'configured': False}
+    return {
+        'configured': True,
+        'queueSize': _handler.queue_size,
+        'queued': _handler.queue.qsize(),
+        'enqueued': _handler.enqueued,
+        'dropped': _handler.dropped,
+        'sampledOut': _sampler.sampled_out,
+        'redact': _handler.target.formatter.redact
+    }
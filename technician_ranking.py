@@ -0,0 +1,273 @@
+"""
+Technician ranking for the QuickFix chatbot
+A grid index over technician locations answers "nearest N to this point,
+weighted by rating" by scoring only the cells around the user
+"""
+
+import heapq
+import math
+import threading
+from collections import OrderedDict
+from importlib.util import find_spec
+from itertools import chain
+
+EARTH_RADIUS_KM = 6371.0088
+
+# Grid cell size in degrees (about 5.5 km north-south)
+DEFAULT_CELL_DEGREES = 0.05
+
+# Ratings run 1-5; a top-rated technician is ranked by distance alone
+MAX_RATING = 5.0
+MIN_RATING = 1.0
+
+# Below this many technicians in a ring, plain floats beat numpy's per-call overhead
+VECTORIZE_MIN = 64
+
+# numpy is optional and imported on first use, like scikit-learn in retrieval.py
+NUMPY_AVAILABLE = find_spec('numpy') is not None
+np = None
+
+
+def _import_numpy():
+    """Import numpy on first use; returns whether that worked"""
+    global np
+    if np is None:
+        try:
+            import numpy
+        except ImportError:
+            return False
+        np = numpy
+    return True
+
+
+def _point(latitude, longitude):
+    """(lat, lng) as floats, or None unless both are valid coordinates"""
+    try:
+        lat, lng = float(latitude), float(longitude)
+    except (TypeError, ValueError):
+        return None
+    if not (-90.0 <= lat <= 90.0 and -180.0 <= lng <= 180.0):
+        return None
+    return lat, lng
+
+
+def technician_point(technician):
+    """(lat, lng) of a technician's GeoJSON ``location`` (coordinates are [lng, lat])"""
+    location = technician.get('location') if isinstance(technician, dict) else None
+    coordinates = location.get('coordinates') if isinstance(location, dict) else None
+    if not isinstance(coordinates, (list, tuple)) or len(coordinates) < 2:
+        return None
+    return _point(coordinates[1], coordinates[0])
+
+
+def parse_coordinates(data):
+    """User (lat, lng) from a chat payload, or None.
+
+    Accepts top-level ``latitude``/``longitude`` (or ``lat``/``lng``), or a
+    ``location`` object with the same keys or GeoJSON ``coordinates``.
+    """
+    if not isinstance(data, dict):
+        return None
+    for source in (data, data.get('location')):
+        if not isinstance(source, dict):
+            continue
+        if 'coordinates' in source:
+            return technician_point({'location': source})
+        for lat_key, lng_key in (('latitude', 'longitude'), ('lat', 'lng')):
+            if lat_key in source and lng_key in source:
+                return _point(source[lat_key], source[lng_key])
+    return None
+
+
+def rating_factor(rating, weight):
+    """Score multiplier for a rating: 1 at MAX_RATING, growing as the rating drops"""
+    try:
+        rating = float(rating)
+    except (TypeError, ValueError):
+        rating = MIN_RATING
+    return (MAX_RATING / min(max(rating, MIN_RATING), MAX_RATING)) ** weight
+
+
+class TechnicianIndex:
+    """Grid index over the located technicians of one list.
+
+    A technician's score is distance_km * rating_factor, never less than the
+    distance itself, so the search can stop at the first ring of cells whose
+    nearest possible point is farther than the current k-th best score.
+    Rings grow by eight cells each, so once a ring would visit more cells
+    than are occupied (a user far from every technician), the remaining
+    occupied cells are scored in one pass instead. Technicians without valid
+    coordinates are left out (see ``unlocated``).
+    """
+
+    def __init__(self, technicians, rating_weight=1.0, cell_degrees=DEFAULT_CELL_DEGREES, use_numpy=None):
+        self.technicians = technicians
+        self.cell_degrees = cell_degrees
+        self.use_numpy = (NUMPY_AVAILABLE if use_numpy is None else use_numpy) and _import_numpy()
+        self.unlocated = []
+
+        grouped = {}  # cell -> per located technician: (list index, lat_rad, lng_rad, cos_lat, factor)
+        for index, technician in enumerate(technicians):
+            point = technician_point(technician)
+            if point is None:
+                self.unlocated.append(index)
+                continue
+            lat, lng = point
+            lat_rad = math.radians(lat)
+            grouped.setdefault(self._cell(lat, lng), []).append(
+                (index, lat_rad, math.radians(lng), math.cos(lat_rad),
+                 rating_factor(technician.get('rating'), rating_weight)))
+
+        # Laid out cell by cell, so each cell's technicians are one slice of the columns
+        located = []
+        cells = {}  # cell -> (start, stop) into the columns
+        for cell, members in grouped.items():
+            cells[cell] = (len(located), len(located) + len(members))
+            located.extend(members)
+
+        columns = list(zip(*located)) or [(), (), (), (), ()]
+        self._index, self._lat, self._lng, self._cos_lat, self._factor = (list(column) for column in columns)
+        self._cells = cells
+        if self.use_numpy:
+            self._arrays = tuple(np.array(column) for column in columns)
+
+        rows = [row for row, _ in cells] or [0]
+        cols = [col for _, col in cells] or [0]
+        self._bounds = (min(rows), max(rows), min(cols), max(cols))
+
+    def __len__(self):
+        return len(self._index)
+
+    def _cell(self, lat, lng):
+        return math.floor(lat / self.cell_degrees), math.floor(lng / self.cell_degrees)
+
+    def _ring(self, row, col, ring):
+        """Cells at Chebyshev distance ``ring`` from (row, col)"""
+        if ring == 0:
+            yield row, col
+            return
+        for offset in range(-ring, ring + 1):
+            yield row - ring, col + offset
+            yield row + ring, col + offset
+        for offset in range(-ring + 1, ring):
+            yield row + offset, col - ring
+            yield row + offset, col + ring
+
+    def _lower_bound_km(self, lat, degrees):
+        """No point at least ``degrees`` away in latitude or longitude is closer than this"""
+        along_meridian = EARTH_RADIUS_KM * math.radians(degrees)
+        # Longitude degrees are shortest at the highest latitude the ring reaches
+        cos_lat = math.cos(math.radians(min(abs(lat) + degrees + self.cell_degrees, 90.0)))
+        along_parallel = 2 * EARTH_RADIUS_KM * math.asin(min(1.0, cos_lat * math.sin(math.radians(degrees) / 2)))
+        return min(along_meridian, along_parallel) * 0.999
+
+    def _score_vectorized(self, spans, lat_rad, lng_rad, cos_lat, k):
+        """(score, distance_km, list index) for everyone in ``spans`` that can be among the best ``k``"""
+        if len(spans) == len(self._cells):
+            index, lat, lng, cos_lats, factor = self._arrays
+        else:
+            members = np.concatenate([np.arange(start, stop) for start, stop in spans])
+            index, lat, lng, cos_lats, factor = (column[members] for column in self._arrays)
+        a = np.sin((lat - lat_rad) / 2) ** 2 + cos_lat * cos_lats * np.sin((lng - lng_rad) / 2) ** 2
+        distances = 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+        scores = distances * factor
+        if len(scores) > k:
+            # Everyone tied with the k-th score is kept, so ties break as in a full sort
+            keep = scores <= np.partition(scores, k - 1)[k - 1]
+            scores, distances, index = scores[keep], distances[keep], index[keep]
+        return zip(scores.tolist(), distances.tolist(), index.tolist())
+
+    def _score(self, cells, lat_rad, lng_rad, cos_lat, k):
+        """(score, distance_km, list index) for everyone in ``cells`` (at least the best ``k`` of them)"""
+        spans = [self._cells[cell] for cell in cells]
+        if self.use_numpy and sum(stop - start for start, stop in spans) >= VECTORIZE_MIN:
+            return self._score_vectorized(spans, lat_rad, lng_rad, cos_lat, k)
+        scored = []
+        for member in chain.from_iterable(range(start, stop) for start, stop in spans):
+            a = (math.sin((self._lat[member] - lat_rad) / 2) ** 2
+                 + cos_lat * self._cos_lat[member] * math.sin((self._lng[member] - lng_rad) / 2) ** 2)
+            distance = 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(min(a, 1.0)))
+            scored.append((distance * self._factor[member], distance, self._index[member]))
+        return scored
+
+    def nearest(self, lat, lng, k=5):
+        """The ``k`` best (score, distance_km, list index) for a user at (lat, lng), best first"""
+        if not len(self) or k <= 0:
+            return []
+        lat_rad, lng_rad = math.radians(lat), math.radians(lng)
+        cos_lat = math.cos(lat_rad)
+        row, col = self._cell(lat, lng)
+        min_row, max_row, min_col, max_col = self._bounds
+        last_ring = max(abs(row - min_row), abs(row - max_row), abs(col - min_col), abs(col - max_col))
+        # Rings closer than the nearest occupied row or column are empty
+        ring = max(min_row - row, row - max_row, min_col - col, col - max_col, 0)
+
+        best = []
+        while ring <= last_ring:
+            if 8 * ring >= len(self._cells):
+                # Walking this ring would cost more than scoring every occupied cell not yet scored
+                cells = [cell for cell in self._cells if max(abs(cell[0] - row), abs(cell[1] - col)) >= ring]
+                return heapq.nsmallest(k, chain(best, self._score(cells, lat_rad, lng_rad, cos_lat, k)))
+            cells = [cell for cell in self._ring(row, col, ring) if cell in self._cells]
+            if cells:
+                best = heapq.nsmallest(k, chain(best, self._score(cells, lat_rad, lng_rad, cos_lat, k)))
+            # Everything not yet scored is at least `ring` whole cells away
+            if len(best) == k and best[-1][0] <= self._lower_bound_km(lat, ring * self.cell_degrees):
+                break
+            ring += 1
+        return best
+
+
+class TechnicianRanker:
+    """Rank technician lists for a user location, building one index per list.
+
+    Lists come from TECHNICIAN_CACHE, so the same list object is ranked for
+    many users; its index is kept (for the ``max_indexes`` most recent lists)
+    until the cache replaces the list.
+    """
+
+    def __init__(self, rating_weight=1.0, cell_degrees=DEFAULT_CELL_DEGREES, max_indexes=64):
+        self.rating_weight = rating_weight
+        self.cell_degrees = cell_degrees
+        self.max_indexes = max_indexes
+        self._indexes = OrderedDict()  # id(list) -> index (which holds the list, so the id stays valid)
+        self._lock = threading.Lock()
+        self.builds = 0
+
+    def index_for(self, technicians):
+        key = id(technicians)
+        with self._lock:
+            index = self._indexes.get(key)
+            if index is not None and index.technicians is technicians:
+                self._indexes.move_to_end(key)
+                return index
+        index = TechnicianIndex(technicians, self.rating_weight, self.cell_degrees)
+        with self._lock:
+            self._indexes[key] = index
+            self.builds += 1
+            while len(self._indexes) > self.max_indexes:
+                self._indexes.popitem(last=False)
+        return index
+
+    def rank(self, technicians, lat, lng, k=5):
+        """The ``k`` best technicians for a user at (lat, lng), as copies carrying 'distance' in km.
+
+        Located technicians come first, nearest and best rated first;
+        technicians without a location fill any remaining places in their
+        original order.
+        """
+        index = self.index_for(technicians)
+        ranked = [dict(technicians[position], distance=distance)
+                  for _, distance, position in index.nearest(lat, lng, k)]
+        ranked.extend(technicians[position] for position in index.unlocated[:k - len(ranked)])
+        return ranked
+
+    def stats(self):
+        with self._lock:
+            return {
+                'indexes': len(self._indexes),
+                'builds': self.builds,
+                'ratingWeight': self.rating_weight,
+                'cellDegrees': self.cell_degrees,
+                'numpy': NUMPY_AVAILABLE
+            }
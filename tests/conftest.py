@@ -0,0 +1,38 @@
+import os
+import sys
+
+import pytest
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(TESTS_DIR)
+
+# The app modules live in the repository root; the message corpus is shared with the benchmarks
+sys.path.insert(0, ROOT_DIR)
+sys.path.insert(1, os.path.join(ROOT_DIR, 'benchmarks'))
+
+# Importing app must never reach the real backend or spend a second loading NLTK
+os.environ.setdefault('BACKEND_URL', 'http://127.0.0.1:9')
+os.environ.setdefault('BACKEND_RETRIES', '0')
+os.environ.setdefault('NLP_PRELOAD', 'false')
+
+
+@pytest.fixture
+def chat_app():
+    """The app module with its backend pointed at a local stand-in and every cache empty"""
+    import app
+    from standin_backend import StandInBackend
+
+    def reset():
+        app.BACKEND._breakers.clear()
+        app.TECHNICIAN_CACHE.invalidate()
+        app.REPLY_CACHE.clear()
+
+    base_url = app.BACKEND.base_url
+    with StandInBackend() as backend:
+        app.BACKEND.base_url = backend.url
+        reset()
+        try:
+            yield app
+        finally:
+            app.BACKEND.base_url = base_url
+            reset()
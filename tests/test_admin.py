@@ -0,0 +1,31 @@
+import pytest
+
+import app
+
+ADMIN_ROUTES = [('DELETE', '/admin/reply-cache'), ('GET', '/admin/profiles'), ('DELETE', '/admin/profiles')]
+
+
+@pytest.mark.parametrize('method, path', ADMIN_ROUTES)
+def test_admin_routes_are_closed_without_a_token(monkeypatch, method, path):
+    monkeypatch.setattr(app, 'ADMIN_TOKEN', None)
+    client = app.app.test_client()
+    assert client.open(path, method=method).status_code == 403
+    assert client.open(path, method=method, headers={'X-Admin-Token': ''}).status_code == 403
+
+
+@pytest.mark.parametrize('method, path', ADMIN_ROUTES)
+def test_admin_routes_need_the_configured_token(monkeypatch, method, path):
+    monkeypatch.setattr(app, 'ADMIN_TOKEN', 's3cret')
+    client = app.app.test_client()
+    assert client.open(path, method=method).status_code == 403
+    assert client.open(path, method=method, headers={'X-Admin-Token': 'wrong'}).status_code == 403
+    assert client.open(path, method=method, headers={'X-Admin-Token': 's3cret'}).status_code == 200
+
+
+def test_profiling_is_only_forced_for_admins(monkeypatch):
+    with app.app.test_request_context(headers={'X-Profile': '1', 'X-Admin-Token': ''}):
+        monkeypatch.setattr(app, 'ADMIN_TOKEN', None)
+        assert not app.profile_requested()
+    with app.app.test_request_context(headers={'X-Profile': '1', 'X-Admin-Token': 's3cret'}):
+        monkeypatch.setattr(app, 'ADMIN_TOKEN', 's3cret')
+        assert app.profile_requested()
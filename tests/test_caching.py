@@ -0,0 +1,146 @@
+import asyncio
+import threading
+import time
+
+from caching import SingleFlightCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class BlockingLoader:
+    """A loader that counts its calls and holds each one until released"""
+
+    def __init__(self, value):
+        self.value = value
+        self.calls = 0
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def __call__(self):
+        self.calls += 1
+        self.started.set()
+        assert self.release.wait(5)
+        return self.value
+
+
+def wait_until(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, 'timed out'
+        time.sleep(0.005)
+
+
+def test_concurrent_misses_share_one_load():
+    cache = SingleFlightCache(ttl=30, stale_ttl=300)
+    loader = BlockingLoader(['tech'])
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get('plumbing', loader, timeout=5)))
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    wait_until(lambda: cache.stats()['coalesced'] == 7)
+    loader.release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert loader.calls == 1
+    assert results == [['tech']] * 8
+    assert cache.get('plumbing', loader) == ['tech']
+    assert loader.calls == 1
+
+
+def test_waiter_gives_up_after_its_timeout():
+    cache = SingleFlightCache()
+    loader = BlockingLoader(['tech'])
+    leader = threading.Thread(target=cache.get, args=('plumbing', loader))
+    leader.start()
+    assert loader.started.wait(5)
+    assert cache.get('plumbing', loader, timeout=0.01) is None
+    loader.release.set()
+    leader.join(5)
+    assert cache.get('plumbing', loader) == ['tech']
+
+
+def test_stale_value_is_served_while_one_refresh_runs():
+    clock = FakeClock()
+    cache = SingleFlightCache(ttl=30, stale_ttl=300, clock=clock)
+    assert cache.get('plumbing', lambda: ['old']) == ['old']
+
+    clock.now += 31
+    refresh = BlockingLoader(['new'])
+    assert cache.get('plumbing', refresh) == ['old']
+    assert refresh.started.wait(5)
+    assert cache.get('plumbing', refresh) == ['old']
+    refresh.release.set()
+    wait_until(lambda: cache.stats()['inFlight'] == 0)
+
+    assert refresh.calls == 1
+    assert cache.get('plumbing', refresh) == ['new']
+    stats = cache.stats()
+    assert (stats['refreshes'], stats['staleHits'], stats['hits']) == (1, 2, 1)
+
+
+def test_failed_refresh_keeps_the_stale_value():
+    clock = FakeClock()
+    cache = SingleFlightCache(ttl=30, stale_ttl=300, clock=clock)
+    cache.get('plumbing', lambda: ['old'])
+
+    clock.now += 31
+    assert cache.get('plumbing', lambda: None) == ['old']
+    wait_until(lambda: cache.stats()['refreshFailures'] == 1)
+    assert cache.get('plumbing', lambda: None) == ['old']
+
+    def broken():
+        raise ConnectionError('backend down')
+
+    wait_until(lambda: cache.stats()['inFlight'] == 0)
+    assert cache.get('plumbing', broken) == ['old']
+    wait_until(lambda: cache.stats()['refreshFailures'] == 3)
+
+
+def test_expired_value_is_reloaded_in_line():
+    clock = FakeClock()
+    cache = SingleFlightCache(ttl=30, stale_ttl=300, clock=clock)
+    cache.get('plumbing', lambda: ['old'])
+    clock.now += 331
+    assert cache.get('plumbing', lambda: ['new']) == ['new']
+    assert cache.stats()['misses'] == 2
+
+
+def test_failed_load_is_not_cached():
+    cache = SingleFlightCache()
+    assert cache.get('plumbing', lambda: None) is None
+    assert cache.get('plumbing', lambda: ['tech']) == ['tech']
+    assert cache.stats()['loadFailures'] == 1
+    assert cache.stats()['size'] == 1
+
+
+def test_size_bound_evicts_least_recently_used():
+    cache = SingleFlightCache(max_entries=2)
+    for key in ('a', 'b', 'a', 'c'):
+        cache.get(key, lambda: key.upper())
+    assert cache.get('b', lambda: 'reloaded') == 'reloaded'
+    assert cache.stats()['evictions'] == 2
+
+
+def test_async_misses_share_one_load():
+    cache = SingleFlightCache()
+    calls = []
+
+    async def loader():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return ['tech']
+
+    async def main():
+        return await asyncio.gather(*(cache.get_async('plumbing', loader, timeout=5) for _ in range(6)))
+
+    assert asyncio.run(main()) == [['tech']] * 6
+    assert len(calls) == 1
+    assert cache.get('plumbing', lambda: ['other']) == ['tech']
@@ -0,0 +1,46 @@
+def test_invalid_items_get_inline_errors(chat_app):
+    client = chat_app.app.test_client()
+    response = client.post('/chat/batch', json=[
+        {'message': 'Hello', 'userId': 'batch-1'},
+        {'message': 5, 'userId': 'batch-2'},
+        {'userId': 'batch-3'},
+        'Hello',
+        {'message': None},
+        {'message': ['Hello']},
+        {'message': 'I need a plumber', 'userId': 'batch-1'}
+    ])
+    assert response.status_code == 200
+    responses = response.get_json()['responses']
+    assert [item.get('error') for item in responses] == [
+        None, 'Message must be a string', 'Message is required', 'Message is required',
+        'Message must be a string', 'Message must be a string', None
+    ]
+    assert responses[0]['intent'] == 'greeting'
+    assert responses[6]['conversationStats']['messageCount'] == 2
+
+
+def test_batch_replies_match_single_messages(chat_app):
+    from corpus import CORPUS
+    client = chat_app.app.test_client()
+    for prefix in ('single', 'batch'):
+        for i in range(3):
+            chat_app.conversation_contexts.delete(f'{prefix}-{i}')
+
+    single = [client.post('/chat', json={'message': message, 'userId': f'single-{i % 3}'}).get_json()
+              for i, message in enumerate(CORPUS)]
+    batch = client.post('/chat/batch', json={'messages': [
+        {'message': message, 'userId': f'batch-{i % 3}'} for i, message in enumerate(CORPUS)
+    ]}).get_json()['responses']
+
+    for response_data in single + batch:
+        del response_data['timestamp']
+    assert batch == single
+
+
+def test_single_chat_rejects_a_non_string_message(chat_app):
+    client = chat_app.app.test_client()
+    for path in ('/chat', '/chat/stream'):
+        response = client.post(path, json={'message': 5})
+        assert response.status_code == 400
+        assert response.get_json() == {'error': 'Message must be a string'}
+    assert client.post('/chat', json={}).get_json() == {'error': 'Message is required'}
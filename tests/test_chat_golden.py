@@ -0,0 +1,58 @@
+"""
+/chat replies for the benchmark corpus against a recorded transcript
+Regenerate tests/data/chat_golden.json after an intended reply change with:
+python tests/test_chat_golden.py
+"""
+
+import json
+import os
+
+GOLDEN_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'chat_golden.json')
+
+# Beyond the corpus: service info sections, technician lists, a payment lookup and
+# complaints that share words with an FAQ
+EXTRA_MESSAGES = [
+    'show me available plumbers', 'hmm ok', 'payment 64b7f0c2a1d3e4f5a6b7c8d9',
+    'How much does electrical work cost?', 'Are your plumbers certified?', 'any tips to maintain my ac',
+    'urgent carpentry help', 'tell me about painting', 'who are the available cleaners',
+    'bad service', 'open hours', 'bad work, arrived hours late', 'unhappy, the work took hours'
+]
+USERS = 5
+
+
+def transcript(app):
+    """Every message sent in order, round-robin over a few fresh users, with the reply minus its timestamp"""
+    from corpus import CORPUS
+    user_ids = [f'golden-{i}' for i in range(USERS)]
+    for user_id in user_ids:
+        app.conversation_contexts.delete(user_id)
+    client = app.app.test_client()
+    entries = []
+    for i, message in enumerate(CORPUS + EXTRA_MESSAGES):
+        user_id = user_ids[i % USERS]
+        response = client.post('/chat', json={'message': message, 'userId': user_id}).get_json()
+        response.pop('timestamp')
+        entries.append({'message': message, 'userId': user_id, 'response': response})
+    return entries
+
+
+def test_chat_replies_match_the_golden_transcript(chat_app):
+    with open(GOLDEN_PATH, encoding='utf-8') as f:
+        golden = json.load(f)
+    entries = transcript(chat_app)
+    assert [entry['message'] for entry in entries] == [entry['message'] for entry in golden]
+    for entry, expected in zip(entries, golden):
+        assert entry == expected, entry['message']
+
+
+if __name__ == '__main__':
+    import conftest  # noqa: F401 - the module paths and environment the tests run with
+    from standin_backend import StandInBackend
+    with StandInBackend() as backend:
+        os.environ['BACKEND_URL'] = backend.url
+        import app
+        entries = transcript(app)
+    with open(GOLDEN_PATH, 'w', encoding='utf-8') as f:
+        json.dump(entries, f, ensure_ascii=False, indent=1)
+        f.write('\n')
+    print(f"Wrote {len(entries)} replies to {GOLDEN_PATH}")
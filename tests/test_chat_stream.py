@@ -0,0 +1,52 @@
+import json
+
+import backend_client
+import structured_logging
+
+
+def parse_events(body):
+    """(event, payload) pairs from an SSE body"""
+    events = []
+    for block in body.decode('utf-8').split('\n\n'):
+        if block:
+            event, data = block.split('\n', 1)
+            events.append((event[len('event: '):], json.loads(data[len('data: '):])))
+    return events
+
+
+def test_stream_carries_the_chat_reply(chat_app):
+    client = chat_app.app.test_client()
+    for user_id in ('stream-1', 'stream-2'):
+        chat_app.conversation_contexts.delete(user_id)
+    message = 'show me available plumbers'
+    expected = client.post('/chat', json={'message': message, 'userId': 'stream-1'}).get_json()
+    events = parse_events(client.post('/chat/stream', json={'message': message, 'userId': 'stream-2'}).data)
+
+    names = [event for event, _ in events]
+    assert names[0] == 'meta' and names[-1] == 'done'
+    assert set(names[1:-1]) <= {'holding', 'delta'}
+    assert events[0][1]['intent'] == expected['intent']
+    assert ''.join(payload['text'] for event, payload in events if event == 'delta') == expected['message']
+    done = events[-1][1]
+    for payload in (done, expected):
+        del payload['timestamp']
+    assert done == expected
+
+
+def test_stream_backend_call_runs_inside_the_budget_and_route(chat_app, monkeypatch):
+    seen = []
+    run_backend_call = chat_app.run_backend_call
+
+    def recording_backend_call(call):
+        seen.append((backend_client.remaining_budget(), structured_logging._route.get()))
+        return run_backend_call(call)
+
+    monkeypatch.setattr(chat_app, 'run_backend_call', recording_backend_call)
+    client = chat_app.app.test_client()
+    client.post('/chat/stream', json={'message': 'show me available plumbers', 'userId': 'stream-3'}).get_data()
+
+    [(remaining, route)] = seen
+    assert 0 < remaining <= chat_app.CHAT_LATENCY_BUDGET
+    assert route == '/chat/stream'
+    assert backend_client.remaining_budget() is None
+    assert structured_logging._route.get() is None
@@ -0,0 +1,160 @@
+import asyncio
+
+import pytest
+import requests
+
+from backend_client import AsyncBackendClient, BackendClient, CircuitOpenError
+from circuit_breaker import CircuitBreaker, CLOSED, OPEN, HALF_OPEN
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_breaker(**options):
+    clock = FakeClock()
+    options = dict({'failure_rate': 0.5, 'min_calls': 4, 'window': 10, 'open_seconds': 30}, **options)
+    return CircuitBreaker('technicians', clock=clock, **options), clock
+
+
+def call(breaker, ok):
+    assert breaker.allow()
+    if ok:
+        breaker.record_success()
+    else:
+        breaker.record_failure()
+
+
+def trip(breaker):
+    for ok in (True, False, True, False):
+        call(breaker, ok)
+    assert breaker.state == OPEN
+
+
+def test_stays_closed_below_min_calls():
+    breaker, _ = make_breaker()
+    for _ in range(3):
+        call(breaker, False)
+    assert breaker.state == CLOSED
+    call(breaker, False)
+    assert breaker.state == OPEN
+
+
+def test_opens_at_the_failure_rate():
+    breaker, _ = make_breaker()
+    for ok in (True, True, True, False, False):
+        call(breaker, ok)
+    assert breaker.state == CLOSED
+    call(breaker, False)
+    assert breaker.state == OPEN
+    assert breaker.stats()['trips'] == 1
+
+
+def test_only_the_rolling_window_counts():
+    breaker, _ = make_breaker(window=4)
+    for ok in (False, False, False, True, True, True):
+        call(breaker, ok)
+    # The window now holds F T T T: 25% failures
+    assert breaker.state == CLOSED
+
+
+def test_open_breaker_rejects_until_open_seconds_pass():
+    breaker, clock = make_breaker()
+    trip(breaker)
+    assert not breaker.allow()
+    assert not breaker.allow()
+    clock.now += 29.9
+    assert not breaker.allow()
+    assert breaker.stats()['rejected'] == 3
+    assert breaker.stats()['openForSeconds'] == 0.1
+
+    clock.now += 0.1
+    assert breaker.state == HALF_OPEN
+
+
+def test_half_open_trial_success_closes():
+    breaker, clock = make_breaker()
+    trip(breaker)
+    clock.now += 30
+    assert breaker.allow()
+    assert not breaker.allow()  # one trial at a time
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    assert breaker.stats()['recentFailureRate'] == 0.0
+    # The window starts again from the trial, so two more failures are below min_calls
+    for _ in range(2):
+        call(breaker, False)
+    assert breaker.state == CLOSED
+    call(breaker, False)
+    assert breaker.state == OPEN
+
+
+def test_half_open_trial_failure_reopens():
+    breaker, clock = make_breaker()
+    trip(breaker)
+    clock.now += 30
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert breaker.stats()['trips'] == 2
+    assert not breaker.allow()
+    clock.now += 30
+    assert breaker.state == HALF_OPEN
+
+
+def test_release_returns_an_unused_trial():
+    breaker, clock = make_breaker(half_open_calls=2)
+    trip(breaker)
+    clock.now += 30
+    assert breaker.allow() and breaker.allow()
+    assert not breaker.allow()
+    breaker.release()
+    assert breaker.allow()
+    assert breaker.state == HALF_OPEN
+
+
+def test_backend_client_fails_fast_once_the_breaker_opens():
+    # Nothing listens on the discard port, so every call is refused
+    client = BackendClient('http://127.0.0.1:9', retries=0, breaker_options={'min_calls': 3})
+    for _ in range(3):
+        with pytest.raises(requests.ConnectionError):
+            client.get('/api/technicians/available', endpoint='technicians')
+    with pytest.raises(CircuitOpenError):
+        client.get('/api/technicians/available', endpoint='technicians')
+    stats = client.stats()
+    assert stats['breakers']['technicians']['state'] == OPEN
+    assert stats['breakers']['technicians']['rejected'] == 1
+
+
+def test_cancelled_async_call_gives_back_the_half_open_trial():
+    breaker_clock = FakeClock()
+
+    async def cancel_a_trial_call():
+        # Accepts connections but never answers, so the call is still waiting when cancelled
+        server = await asyncio.start_server(lambda reader, writer: None, '127.0.0.1', 0)
+        port = server.sockets[0].getsockname()[1]
+        client = BackendClient(f'http://127.0.0.1:{port}', retries=0,
+                               breaker_options={'min_calls': 1, 'clock': breaker_clock})
+        async_client = AsyncBackendClient(client)
+        breaker = client.breaker('technicians')
+        call(breaker, False)
+        breaker_clock.now += 30
+        assert breaker.state == HALF_OPEN
+
+        task = asyncio.create_task(async_client.get('/api/technicians/available', endpoint='technicians'))
+        await asyncio.sleep(0.05)
+        assert not breaker.allow()  # The trial is in flight
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        await async_client.aclose()
+        server.close()
+        return breaker
+
+    breaker = asyncio.run(cancel_a_trial_call())
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow()
@@ -0,0 +1,145 @@
+import random
+import time
+from collections import Counter
+
+import pytest
+
+from context_store import MemoryContextStore, SQLiteContextStore
+
+INTENTS = [None, '', 'greeting', 'booking', 'payment', 'emergency']
+SERVICES = [None, '', 'plumbing', 'electrical', 'ac_repair']
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def scanned_distribution(store):
+    """What /analytics used to compute: a full scan over every context"""
+    contexts = store.values()
+    return {
+        'total': len(contexts),
+        'intents': dict(Counter(context.get('last_intent') or 'unknown' for context in contexts)),
+        'services': dict(Counter(context['last_service'] for context in contexts if context.get('last_service')))
+    }
+
+
+def random_context(rng):
+    context = {'messageCount': rng.randint(1, 20)}
+    for key, choices in (('last_intent', INTENTS), ('last_service', SERVICES)):
+        if rng.random() < 0.9:
+            context[key] = rng.choice(choices)
+    return context
+
+
+def apply_random_operations(stores, seed, users=40, operations=600):
+    """Apply the same seeded set/get/delete sequence to every store"""
+    rng = random.Random(seed)
+    for _ in range(operations):
+        user_id = f'user-{rng.randrange(users)}'
+        roll = rng.random()
+        if roll < 0.6:
+            context = random_context(rng)
+            for store in stores:
+                store.set(user_id, dict(context))
+        elif roll < 0.85:
+            for store in stores:
+                store.get(user_id)
+        else:
+            for store in stores:
+                store.delete(user_id)
+
+
+@pytest.fixture
+def sqlite_path(tmp_path):
+    return str(tmp_path / 'contexts.db')
+
+
+@pytest.mark.parametrize('flush_interval', [0, 0.05])
+def test_sqlite_and_memory_counts_agree(sqlite_path, flush_interval):
+    memory = MemoryContextStore(max_entries=1000, idle_ttl=None)
+    sqlite = SQLiteContextStore(sqlite_path, max_entries=1000, idle_ttl=None, flush_interval=flush_interval)
+    for seed in range(5):
+        apply_random_operations([memory, sqlite], seed)
+        assert sqlite.distribution() == memory.distribution()
+        assert sqlite.distribution() == scanned_distribution(sqlite)
+        assert len(sqlite) == len(memory)
+
+
+def test_memory_counts_follow_eviction_and_expiry():
+    clock = FakeClock()
+    store = MemoryContextStore(max_entries=15, idle_ttl=60, clock=clock)
+    rng = random.Random(7)
+    for seed in range(20):
+        apply_random_operations([store], seed, operations=100)
+        clock.now += rng.choice([1, 5, 30, 90])
+        assert store.distribution() == scanned_distribution(store)
+    stats = store.stats()
+    assert stats['evictions'] > 0 and stats['expirations'] > 0
+
+
+def test_sqlite_counts_follow_eviction(sqlite_path):
+    store = SQLiteContextStore(sqlite_path, max_entries=15, flush_interval=0)
+    for seed in range(10):
+        apply_random_operations([store], seed, operations=100)
+        assert store.distribution() == scanned_distribution(store)
+        assert len(store) <= 15
+    assert store.stats()['evictions'] > 0
+
+
+def test_sqlite_workers_see_each_others_writes(sqlite_path):
+    # Two stores on one file stand in for two gunicorn workers, configured as the app does by default
+    workers = [SQLiteContextStore(sqlite_path, cache_ttl=0, flush_interval=0) for _ in range(2)]
+    for message in range(1, 7):
+        store = workers[message % 2]
+        context = store.get_or_create('user-1', lambda: {'messageCount': 0})
+        context['messageCount'] += 1
+        store.set('user-1', context)
+        assert context['messageCount'] == message
+
+
+def test_get_never_creates_entries(sqlite_path):
+    for store in (MemoryContextStore(), SQLiteContextStore(sqlite_path, flush_interval=0)):
+        assert store.get('nobody') is None
+        assert 'nobody' not in store
+        assert store.distribution() == {'total': 0, 'intents': {}, 'services': {}}
+
+
+def stored_rows(store):
+    return store._connection().execute('SELECT COUNT(*) FROM contexts').fetchone()[0]
+
+
+def test_sqlite_evicts_only_the_oldest_over_the_bound(sqlite_path):
+    store = SQLiteContextStore(sqlite_path, max_entries=15, flush_interval=0, cache_ttl=0)
+    for i in range(15):
+        store.set(f'user-{i}', {'last_intent': 'greeting'})
+    assert store.stats()['evictions'] == 0
+    store.get('user-0')
+    store.set('user-15', {'last_intent': 'booking'})
+    store.set('user-16', {'last_intent': 'booking'})
+    assert stored_rows(store) == 15
+    assert store.stats()['evictions'] == 2
+    assert store.get('user-0') is not None
+    assert store.get('user-1') is None and store.get('user-2') is None
+
+
+def test_sqlite_deletes_idle_contexts_on_a_timer(sqlite_path):
+    store = SQLiteContextStore(sqlite_path, idle_ttl=0.05, flush_interval=0, cache_ttl=0, expire_interval=3600)
+    store.set('idle', {'last_intent': 'greeting'})
+    time.sleep(0.1)
+    store.set('active', {'last_intent': 'booking'})
+    # Not deleted until the next expiry run, but already gone for readers
+    assert stored_rows(store) == 2
+    assert store.get('idle') is None
+    assert len(store) == 1
+    assert store.distribution()['total'] == 1
+    assert stored_rows(store) == 1
+
+    store = SQLiteContextStore(sqlite_path, idle_ttl=0.05, flush_interval=0, cache_ttl=0, expire_interval=0)
+    time.sleep(0.1)
+    store.set('next', {'last_intent': 'booking'})
+    assert stored_rows(store) == 1
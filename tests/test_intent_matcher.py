@@ -0,0 +1,85 @@
+import random
+import re
+
+import pytest
+
+from corpus import CORPUS
+from intent_matcher import IntentMatcher
+from app import INTENT_PATTERNS, INTENT_MATCHER
+
+
+def legacy_scores(intent_patterns, message):
+    """The original detect_intent scoring: one re.search per pattern"""
+    message_lower = message.lower()
+    return {intent: sum(1 for pattern in patterns if re.search(pattern, message_lower, re.IGNORECASE))
+            for intent, patterns in intent_patterns.items()}
+
+
+def legacy_detect(intent_patterns, message):
+    intent_scores = legacy_scores(intent_patterns, message)
+    if max(intent_scores.values()) > 0:
+        return max(intent_scores, key=intent_scores.get)
+    return 'default'
+
+
+def vocabulary(intent_patterns):
+    """Every word the patterns and the corpus mention, plus filler and punctuation"""
+    words = set()
+    for patterns in intent_patterns.values():
+        for pattern in patterns:
+            words.update(re.findall(r"\w+(?:\\?'\w+)?", pattern.replace('\\b', ' ')))
+    words = {word.replace("\\'", "'") for word in words}
+    words.update(word for message in CORPUS for word in message.split())
+    return sorted(words) + ['the', 'my', 'is', 'a', 'please', 'now', '!', '?', ',', 'ok.', 'x']
+
+
+def random_messages(intent_patterns, count, seed):
+    rng = random.Random(seed)
+    words = vocabulary(intent_patterns)
+    messages = []
+    for _ in range(count):
+        picked = [rng.choice(words) for _ in range(rng.randint(1, 8))]
+        picked = [word.upper() if rng.random() < 0.1 else word for word in picked]
+        # Gluing neighbours without a space checks that word boundaries are kept
+        messages.append(''.join(word + rng.choice([' ', ' ', ' ', '', '-']) for word in picked).strip())
+    return messages
+
+
+@pytest.mark.parametrize('message', CORPUS)
+def test_corpus_matches_legacy_loop(message):
+    assert INTENT_MATCHER.scores(message) == legacy_scores(INTENT_PATTERNS, message)
+    assert INTENT_MATCHER.detect(message) == legacy_detect(INTENT_PATTERNS, message)
+
+
+def test_random_messages_match_legacy_loop():
+    messages = random_messages(INTENT_PATTERNS, 3000, seed=1)
+    mismatches = [message for message in messages
+                  if INTENT_MATCHER.scores(message) != legacy_scores(INTENT_PATTERNS, message)]
+    assert mismatches == []
+
+
+def test_batch_matches_single_messages():
+    messages = list(CORPUS) + random_messages(INTENT_PATTERNS, 500, seed=2) + ['', '   ']
+    assert INTENT_MATCHER.scores_batch(messages) == [INTENT_MATCHER.scores(message) for message in messages]
+    assert INTENT_MATCHER.detect_batch(messages) == [INTENT_MATCHER.detect(message) for message in messages]
+
+
+def test_overlapping_prefixes_and_fallback_patterns():
+    patterns = {
+        'short': [r'\bnot\b', r'\b(pay|pay now)\b'],
+        'long': [r'\b(not working|pay now please)\b'],
+        'regex': [r'\bfix(es|ed)?\b', r'\d{3}-\d{4}'],
+    }
+    matcher = IntentMatcher(patterns)
+    assert len(matcher.fallback_patterns) == 2
+    for message in ['not working', 'pay now please', 'PAY NOW', 'fixed it', 'call 555-1234 not now',
+                    'nothing', 'repay', 'not-working'] + random_messages(patterns, 500, seed=3):
+        assert matcher.scores(message) == legacy_scores(patterns, message), message
+        assert matcher.detect(message) == legacy_detect(patterns, message), message
+
+
+def test_ties_go_to_the_first_declared_intent():
+    matcher = IntentMatcher({'first': [r'\bboth\b'], 'second': [r'\bboth\b']})
+    assert matcher.detect('both') == 'first'
+    assert matcher.ranked('both') == [('first', 1), ('second', 1)]
+    assert matcher.detect('neither') == 'default'
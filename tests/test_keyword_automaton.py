@@ -0,0 +1,48 @@
+import pytest
+
+from corpus import CORPUS
+from keyword_automaton import KeywordAutomaton, ServiceMatcher
+from app import SERVICE_MATCHER, extract_service_type
+
+
+@pytest.mark.parametrize('message', [
+    'two aces', 'the tapes', 'the taper', 'sinking feeling', 'lighter', 'the lockers',
+    'please contact me', 'my monkey is loud'
+])
+def test_words_that_only_start_like_a_keyword_do_not_match(message):
+    assert extract_service_type(message) is None
+
+
+@pytest.mark.parametrize('message, service', [
+    ('the tap keeps tapping', 'plumbing'),
+    ('my pipes are leaking', 'plumbing'),
+    ('who are the available cleaners', 'cleaning'),
+    ('I need two locksmiths', 'locksmith'),
+    ('the lights are flickering', 'electrical'),
+    ('my AC is not cooling', 'hvac'),
+    ('the ac unit is broken', 'appliance_repair')
+])
+def test_listed_forms_match(message, service):
+    assert extract_service_type(message) == service
+
+
+def test_every_form_of_a_keyword_counts_once():
+    assert SERVICE_MATCHER.candidates('leak, leaks, leaking and a leaky pipe') == [('plumbing', 2)]
+    assert SERVICE_MATCHER.candidates('electricians') == [('electrical', 1)]
+
+
+def test_overlapping_keywords_are_all_reported():
+    automaton = KeywordAutomaton(['door lock', 'door', 'lock'])
+    assert automaton.find_all('fix the Door Lock') == {'door lock', 'door', 'lock'}
+    assert automaton.find_all('doorlock') == set()
+
+
+def test_ties_go_to_the_service_declared_first():
+    matcher = ServiceMatcher({'first': {'shared': []}, 'second': {'shared': []}})
+    assert matcher.best('the shared one') == 'first'
+    assert matcher.best('second and shared') == 'second'
+
+
+def test_batches_match_single_messages():
+    messages = CORPUS + ['two aces', 'the tap keeps tapping', '']
+    assert SERVICE_MATCHER.candidates_batch(messages) == [SERVICE_MATCHER.candidates(m) for m in messages]
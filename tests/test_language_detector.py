@@ -0,0 +1,49 @@
+import pytest
+
+from language_detector import LanguageDetector, ROMANIZED_LEXICON
+
+
+@pytest.fixture(scope='module')
+def detector():
+    return LanguageDetector()
+
+
+@pytest.mark.parametrize('message', [
+    'my ape is sick',
+    'Sari shop near me',
+    'I need a mage',
+    'naan bread delivery',
+    'ada compliant ramp',
+    'wada and tea',
+    'seri A football',
+    'panna cotta recipe',
+    'gana music',
+])
+def test_short_english_messages_with_lookalike_words_stay_english(detector, message):
+    assert detector.detect(message)[0] == 'en'
+
+
+@pytest.mark.parametrize('message, language', [
+    ('mata plumber kenek one', 'si'),
+    ('oyata puluwanda heta enna', 'si'),
+    ('enakku electrician venum', 'ta'),
+    ('enna venum', 'ta'),
+    ('මට ජලනල කාර්මිකයෙක් ඕනේ', 'si'),
+    ('எனக்கு மின்சார வேலை வேண்டும்', 'ta'),
+    ('I need a plumber', 'en'),
+])
+def test_detects_language(detector, message, language):
+    assert detector.detect(message)[0] == language
+
+
+def test_words_romanized_in_both_languages_count_for_neither(detector):
+    assert ROMANIZED_LEXICON['enna'] == ''
+    assert ROMANIZED_LEXICON['akka'] == ''
+    # Not English evidence either: the message has no countable letters left
+    assert detector.detect('enna') == ('en', 0.0)
+    assert detector.scores('enna venum') == {'en': 0.0, 'si': 0.0, 'ta': 1.0}
+
+
+def test_detect_batch_matches_detect(detector):
+    messages = ['my ape is sick', 'enakku electrician venum', 'මට උදව් ඕනේ', '']
+    assert detector.detect_batch(messages) == [detector.detect(message) for message in messages]
@@ -0,0 +1,123 @@
+import random
+from itertools import product
+
+from rendering import SECTION_KEYWORDS, TECHNICIAN_LIST_KEYWORDS
+from app import SERVICE_KNOWLEDGE, get_service_info, format_technician_list
+
+
+def legacy_service_info(service_type, query_lower):
+    """get_service_info as it was before the replies were precomputed"""
+    if service_type not in SERVICE_KNOWLEDGE:
+        return None
+
+    service_info = SERVICE_KNOWLEDGE[service_type]
+    response = f"**{service_type.replace('_', ' ').title()} Service**\n\n"
+    response += f"{service_info['description']}\n\n"
+
+    if any(word in query_lower for word in ['qualification', 'certified', 'licensed', 'experienced', 'training']) and not any(word in query_lower for word in ['name', 'names', 'list', 'available', 'show me', 'who are']):
+        tech_info = service_info.get('technician_info', {})
+        response += " **Our Technicians:**\n\n"
+        response += "**Qualifications:**\n"
+        for qual in tech_info.get('qualifications', []):
+            response += f"✓ {qual}\n"
+        response += "\n**Skills & Expertise:**\n"
+        for skill in tech_info.get('skills', []):
+            response += f"• {skill}\n"
+        response += "\n**Professional Tools:**\n"
+        for tool in tech_info.get('tools', []):
+            response += f"• {tool}\n"
+        response += f"\n **{tech_info.get('verification', 'All technicians are verified and insured')}**"
+    elif any(word in query_lower for word in ['cost', 'price', 'charge', 'fee', 'how much']):
+        response += f" **Average Cost:** {service_info['avg_cost']}\n"
+        response += f" **Typical Duration:** {service_info['avg_time']}\n\n"
+        response += "Note: Final cost depends on the specific issue and materials needed."
+    elif any(word in query_lower for word in ['problem', 'issue', 'fix', 'repair', 'help']):
+        response += "**Common Issues We Fix:**\n"
+        for issue in service_info['common_issues'][:5]:
+            response += f"• {issue}\n"
+        response += f"\n **Typical Duration:** {service_info['avg_time']}"
+    elif any(word in query_lower for word in ['tip', 'advice', 'prevent', 'maintain', 'care']):
+        response += "** Helpful Tips:**\n"
+        for tip in service_info['tips']:
+            response += f"• {tip}\n"
+    elif any(word in query_lower for word in ['emergency', 'urgent', 'immediate', 'asap']):
+        response += "** Emergency Signs:**\n"
+        for sign in service_info['emergency_signs']:
+            response += f"• {sign}\n"
+        response += "\n If you're experiencing any of these, book an emergency service immediately!"
+    else:
+        response += "**Common Issues:**\n"
+        for issue in service_info['common_issues'][:4]:
+            response += f"• {issue}\n"
+        response += f"\n **Cost:** {service_info['avg_cost']}\n"
+        response += f"**Duration:** {service_info['avg_time']}\n\n"
+        response += "Would you like to book this service?"
+    return response
+
+
+def legacy_technician_list(technicians, service_type):
+    """format_technician_list as it was before the lines were joined once"""
+    if not technicians or len(technicians) == 0:
+        return f"I don't have specific technician details available right now, but we have qualified {service_type} professionals ready to help you!\n\nWould you like to book a service? Our system will match you with the best available technician in your area."
+
+    response = f"**Available {service_type.title()} Technicians:**\n\n"
+    for i, tech in enumerate(technicians[:5], 1):
+        user = tech.get('user', {})
+        name = user.get('name', 'Technician') if isinstance(user, dict) else 'Technician'
+        phone = user.get('phone', '') if isinstance(user, dict) else ''
+        rating = tech.get('rating', 0)
+        skills = tech.get('skills', [])
+        distance = tech.get('distance', None)
+        response += f"**{i}. {name}**\n"
+        if phone:
+            response += f"   Phone: {phone}\n"
+        if distance and distance < 999:
+            response += f"    Distance: {distance:.1f} km away\n"
+        response += f"    Rating: {rating:.1f}/5.0\n"
+        if skills and len(skills) > 0:
+            response += f"   Skills: {', '.join(skills[:3])}\n"
+        response += "\n"
+    response += "Would you like to book one of these technicians? Just say 'book' and I'll help you!"
+    return response
+
+
+def service_queries():
+    """Every keyword alone and every pair of keywords, with and without a list request"""
+    keywords = [keyword for keywords in SECTION_KEYWORDS.values() for keyword in keywords]
+    queries = {'', 'tell me about it', 'contact'}
+    for first, second in product(keywords, repeat=2):
+        queries.add(f'{first} and {second}')
+        queries.add(f'{first}{second}')
+    for keyword, list_keyword in product(keywords, TECHNICIAN_LIST_KEYWORDS):
+        queries.add(f'{list_keyword} {keyword}')
+    return sorted(queries)
+
+
+def test_service_info_matches_legacy_rendering():
+    services = list(SERVICE_KNOWLEDGE) + ['unknown_service']
+    for service_type, query in product(services, service_queries()):
+        assert get_service_info(service_type, query) == legacy_service_info(service_type, query), (service_type, query)
+
+
+def random_technician(rng):
+    technician = {}
+    user = rng.choice([None, 'not a dict', {}, {'name': 'Kamal'}, {'name': 'Nimal', 'phone': '0771234567'},
+                       {'phone': None}, {'name': 'Priya', 'phone': ''}])
+    if user is not None:
+        technician['user'] = user
+    if rng.random() < 0.8:
+        technician['rating'] = rng.choice([0, 3, 4.25, 5.0])
+    if rng.random() < 0.8:
+        technician['skills'] = rng.choice([None, [], ['plumbing'], ['a', 'b', 'c', 'd']])
+    if rng.random() < 0.5:
+        technician['distance'] = rng.choice([None, 0, 0.04, 2.345, 998.9, 999, 1500])
+    return technician
+
+
+def test_technician_list_matches_legacy_rendering():
+    rng = random.Random(12)
+    for _ in range(2000):
+        technicians = [random_technician(rng) for _ in range(rng.randint(0, 7))]
+        service_type = rng.choice(['plumbing', 'appliance_repair', 'hvac'])
+        assert format_technician_list(technicians, service_type) == legacy_technician_list(technicians, service_type)
+    assert format_technician_list(None, 'plumbing') == legacy_technician_list(None, 'plumbing')
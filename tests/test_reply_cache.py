@@ -0,0 +1,98 @@
+from caching import LRUCache
+from app import analyze_message, reply_cache_key
+
+COLOMBO = (6.93, 79.85)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def key(message, last_service=None, coordinates=None):
+    return reply_cache_key(message, analyze_message(message), {'last_service': last_service}, coordinates)
+
+
+def test_key_folds_case_and_surrounding_whitespace():
+    assert key('  How much does a PLUMBER cost?\n') == key('how much does a plumber cost?')
+    assert key('how much does a plumber cost') != key('how much does a plumber cost?')
+
+
+def test_key_carries_the_nlu_results():
+    nlu = {'language': 'si', 'intent': 'pricing', 'service_type': 'plumbing'}
+    assert reply_cache_key('Mila kiyada?', nlu, {'last_service': 'electrical'}) == (
+        'mila kiyada?', 'si', 'pricing', 'plumbing', None, None)
+    assert key('Hello')[1:4] == ('en', 'greeting', None)
+
+
+def test_last_service_only_matters_for_default_replies():
+    assert key('hmm ok', last_service='plumbing') != key('hmm ok', last_service='electrical')
+    assert key('hmm ok', last_service='plumbing')[4] == 'plumbing'
+    assert key('Hello', last_service='plumbing') == key('Hello', last_service='electrical')
+
+
+def test_coordinates_only_matter_for_technician_lists():
+    listing = 'show me available plumbers'
+    assert key(listing, coordinates=COLOMBO) != key(listing, coordinates=(7.29, 80.63))
+    assert key(listing, coordinates=COLOMBO)[5] == COLOMBO
+    assert key('how much does a plumber cost', coordinates=COLOMBO)[5] is None
+    assert key('show me available options', coordinates=COLOMBO)[5] is None
+
+
+def test_lru_cache_expires_entries():
+    clock = FakeClock()
+    cache = LRUCache(max_entries=10, ttl=60, clock=clock)
+    cache.set('a', 'reply a')
+    cache.set('b', 'reply b', ttl=5)
+    clock.now += 5
+    assert cache.get('a') == 'reply a'
+    assert cache.get('b') is None
+    clock.now += 55
+    assert cache.get('a') is None
+    assert cache.stats()['expired'] == 2
+
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = LRUCache(max_entries=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.set('c', 3)
+    assert (cache.get('a'), cache.get('b'), cache.get('c')) == (1, None, 3)
+    assert cache.stats()['evictions'] == 1
+    assert cache.clear() == 2
+    assert len(cache) == 0 and cache.stats()['approxBytes'] == 0
+
+
+def test_disabled_lru_cache_stores_nothing():
+    cache = LRUCache(max_entries=0)
+    cache.set('a', 1)
+    assert cache.get('a') is None
+
+
+def chat_replies(app, messages, users=3):
+    """Each message's reply and conversation stats, twice over, so the second pass can hit the cache"""
+    client = app.app.test_client()
+    user_ids = [f'reply-cache-{i}' for i in range(users)]
+    for user_id in user_ids:
+        app.conversation_contexts.delete(user_id)
+    replies = []
+    for i, message in enumerate(messages * 2):
+        data = client.post('/chat', json={'message': message, 'userId': user_ids[i % users],
+                                          'latitude': COLOMBO[0], 'longitude': COLOMBO[1]}).get_json()
+        replies.append((data['message'], data['conversationStats']))
+    return replies
+
+
+def test_cached_replies_match_uncached_ones(chat_app, monkeypatch):
+    from corpus import CORPUS
+    messages = CORPUS + ['show me available plumbers', 'hmm ok', 'HMM OK ', 'who are the available cleaners']
+
+    cached = chat_replies(chat_app, messages)
+    assert chat_app.REPLY_CACHE.stats()['hits'] > len(messages) // 2
+
+    monkeypatch.setattr(chat_app, 'REPLY_CACHE', LRUCache(max_entries=0))
+    assert chat_replies(chat_app, messages) == cached
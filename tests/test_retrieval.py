@@ -0,0 +1,60 @@
+import pytest
+
+from retrieval import SKLEARN_AVAILABLE, RetrievalIndex
+from app import build_knowledge_documents, search_faq, search_faq_batch
+
+BACKENDS = [pytest.param(True, marks=pytest.mark.skipif(not SKLEARN_AVAILABLE, reason='needs scikit-learn')), False]
+
+DOCUMENTS = [
+    {'id': 'faq:hours', 'type': 'faq', 'text': 'working hours 8 AM - 8 PM'},
+    {'id': 'faq:pay', 'type': 'faq', 'text': 'payment methods card cash'},
+    {'id': 'service:cleaning', 'type': 'service', 'text': 'cleaning service for homes and offices'}
+]
+
+
+def is_faq(document):
+    return document['type'] == 'faq'
+
+
+@pytest.mark.parametrize('use_sklearn', BACKENDS)
+def test_backends_agree(use_sklearn):
+    documents = build_knowledge_documents()
+    index = RetrievalIndex(documents, use_sklearn=use_sklearn, min_score=0)
+    reference = RetrievalIndex(documents, use_sklearn=False, min_score=0)
+    for query in ('how do I book', 'my fridge is not cooling', 'සේවා වේලාවන්', ''):
+        assert ([r['id'] for r in index.search(query, top_k=5)] ==
+                [r['id'] for r in reference.search(query, top_k=5)])
+
+
+@pytest.mark.parametrize('use_sklearn', BACKENDS)
+def test_margin_is_over_the_best_rejected_document(use_sklearn):
+    index = RetrievalIndex(DOCUMENTS, use_sklearn=use_sklearn, min_score=0.05)
+    query = 'service hours'
+    [faq] = index.search(query, top_k=1, where=is_faq)
+    [rival] = index.search(query, top_k=1, where=lambda document: not is_faq(document))
+    assert faq['id'] == 'faq:hours'
+    gap = faq['score'] - rival['score']
+    assert index.search(query, top_k=1, where=is_faq, margin=gap - 0.01) == [faq]
+    assert index.search(query, top_k=1, where=is_faq, margin=gap + 0.01) == []
+    # Without a filter there is nothing to beat
+    assert index.search(query, top_k=1, margin=1.0) == index.search(query, top_k=1)
+
+
+@pytest.mark.parametrize('message', [
+    'bad service', 'open hours', 'I am not satisfied with the service', 'the service was terrible',
+    'bad work, arrived hours late', 'unhappy, the work took hours', 'I want to file a complaint'
+])
+def test_complaints_are_not_answered_with_an_faq(message):
+    assert search_faq(message) is None
+
+
+@pytest.mark.parametrize('message, answer', [
+    ('What are the working hours?', 'Service Hours'),
+    ('what are your working hours', 'Service Hours'),
+    ('can I pay by card', 'We accept'),
+    ('which areas do you serve', 'We currently serve'),
+    ('how do I book', 'To book a service')
+])
+def test_faq_questions_still_find_their_answer(message, answer):
+    assert search_faq(message).startswith(answer)
+    assert search_faq_batch([message, 'bad service']) == [search_faq(message), None]
@@ -0,0 +1,76 @@
+import math
+import random
+
+import pytest
+
+from technician_ranking import NUMPY_AVAILABLE, EARTH_RADIUS_KM, TechnicianIndex, TechnicianRanker, rating_factor
+
+INDEX_MODES = [False, True] if NUMPY_AVAILABLE else [False]
+
+# Inside the technicians' bounding box, just outside it, abroad, and with lat/lng swapped
+USERS = [(6.93, 79.85), (7.5, 80.5), (9.8, 81.0), (5.5, 79.5), (0.0, 0.0), (79.86, 6.9),
+         (51.5, -0.12), (-33.9, 151.2), (6.9, -100.0)]
+
+
+def make_technicians(count, seed):
+    """Technicians across Sri Lanka, a few of them sharing a spot or without a location"""
+    rng = random.Random(seed)
+    technicians = []
+    for _ in range(count):
+        roll = rng.random()
+        if roll < 0.05:
+            technician = {'location': {}}
+        elif roll < 0.1 and technicians:
+            technician = dict(rng.choice(technicians))
+        else:
+            technician = {'location': {'type': 'Point',
+                                       'coordinates': [rng.uniform(79.7, 81.9), rng.uniform(5.9, 9.9)]}}
+        technician['rating'] = rng.choice([None, 1, 2.5, 3.7, 4.2, 5])
+        technicians.append(technician)
+    return technicians
+
+
+def brute_force(technicians, lat, lng, k):
+    """Score every located technician and sort them all"""
+    scored = []
+    for position, technician in enumerate(technicians):
+        coordinates = technician['location'].get('coordinates')
+        if not coordinates:
+            continue
+        lat2, lng2 = math.radians(coordinates[1]), math.radians(coordinates[0])
+        a = (math.sin((lat2 - math.radians(lat)) / 2) ** 2
+             + math.cos(math.radians(lat)) * math.cos(lat2) * math.sin((lng2 - math.radians(lng)) / 2) ** 2)
+        distance = 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(min(a, 1.0)))
+        scored.append((distance * rating_factor(technician.get('rating'), 1.0), position))
+    return [position for _, position in sorted(scored)[:k]]
+
+
+@pytest.mark.parametrize('use_numpy', INDEX_MODES)
+@pytest.mark.parametrize('count', [3, 40, 2000])
+def test_nearest_matches_brute_force(use_numpy, count):
+    technicians = make_technicians(count, seed=count)
+    index = TechnicianIndex(technicians, use_numpy=use_numpy)
+    for lat, lng in USERS:
+        for k in (1, 5, count + 1):
+            assert [position for _, _, position in index.nearest(lat, lng, k)] == brute_force(technicians, lat, lng, k)
+
+
+@pytest.mark.parametrize('use_numpy', INDEX_MODES)
+def test_far_users_are_ranked_without_walking_empty_rings(use_numpy, monkeypatch):
+    technicians = make_technicians(2000, seed=1)
+    index = TechnicianIndex(technicians, use_numpy=use_numpy)
+    walked = []
+    ring = index._ring
+    monkeypatch.setattr(index, '_ring', lambda *args: walked.append(args) or ring(*args))
+    for lat, lng in USERS[4:]:
+        assert [position for _, _, position in index.nearest(lat, lng, 5)] == brute_force(technicians, lat, lng, 5)
+    assert walked == []
+
+
+def test_ranker_fills_with_unlocated_technicians():
+    technicians = [{'location': {}, 'user': {'name': 'A'}},
+                   {'location': {'coordinates': [79.85, 6.93]}, 'rating': 5, 'user': {'name': 'B'}}]
+    ranked = TechnicianRanker().rank(technicians, 6.93, 79.85, k=5)
+    assert [technician['user']['name'] for technician in ranked] == ['B', 'A']
+    assert ranked[0]['distance'] == pytest.approx(0.0)
+    assert 'distance' not in technicians[1]